@@ -0,0 +1,41 @@
+"""Compares dict_to_model with the implementation it replaced (deepcopy of
+every record + key set rebuilt on every call + generic schematics import
+loop) on pages of 500 deals with nested user/org/stage objects.
+
+    python -m benchmarks.bench_dict_to_model
+"""
+import json
+import timeit
+from copy import deepcopy
+
+from pipedrive import Deal, dict_to_model
+from .payloads import make_deal
+
+
+def legacy_dict_to_model(data, model_class):
+    data = deepcopy(data)
+    fields = model_class.fields
+    model_keys = set([fields[field_name].serialized_name or field_name
+                      for field_name in fields])
+    safe_keys = set(data.keys()).intersection(model_keys)
+    safe_data = {key: data[key] for key in safe_keys if data[key] != ''}
+    return model_class(raw_data=safe_data, original_data=data)
+
+
+def run(page_size=500, repeat=5):
+    page = json.loads(json.dumps([make_deal(i) for i in range(page_size)]))
+    results = {}
+    for name, convert in [('legacy', legacy_dict_to_model),
+                          ('dict_to_model', dict_to_model)]:
+        seconds = min(timeit.repeat(
+            lambda: [convert(item, Deal) for item in page],
+            number=1, repeat=repeat
+        ))
+        results[name] = seconds
+    results['speedup'] = results['legacy'] / results['dict_to_model']
+    return results
+
+
+if __name__ == '__main__':
+    for name, value in sorted(run().items()):
+        print('%-15s %.4f' % (name, value))
@@ -0,0 +1,128 @@
+"""A local stand-in for the Pipedrive API, serving generated deals over
+HTTP so that the benchmarks exercise the real network stack (requests
+session, retries, rate limiter) without touching pipedrive.com.
+
+    with FakePipedriveServer(deals=10000, fault_every=10) as server:
+        api = PipedriveAPI('token', base_url=server.base_url)
+"""
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from .payloads import make_deal, make_user, page_payload
+
+DETAIL_PATH = re.compile(r'^/v1/(deals|users)/(\d+)$')
+
+
+class FakePipedriveServer(object):
+    """Serves GET /v1/deals (paginated), /v1/deals/<id> and /v1/users/<id>.
+    Args:
+        deals(int): How many deals the account holds.
+        fault_every(int): Answers every n-th request with one of
+            fault_statuses instead of the payload, None for no faults.
+        fault_statuses(tuple): The statuses of the injected faults, used in
+            turn. 429s come with "Retry-After: 0".
+    """
+
+    def __init__(self, deals=10000, fault_every=None,
+                 fault_statuses=(429, 503)):
+        self.deals = [make_deal(deal_id) for deal_id in range(1, deals + 1)]
+        self.fault_every = fault_every
+        self.fault_statuses = fault_statuses
+        self.requests = 0
+        self.faults = 0
+        self._lock = threading.Lock()
+        self._pages = {}
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0),
+                                           self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return 'http://127.0.0.1:%d/v1' % self._server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests = 0
+            self.faults = 0
+
+    def respond(self, path, query):
+        """Returns (status, headers, body) for a GET."""
+        with self._lock:
+            self.requests += 1
+            fault = self.fault_every and self.requests % self.fault_every == 0
+            if fault:
+                self.faults += 1
+                status = self.fault_statuses[
+                    self.faults % len(self.fault_statuses)
+                ]
+        if fault:
+            body = json.dumps({'success': False, 'error': 'Injected fault'})
+            headers = {'Retry-After': '0'} if status == 429 else {}
+            return status, headers, body.encode('utf-8')
+
+        if path == '/v1/deals':
+            start = int(query.get('start', ['0'])[0])
+            limit = int(query.get('limit', ['100'])[0])
+            return 200, {}, self._page(start, limit)
+        match = DETAIL_PATH.match(path)
+        if match is None:
+            body = {'success': False, 'error': 'Unknown path'}
+            return 404, {}, json.dumps(body).encode('utf-8')
+        resource_id = int(match.group(2))
+        data = make_deal(resource_id) if match.group(1) == 'deals' else \
+            make_user(resource_id)
+        return 200, {}, json.dumps({'success': True, 'data': data}).encode(
+            'utf-8')
+
+    def _page(self, start, limit):
+        # Pages are encoded once, the server shouldn't be the bottleneck
+        key = (start, limit)
+        body = self._pages.get(key)
+        if body is None:
+            body = json.dumps(page_payload(self.deals, start, limit)).encode(
+                'utf-8')
+            self._pages[key] = body
+        return body
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                status, headers, body = server.respond(url.path,
+                                                       parse_qs(url.query))
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,46 @@
+"""Generated Pipedrive-like json payloads for the benchmarks."""
+
+
+def make_user(user_id):
+    return {'id': user_id, 'name': 'Owner %d' % user_id,
+            'email': 'owner%d@example.com' % user_id, 'has_pic': False,
+            'active_flag': True, 'value': user_id}
+
+
+def make_deal(deal_id):
+    return {
+        'id': deal_id,
+        'title': 'Deal %d' % deal_id,
+        'value': 1000 + deal_id,
+        'currency': 'USD',
+        'status': 'open',
+        'add_time': '2015-01-28 23:28:43',
+        'update_time': '2015-01-28 23:28:45',
+        'user_id': make_user(1 + deal_id % 20),
+        'org_id': {'name': 'Org %d' % deal_id, 'people_count': 1,
+                   'owner_id': 1, 'address': None, 'value': deal_id},
+        'stage_id': 1 + deal_id % 6,
+        'person_id': {'name': 'Person', 'email': [], 'phone': [],
+                      'value': deal_id},
+        'visible_to': '3',
+        'lost_reason': None,
+        'notes_count': 0,
+        'activities_count': 3,
+        'pipeline_id': 1,
+    }
+
+
+def page_payload(items, start, limit):
+    """One page of a list endpoint over `items`, as the API paginates."""
+    page = items[start:start + limit]
+    more = start + limit < len(items)
+    return {
+        'success': True,
+        'data': page,
+        'additional_data': {'pagination': {
+            'start': start,
+            'limit': limit,
+            'more_items_in_collection': more,
+            'next_start': start + limit if more else None,
+        }},
+    }
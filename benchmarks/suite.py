@@ -0,0 +1,212 @@
+"""Benchmark suite running against a local FakePipedriveServer:
+
+- pagination: throughput of iter_all over every deal, with and without
+  prefetching, in raw mode and streamed.
+- conversion: cost of dict_to_model and of the CollectionResponse modes.
+- retries: walking the deals while 429s and 503s are injected.
+- memory: peak memory of 10k records in each CollectionResponse mode.
+
+Results are written as json, and compared to a previous run to flag
+regressions:
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --compare results.json --tolerance 0.2
+
+Metric names tell which way is better: *_seconds and *_bytes should go
+down, *_per_second should go up. Other metrics are informational.
+"""
+import argparse
+import json
+import logging
+import platform
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+from collections import OrderedDict
+
+from pipedrive import (
+    PipedriveAPI, CollectionResponse, Deal, EndpointStats, RetryPolicy,
+    dict_to_model
+)
+from .fakeserver import FakePipedriveServer
+from .payloads import make_deal, page_payload
+
+PAGE_SIZE = 500
+COLLECTION_MODES = OrderedDict([
+    ('models', {}),
+    ('lazy', {'lazy': True}),
+    ('slots', {'record_type': 'slots'}),
+    ('raw', {'raw': True}),
+])
+
+
+def timed(func, repeat=3):
+    """Best wall time of func() over `repeat` runs, in seconds."""
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def bench_pagination(server, deals, repeat):
+    api = PipedriveAPI('token', base_url=server.base_url)
+    results = OrderedDict()
+    for name, options in [('prefetch', {}), ('serial', {'prefetch': False}),
+                          ('raw', {'raw': True}), ('stream', {'stream': True})]:
+        seconds = timed(lambda: sum(1 for _ in api.deal.iter_all(
+            page_size=PAGE_SIZE, **options
+        )), repeat)
+        results['%s_seconds' % name] = seconds
+        results['%s_records_per_second' % name] = deals / seconds
+    return results
+
+
+def bench_conversion(server, deals, repeat):
+    page = json.loads(json.dumps([make_deal(i) for i in range(PAGE_SIZE)]))
+    response = page_payload(page, 0, PAGE_SIZE)
+    results = OrderedDict()
+    seconds = timed(lambda: [dict_to_model(item, Deal) for item in page],
+                    repeat)
+    results['dict_to_model_record_seconds'] = seconds / PAGE_SIZE
+    for name, options in COLLECTION_MODES.items():
+        seconds = timed(lambda: CollectionResponse(response, Deal, **options),
+                        repeat)
+        results['collection_%s_10k_seconds' % name] = \
+            seconds * 10000 / PAGE_SIZE
+    return results
+
+
+def bench_retries(server, deals, repeat, fault_every=5, page_size=100):
+    stats = EndpointStats()
+    policy = RetryPolicy(max_retries=8, backoff_base=0.001, multiplier=2,
+                         max_backoff=0.01, time_budget=None)
+    api = PipedriveAPI('token', base_url=server.base_url, retry_policy=policy,
+                       observers=[stats])
+    server.fault_every = fault_every
+    server.reset_counters()
+    try:
+        started = time.time()
+        count = sum(1 for _ in api.deal.iter_all(page_size=page_size,
+                                                 prefetch=False))
+        seconds = time.time() - started
+    finally:
+        server.fault_every = None
+    totals = stats.report()[0][1]
+    return OrderedDict([
+        ('seconds', seconds),
+        ('records', count),
+        ('requests', server.requests),
+        ('faults_injected', server.faults),
+        ('retries', totals['retries']),
+        ('failed_calls', totals['errors']),
+    ])
+
+
+def bench_memory(server, deals, repeat, records=10000):
+    items = json.loads(json.dumps([make_deal(i) for i in range(records)]))
+    response = page_payload(items, 0, records)
+    results = OrderedDict()
+    for name, options in COLLECTION_MODES.items():
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        collection = CollectionResponse(response, Deal, **options)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results['%s_10k_bytes' % name] = current - baseline
+        results['%s_10k_peak_bytes' % name] = peak - baseline
+        del collection
+    return results
+
+
+BENCHMARKS = OrderedDict([
+    ('pagination', bench_pagination),
+    ('conversion', bench_conversion),
+    ('retries', bench_retries),
+    ('memory', bench_memory),
+])
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL
+        ).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(deals=10000, repeat=3, names=None):
+    """Runs the benchmarks and returns their results, with the context of
+    the run, as a json serializable dict."""
+    results = OrderedDict()
+    with FakePipedriveServer(deals=deals) as server:
+        for name in names or BENCHMARKS:
+            results[name] = BENCHMARKS[name](server, deals, repeat)
+    return OrderedDict([
+        ('meta', OrderedDict([
+            ('timestamp', time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())),
+            ('commit', git_commit()),
+            ('python', platform.python_version()),
+            ('platform', platform.platform()),
+            ('deals', deals),
+        ])),
+        ('results', results),
+    ])
+
+
+def compare(current, previous, tolerance=0.2):
+    """Lists the metrics that got worse by more than `tolerance` (a ratio)
+    since a previous run, as (benchmark, metric, previous, current) tuples.
+    """
+    regressions = []
+    for name, metrics in current['results'].items():
+        before = previous.get('results', {}).get(name, {})
+        for metric, value in metrics.items():
+            old = before.get(metric)
+            if not old or not value:
+                continue
+            if metric.endswith('_per_second'):
+                worse = value < old * (1 - tolerance)
+            elif metric.endswith('_seconds') or metric.endswith('_bytes'):
+                worse = value > old * (1 + tolerance)
+            else:
+                continue
+            if worse:
+                regressions.append((name, metric, old, value))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--deals', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', action='append', choices=list(BENCHMARKS),
+                        help='Run only these benchmarks')
+    parser.add_argument('--output', help='Where to write the json results')
+    parser.add_argument('--compare', help='Results of a previous run')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args(argv)
+    # The injected faults would log a warning per retry
+    logging.getLogger('pipedrive').setLevel(logging.ERROR)
+
+    report = run(args.deals, args.repeat, args.only)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as results_file:
+            results_file.write(output + '\n')
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as previous_file:
+            previous = json.load(previous_file)
+        regressions = compare(report, previous, args.tolerance)
+        for name, metric, old, value in regressions:
+            sys.stderr.write('REGRESSION %s.%s: %.6g -> %.6g\n' % (
+                name, metric, old, value
+            ))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,3 +2,19 @@ from .base import *
 from .models import *
 from .resources import *
 from .fields import *
+from .aio import *
+from .batch import *
+from .ratelimit import *
+from .retry import *
+from .cache import *
+from .custom_fields import *
+from .columnar import *
+from .sync import *
+from .mirror import *
+from .singleflight import *
+from .relations import *
+from .observers import *
+from .transport import *
+from .response import *
+from .streaming import *
+from .timeline import *
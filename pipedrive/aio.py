@@ -0,0 +1,633 @@
+# encoding:utf-8
+import asyncio
+import inspect
+from collections import OrderedDict
+from logging import getLogger
+from time import monotonic
+from urllib.parse import urlencode, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .base import BASE_URL, PipedriveAPI, PipedriveException
+from .batch import DEFAULT_CONCURRENCY, BatchResult, merge_rerun
+from .observers import RequestEvent, notify
+from .response import ParsedResponse, get_json_decoder
+from .retry import CircuitBreaker, RetryPolicy
+from .timeline import merge_timeline, plan_timeline
+from .transport import FakeBackend, Transport, build_response
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+__all__ = [
+    'AsyncPipedriveAPI', 'AsyncResource', 'AsyncDealResource',
+    'AsyncSearchResource', 'AsyncTransport', 'AiohttpTransport', 'StreamTransport',
+    'SyncTransportAdapter',
+]
+
+logger = getLogger('pipedrive.aio')
+
+
+def encode_form(values):
+    """Encodes a params/data dict the same way requests does: None values are
+    dropped and lists become repeated keys.
+    Args:
+        values(dict): The params or form data of a request.
+    Returns:
+        str: The urlencoded string (empty if there is nothing to encode).
+    """
+    if not values:
+        return ''
+    pairs = []
+    for key, value in values.items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            pairs.extend((key, item) for item in value if item is not None)
+        else:
+            pairs.append((key, value))
+    return urlencode(pairs)
+
+
+class AsyncTransport(object):
+    """Performs the HTTP requests of an AsyncPipedriveAPI.
+
+    Subclasses implement the request coroutine, which must return a
+    requests.Response (see build_response). Replace the transport to talk to a
+    local stand-in server or to plug in a different HTTP client.
+    """
+
+    async def request(self, method, url, params=None, data=None,
+                      headers=None):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class AiohttpTransport(AsyncTransport):
+    """Transport backed by a pooled aiohttp.ClientSession."""
+
+    def __init__(self, session=None, limit=100):
+        if aiohttp is None:
+            raise ImportError('AiohttpTransport requires the aiohttp package')
+        self.session = session
+        self.limit = limit
+
+    async def request(self, method, url, params=None, data=None,
+                      headers=None):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.limit)
+            )
+        query = encode_form(params)
+        if query:
+            url = '%s?%s' % (url, query)
+        body = encode_form(data)
+        headers = dict(headers or {})
+        if body:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        try:
+            async with self.session.request(method, url, data=body or None,
+                                            headers=headers) as resp:
+                content = await resp.read()
+                return build_response(resp.status, content, resp.headers, url)
+        except aiohttp.ClientConnectionError as err:
+            # Surfaced as requests' error so RetryPolicy treats it alike
+            raise requests.ConnectionError(err)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class StreamTransport(AsyncTransport):
+    """Dependency-free transport built on asyncio streams.
+
+    Every request opens its own HTTP/1.1 connection (``Connection: close``).
+    It's used when aiohttp is not installed and is handy for tests against a
+    local stand-in server.
+    """
+
+    def __init__(self, timeout=60, ssl_context=None):
+        self.timeout = timeout
+        self.ssl_context = ssl_context
+
+    async def request(self, method, url, params=None, data=None,
+                      headers=None):
+        return await asyncio.wait_for(
+            self._request(method, url, params, data, headers), self.timeout
+        )
+
+    async def _request(self, method, url, params, data, headers):
+        parts = urlsplit(url)
+        query = '&'.join(q for q in (parts.query, encode_form(params)) if q)
+        target = (parts.path or '/') + ('?' + query if query else '')
+        body = encode_form(data).encode('utf-8')
+        https = parts.scheme == 'https'
+        port = parts.port or (443 if https else 80)
+        ssl = (self.ssl_context or True) if https else None
+
+        reader, writer = await asyncio.open_connection(parts.hostname, port,
+                                                       ssl=ssl)
+        try:
+            head = [
+                '%s %s HTTP/1.1' % (method, target),
+                'Host: %s' % parts.netloc,
+                'Connection: close',
+                'Accept-Encoding: identity',
+                'Content-Length: %d' % len(body),
+            ]
+            if body:
+                head.append('Content-Type: application/x-www-form-urlencoded')
+            head.extend('%s: %s' % item for item in (headers or {}).items())
+            writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+            writer.write(body)
+            await writer.drain()
+
+            status_line = await reader.readline()
+            status_code = int(status_line.split()[1])
+            resp_headers = CaseInsensitiveDict()
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                resp_headers[name.strip()] = value.strip()
+
+            encoding = resp_headers.get('Transfer-Encoding', '').lower()
+            if encoding == 'chunked':
+                content = await self._read_chunked(reader)
+            elif 'Content-Length' in resp_headers:
+                content = await reader.readexactly(
+                    int(resp_headers['Content-Length'])
+                )
+            else:
+                content = await reader.read()
+        finally:
+            writer.close()
+        return build_response(status_code, content, resp_headers, url)
+
+    @staticmethod
+    async def _read_chunked(reader):
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                await reader.readline()
+                return b''.join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+
+
+class SyncTransportAdapter(AsyncTransport):
+    """Runs a synchronous Transport (FakeBackend, CassetteTransport...) for
+    an AsyncPipedriveAPI.
+    Args:
+        transport(Transport): The wrapped transport.
+        in_executor(bool): Whether requests run in the loop's default
+            executor, for transports that block on the network. The
+            in-memory ones are called directly.
+    """
+
+    def __init__(self, transport, in_executor=False):
+        self.transport = transport
+        self.in_executor = in_executor
+
+    async def request(self, method, url, params=None, data=None,
+                      headers=None):
+        if not self.in_executor:
+            return self.transport.request(method, url, params=params,
+                                          data=data, headers=headers)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: self.transport.request(
+            method, url, params=params, data=data, headers=headers
+        ))
+
+    async def close(self):
+        self.transport.close()
+
+
+def default_transport():
+    if aiohttp is not None:
+        return AiohttpTransport()
+    return StreamTransport()
+
+
+class _PendingRequest(Exception):
+    """Raised by _ReplayAPI when a resource method asks for a response that
+    hasn't been fetched yet."""
+
+    def __init__(self, method, path, params, data, headers):
+        super(_PendingRequest, self).__init__(method, path)
+        self.method = method
+        self.path = path
+        self.params = params
+        self.data = data
+        self.headers = headers
+
+
+class _ReplayAPI(object):
+    """Stand-in api object handed to the synchronous resources by
+    AsyncResource. It serves the responses fetched so far, in order, and
+    interrupts the resource method on the first request it can't serve.
+
+    Attributes:
+        pending(_PendingRequest): The last request it couldn't serve.
+    """
+
+    def __init__(self, api, responses):
+        self._api = api
+        self._responses = responses
+        self._served = 0
+        self.pending = None
+
+    def send_request(self, method, path, params=None, data=None,
+                     headers=None, stream=False):
+        # The async transports read the whole body, stream is moot
+        if self._served < len(self._responses):
+            response = self._responses[self._served]
+            self._served += 1
+            return response
+        self.pending = _PendingRequest(method, path, dict(params or {}), data,
+                                       headers)
+        raise self.pending
+
+
+class AsyncResource(object):
+    """Exposes every method of a registered BaseResource subclass as a
+    coroutine.
+
+    The resource code itself is reused untouched: the method runs against a
+    _ReplayAPI, and whenever it needs a response we await it on the event loop
+    and run the method again with that response available. Single request
+    methods (detail, list, find, create...) therefore run twice, which is
+    negligible next to the request itself.
+
+    Methods fanning out over a pool of threads (detail_many, bulk_create...)
+    can't be replayed: they have their own coroutines here, running the
+    requests concurrently on the loop. Any other one raises
+    NotImplementedError.
+
+    The async transports read the whole body of the responses, so the stream
+    option of the read methods (list(stream=True)...) is ignored: the pages
+    are plain CollectionResponses.
+    """
+
+    def __init__(self, api, resource_class):
+        self.api = api
+        self.resource_class = resource_class
+        setattr(api, resource_class.API_ACESSOR_NAME, self)
+
+    def __getattr__(self, item):
+        attr = getattr(self.resource_class, item)
+        if item.startswith('__') or not inspect.isfunction(attr):
+            return attr
+
+        async def method(*args, **kwargs):
+            return await self._run(item, args, kwargs)
+
+        method.__name__ = item
+        method.__doc__ = attr.__doc__
+        return method
+
+    async def iter_pages(self, *args, list_method='list', page_size=500,
+                         prefetch=True, **params):
+        """Async counterpart of BaseResource.iter_pages: yields one
+        CollectionResponse per page, fetching the next page as a separate task
+        while the caller handles the current one. list_method must be given by
+        name.
+        """
+        start = params.pop('start', 0)
+
+        def fetch(start):
+            kwargs = dict(params, start=start, limit=page_size)
+            return asyncio.ensure_future(self._run(list_method, args, kwargs))
+
+        pending = fetch(start)
+        try:
+            while pending is not None:
+                page = await pending
+                pending = None
+                has_more = page.more_items_in_collection
+                if has_more and prefetch:
+                    pending = fetch(page.next_start)
+                yield page
+                if has_more and not prefetch:
+                    pending = fetch(page.next_start)
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def iter_all(self, *args, **kwargs):
+        """Async counterpart of BaseResource.iter_all."""
+        async for page in self.iter_pages(*args, **kwargs):
+            for item in page.items:
+                yield item
+
+    stream = iter_all
+
+    async def detail_many(self, resource_ids,
+                          concurrency=DEFAULT_CONCURRENCY):
+        """Async counterpart of BaseResource.detail_many, with at most
+        `concurrency` detail requests of this batch in flight."""
+        async def fetch(resource_id):
+            return await self._run('detail', (resource_id,), {})
+
+        return await gather_batch(fetch, resource_ids, concurrency)
+
+    async def bulk_create(self, models, concurrency=DEFAULT_CONCURRENCY):
+        """Async counterpart of BaseResource.bulk_create."""
+        models = OrderedDict(enumerate(models))
+        return await self._bulk_write('POST', 'create', models, concurrency)
+
+    async def bulk_update(self, models, concurrency=DEFAULT_CONCURRENCY):
+        """Async counterpart of BaseResource.bulk_update."""
+        models = OrderedDict((model.id, model) for model in models)
+        return await self._bulk_write('PUT', 'update', models, concurrency)
+
+    async def bulk_delete(self, resources, chunk_size=None,
+                          concurrency=DEFAULT_CONCURRENCY):
+        """Async counterpart of BaseResource.bulk_delete."""
+        resource_ids, chunks = self.resource_class._delete_chunks(resources,
+                                                                  chunk_size)
+
+        async def delete_chunk(chunk):
+            return await self._run('_bulk_delete', (chunk,), {})
+
+        async def delete(resource_id):
+            response = await self._run('_delete', (resource_id,), {})
+            return response.json().get('data')
+
+        chunk_batch = await gather_batch(delete_chunk, chunks, concurrency)
+        batch, failed = self.resource_class._split_chunks(chunks, chunk_batch)
+        return await rerun_gathered(batch, delete, failed, resource_ids,
+                                    concurrency)
+
+    async def _bulk_write(self, method, name, models, concurrency):
+        # Fails right away when the resource has no such method
+        getattr(self.resource_class, name)
+
+        async def write(key):
+            return await self._run(name, (models[key],), {})
+
+        batch = await gather_batch(write, list(models), concurrency)
+        retryable = [key for key, err in batch.errors.items()
+                     if self.api.retry_policy.is_retryable(method, err)]
+        return await rerun_gathered(batch, write, retryable, list(models))
+
+    async def _run(self, name, args, kwargs):
+        if 'stream' in kwargs:
+            kwargs = dict(kwargs)
+            del kwargs['stream']
+        responses = []
+        while True:
+            replay = _ReplayAPI(self.api, responses)
+            resource = self.resource_class(replay)
+            try:
+                result = getattr(resource, name)(*args, **kwargs)
+            except _PendingRequest as pending:
+                response = await self.api.send_request(
+                    pending.method, pending.path, pending.params, pending.data,
+                    pending.headers
+                )
+                responses.append(response)
+                continue
+            if replay.pending is not None:
+                # A request was swallowed, e.g. by a batch run in threads
+                raise NotImplementedError(
+                    '%s.%s has no async counterpart' % (
+                        self.resource_class.__name__, name
+                    )
+                )
+            return result
+
+
+class AsyncDealResource(AsyncResource):
+    """The AsyncResource of api.deal."""
+
+    async def timeline_periods(self, start_date, interval, amount, field_key,
+                               chunk_size=None,
+                               concurrency=DEFAULT_CONCURRENCY, **kwargs):
+        """Async counterpart of DealResource.timeline_periods, the chunks
+        being fetched concurrently on the loop."""
+        chunks = plan_timeline(start_date, interval, amount, chunk_size)
+        params = kwargs.pop('params', None) or {}
+
+        async def fetch(chunk):
+            chunk_start, chunk_amount = chunk
+            response = await self._run(
+                'timeline', (chunk_start, interval, chunk_amount, field_key),
+                dict(kwargs, params=dict(params))
+            )
+            return response.get('data') or []
+
+        return merge_timeline(await gather_batch(fetch, chunks, concurrency))
+
+
+class AsyncSearchResource(AsyncResource):
+    """The AsyncResource of api.search."""
+
+    async def hydrate(self, results, concurrency=DEFAULT_CONCURRENCY):
+        """Async counterpart of SearchResource.hydrate, the details being
+        fetched concurrently on the loop."""
+        async def fetch(key):
+            result_type, resource_id = self.resource_class._check_result_key(
+                self.api, key
+            )
+            return await getattr(self.api, result_type).detail(resource_id)
+
+        keys = self.resource_class._result_keys(results)
+        return await gather_batch(fetch, keys, concurrency)
+
+
+async def gather_batch(func, keys, concurrency=DEFAULT_CONCURRENCY):
+    """Async counterpart of run_batch: awaits func(key) for every distinct
+    key, with at most `concurrency` of them in flight.
+    Returns:
+        BatchResult: With results and errors kept in input order.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    keys = list(OrderedDict.fromkeys(keys))
+
+    async def call(key):
+        async with semaphore:
+            return await func(key)
+
+    outcomes = await asyncio.gather(*[call(key) for key in keys],
+                                    return_exceptions=True)
+    batch = BatchResult()
+    for key, outcome in zip(keys, outcomes):
+        if isinstance(outcome, Exception):
+            batch.errors[key] = outcome
+        else:
+            batch.results[key] = outcome
+    return batch
+
+
+async def rerun_gathered(batch, func, keys, order, concurrency=1):
+    """Async counterpart of rerun_failed."""
+    keys = list(OrderedDict.fromkeys(keys))
+    if not keys:
+        return batch
+    rerun = await gather_batch(func, keys, concurrency)
+    return merge_rerun(batch, rerun, keys, order)
+
+
+class AsyncPipedriveAPI(object):
+    """asyncio counterpart of PipedriveAPI.
+
+    Shares PipedriveAPI.resource_registry, so every registered resource is
+    available with the same accessor and method names, only awaited:
+
+        async with AsyncPipedriveAPI('token') as api:
+            deals = await asyncio.gather(*[api.deal.detail(i) for i in ids])
+
+    Attributes:
+        transport(AsyncTransport): Performs the HTTP requests. Defaults to
+            AiohttpTransport when aiohttp is installed, StreamTransport
+            otherwise, and to a FakeBackend without api_token. Synchronous
+            Transports are wrapped in a SyncTransportAdapter.
+        max_concurrency(int): Upper bound of requests in flight at once, or
+            None for no bound.
+        json_decoder(str|callable): Decodes the response bodies, see
+            pipedrive.response.get_json_decoder.
+    """
+    resource_registry = PipedriveAPI.resource_registry
+    # The AsyncResource subclasses of the resources with methods of their own
+    async_resource_classes = {
+        'deal': AsyncDealResource,
+        'search': AsyncSearchResource,
+    }
+
+    def __init__(self, api_token=None, max_retries=4, retry_backoff_base=4,
+                 transport=None, max_concurrency=None, base_url=BASE_URL,
+                 retry_policy=None, circuit_breaker=None, observers=None,
+                 json_decoder=None):
+        self.api_token = api_token
+        self.max_retries = max_retries
+        self.retry_backoff_base = retry_backoff_base
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_retries=max_retries, multiplier=retry_backoff_base
+        )
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        if transport is None and api_token in (None, ''):
+            # No account to talk to, serve the requests from memory
+            transport = FakeBackend()
+        if isinstance(transport, Transport):
+            transport = SyncTransportAdapter(transport)
+        self.transport = transport or default_transport()
+        self.max_concurrency = max_concurrency
+        self.base_url = base_url
+        self.observers = list(observers or [])
+        self.json_decoder = get_json_decoder(json_decoder)
+        self._semaphore = None
+
+    def __getattr__(self, item):
+        try:
+            resource_class = self.resource_registry[item]
+        except KeyError:
+            raise AttributeError('No resource is registered under that name.')
+        async_class = self.async_resource_classes.get(item, AsyncResource)
+        return async_class(self, resource_class)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        await self.transport.close()
+
+    async def send_request(self, method, path, params=None, data=None,
+                           headers=None):
+        event = RequestEvent(method, path)
+        if self.observers:
+            notify(self.observers, 'on_request_start', event)
+        try:
+            response = await self._attempts(method, path, params, data,
+                                            headers, event)
+        except Exception as err:
+            self._request_ended(event, error=err)
+            raise
+        self._request_ended(event, response)
+        return response
+
+    def add_observer(self, observer):
+        self.observers.append(observer)
+
+    def _request_ended(self, event, response=None, error=None):
+        if self.observers:
+            event.finish(response, error)
+            notify(self.observers, 'on_request_end', event)
+
+    async def _attempts(self, method, path, params, data, headers, event):
+        params = dict(params or {})
+        params['api_token'] = self.api_token
+        url = self.base_url + path
+        started = monotonic()
+        attempt = 0
+        delay = None
+        while True:
+            self.circuit_breaker.before_request()
+            try:
+                response = await self._send(method, url, params, data,
+                                            headers)
+            except Exception as err:
+                self.circuit_breaker.record(err)
+                delay = self.retry_policy.next_delay(
+                    method, err, attempt, monotonic() - started, delay
+                )
+                if delay is None:
+                    # Max retries or something that shouldn't be retried
+                    logger.exception('Request failed: %s', err)
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                event.retries = attempt
+                continue
+            self.circuit_breaker.record()
+            return response
+
+    async def _send(self, method, url, params, data, headers=None):
+        if self.max_concurrency and self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self._semaphore is None:
+            response = await self.transport.request(method, url, params,
+                                                    data, headers)
+        else:
+            async with self._semaphore:
+                response = await self.transport.request(method, url, params,
+                                                        data, headers)
+
+        if response.status_code == 304:
+            # Not modified, the caller holds the cached content
+            return response
+
+        request = {
+            "method": method,
+            "url": url,
+            "params": params,
+            "data": data,
+        }
+        try:
+            parsed = ParsedResponse.decode(response, self.json_decoder)
+        except ValueError:
+            raise PipedriveException(
+                'Non-JSON response (HTTP %s)' % response.status_code,
+                request,
+                response
+            )
+        if not parsed.success:
+            raise PipedriveException(
+                parsed.payload.get('error', ''),
+                request,
+                response
+            )
+        return parsed
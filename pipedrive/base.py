@@ -1,12 +1,23 @@
 # encoding:utf-8
 from copy import deepcopy
 from logging import getLogger
-from time import sleep
-from functools import reduce
+from time import monotonic, sleep
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 from schematics.models import Model
 from schematics.types import BooleanType, IntType
+from schematics.exceptions import BaseError, ModelConversionError
+from .batch import (
+    DEFAULT_CONCURRENCY, BatchResult, iter_batch, rerun_failed, run_batch
+)
+from .ratelimit import MAX_CONCURRENCY, RateLimiter, endpoint_key
+from .retry import CircuitBreaker, RetryPolicy
+from .observers import RequestEvent, notify
+from .singleflight import SingleFlight
+from .response import ParsedResponse, get_json_decoder
+from .transport import FakeBackend
 
 
 logger = getLogger('pipedrive.api')
@@ -15,13 +26,54 @@ BASE_URL = 'https://api.pipedrive.com/v1'
 
 
 class PipedriveAPI(object):
+    """Client of the Pipedrive API, the resources being its attributes
+    (api.deal, api.person...).
+
+    One instance can be shared by many threads: the rate limiter, circuit
+    breaker, cache and single flight are thread-safe, and the requests never
+    modify the params they are given. The default requests.Session is shared
+    with its default pool of 10 connections, so for many workers pass a
+    RequestsTransport sized for them:
+
+        api = PipedriveAPI('token', transport=RequestsTransport(
+            pool_maxsize=64, timeout=(5, 60)
+        ))
+
+    The default rate limiter then lets as many requests be in flight as the
+    transport pools connections for (and at least MAX_CONCURRENCY). A
+    rate_limiter given explicitly keeps its own max_concurrency.
+    """
     resource_registry = {}
 
-    def __init__(self, api_token=None, max_retries=4, retry_backoff_base=4):
+    def __init__(self, api_token=None, max_retries=4, retry_backoff_base=4,
+                 rate_limiter=None, retry_policy=None, circuit_breaker=None,
+                 cache=None, read_options=None, single_flight=None,
+                 observers=None, transport=None, json_decoder=None,
+                 base_url=BASE_URL):
         self.api_token = api_token
+        self.base_url = base_url
         self.max_retries = max_retries
         self.retry_backoff_base = retry_backoff_base
+        if rate_limiter is None:
+            pool_maxsize = getattr(transport, 'pool_maxsize', None) or 0
+            rate_limiter = RateLimiter(
+                max_concurrency=max(MAX_CONCURRENCY, pool_maxsize)
+            )
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_retries=max_retries, multiplier=retry_backoff_base
+        )
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.cache = cache
+        self.read_options = read_options or {}
+        self.single_flight = single_flight or SingleFlight()
+        self.observers = list(observers or [])
         self.session = requests.Session()
+        if transport is None and api_token in (None, ''):
+            # No account to talk to, serve the requests from memory
+            transport = FakeBackend()
+        self.transport = transport
+        self.json_decoder = get_json_decoder(json_decoder)
 
     def __getattr__(self, item):
         try:
@@ -29,54 +81,125 @@ class PipedriveAPI(object):
         except KeyError:
             raise AttributeError('No resource is registered under that name.')
 
-    def send_request(self, method, path, params=None, data=None, attempt=0):
-
-        def handle_request_exception(err, log_message):
-            if (attempt >= self.max_retries) or \
-                    (err.response.status_code in range(400, 500)):
-                # Max retries or something that shouldn't be retried
-                logger.exception(log_message)
-                raise err
-            sleep(self.retry_backoff_base ** attempt)
-            return self.send_request(method, path, params, data, attempt + 1)
-
-        if self.api_token in (None, ''):
-            class MockResponse(requests.Response):
-                def json(self):
-                    return {'data': {}}
-
-            return MockResponse()
-
-        params = params or {}
-        params['api_token'] = self.api_token
-        url = BASE_URL + path
+    def send_request(self, method, path, params=None, data=None,
+                     headers=None, stream=False):
+        if stream:
+            # The body is read by the caller, it can't be shared
+            return self._request(method, path, params, data, headers,
+                                 stream=True)
+        if self.single_flight.applies_to(method):
+            key = self.single_flight.key(method, path, params, headers)
+            return self.single_flight.do(key, lambda: self._request(
+                method, path, params, data, headers
+            ))
+        return self._request(method, path, params, data, headers)
+
+    def close(self):
+        """Closes the pooled connections."""
+        (self.transport or self.session).close()
+
+    def add_observer(self, observer):
+        """Registers an Observer getting an event for every API call."""
+        self.observers.append(observer)
+
+    def _request(self, method, path, params=None, data=None, headers=None,
+                 stream=False):
+        event = RequestEvent(method, path)
+        if self.observers:
+            notify(self.observers, 'on_request_start', event)
         try:
-            response = self.session.request(method, url,
-                                            params=params, data=data)
-            resp_json = response.json()
-            if not resp_json.get('success', False):
-                request = {
-                    "method": method,
-                    "url": url,
-                    "params": params,
-                    "data": data,
-                }
-
-                raise PipedriveException(
-                    resp_json.get('error', ''),
-                    request,
-                    response
+            response = self._attempts(method, path, params, data, headers,
+                                      event, stream)
+        except Exception as err:
+            self._request_ended(event, error=err)
+            raise
+        self._request_ended(event, response)
+        return response
+
+    def _request_ended(self, event, response=None, error=None):
+        if self.observers:
+            event.finish(response, error, self.rate_limiter.snapshot())
+            notify(self.observers, 'on_request_end', event)
+
+    def _attempts(self, method, path, params, data, headers, event,
+                  stream=False):
+        # A copy: the caller's params may be shared with other threads
+        params = dict(params or {})
+        params['api_token'] = self.api_token
+        url = self.base_url + path
+        started = monotonic()
+        attempt = 0
+        delay = None
+        options = {'stream': True} if stream else {}
+        while True:
+            self.circuit_breaker.before_request()
+            try:
+                response = self._send(method, url, params, data, headers,
+                                      **options)
+            except Exception as err:
+                self.circuit_breaker.record(err)
+                delay = self.retry_policy.next_delay(
+                    method, err, attempt, monotonic() - started, delay
                 )
+                if delay is None:
+                    # Max retries or something that shouldn't be retried
+                    logger.exception("Request failed: %s", err)
+                    raise
+                logger.warning("Request failed (%s), retrying in %.1fs",
+                               err, delay)
+                sleep(delay)
+                attempt += 1
+                event.retries = attempt
+                continue
+            self.circuit_breaker.record()
             return response
-        except ValueError as err:
-            return handle_request_exception(
-                err,
-                "Request with non-JSON response: %s" % err.message
+
+    def _send(self, method, url, params, data, headers=None, stream=False):
+        response = None
+        options = {'stream': True} if stream else {}
+        started = self.rate_limiter.acquire()
+        try:
+            response = (self.transport or self.session).request(
+                method, url, params=params, data=data, headers=headers,
+                **options
             )
+        finally:
+            self.rate_limiter.release(started, response,
+                                      endpoint_key(method, url))
+        if response.status_code == 304:
+            # Not modified, the caller holds the cached content
+            return response
+        if stream and response.status_code < 400:
+            # Parsed as it is read, see pipedrive.streaming
+            return response
 
-        except Exception as err:
-            return handle_request_exception(err,
-                                            "Request failed: %s" % err.message)
+        request = {
+            "method": method,
+            "url": url,
+            "params": params,
+            "data": data,
+        }
+        try:
+            parsed = ParsedResponse.decode(response, self.json_decoder)
+        except ValueError:
+            raise PipedriveException(
+                'Non-JSON response (HTTP %s)' % response.status_code,
+                request,
+                response
+            )
+        if not parsed.success:
+            raise PipedriveException(
+                parsed.payload.get('error', ''),
+                request,
+                response
+            )
+        return parsed
+
+    def resolve(self, collection, *field_names, **kwargs):
+        """Fetches the related objects of a whole collection at once, see
+        pipedrive.relations.resolve."""
+        from .relations import resolve
+        return resolve(self, collection, *field_names, **kwargs)
 
     @staticmethod
     def register_resource(resource_class):
@@ -108,6 +231,17 @@ class BaseResource(object):
             (listing and creation)
         DETAIL_REQ_PATH(str): The request path component for the detail view
             (deletion, updating and detail)
+        CACHE_TTL(int): Seconds the responses of this resource may be kept
+            by the api's ResponseCache, None to never cache them.
+        READ_OPTIONS(tuple): Keyword arguments of the read methods that are
+            handled by the library instead of being sent to the API, e.g.
+            list(lazy=True). Defaults for all of them can be set with the
+            read_options of PipedriveAPI. The decoded responses may be shared
+            with other callers (cache, single flight): raw items and records
+            are new objects, but their nested values (user_id...) are the
+            decoded ones and must be treated as read-only.
+        BULK_DELETE_LIMIT(int): The maximum number of ids sent in a single
+            bulk delete request.
     """
 
     MODEL_CLASS = Model
@@ -117,46 +251,102 @@ class BaseResource(object):
     FIND_REQ_PATH = None
     RELATED_ENTITIES_PATH = None
     TIMELINE_PATH = None
+    CACHE_TTL = None
+    READ_OPTIONS = ('lazy', 'raw', 'record_type')
+    BULK_DELETE_LIMIT = 100
 
     def __init__(self, api):
         self.api = api
         setattr(self.api, self.API_ACESSOR_NAME, self)
 
-    def send_request(self, method, path, params, data):
-        return self.api.send_request(method, path, params, data)
+    def send_request(self, method, path, params, data, headers=None,
+                     stream=False):
+        options = {'stream': True} if stream else {}
+        return self.api.send_request(method, path, params, data, headers,
+                                     **options)
+
+    def _cached_get(self, path, params=None, data=None, stream=False):
+        """GETs through the api's ResponseCache when both the cache and a TTL
+        for this resource are set up. Streamed responses are never cached."""
+        if stream:
+            return self.send_request('GET', path, params, data, stream=True)
+        cache = getattr(self.api, 'cache', None)
+        ttl = cache.ttl_for(self) if cache is not None else None
+        if ttl is None:
+            return self.send_request('GET', path, params, data)
+
+        key = cache.key(path, params)
+        response, stale = cache.get(key)
+        if response is not None:
+            return response
+        headers = stale.conditional_headers() if stale else None
+        response = self.send_request('GET', path, params, data,
+                                     headers or None)
+        if response.status_code == 304 and stale is not None:
+            cache.revalidated(key, stale, ttl)
+            return stale.response
+        cache.set(self.LIST_REQ_PATH, key, response, ttl)
+        return response
+
+    def _invalidate_cache(self):
+        cache = getattr(self.api, 'cache', None)
+        if cache is not None:
+            cache.invalidate(self.LIST_REQ_PATH)
 
     def _create(self, params=None, data=None):
-        return self.send_request('POST', self.LIST_REQ_PATH, params, data)
+        response = self.send_request('POST', self.LIST_REQ_PATH, params, data)
+        self._invalidate_cache()
+        return response
 
-    def _list(self, params=None, data=None):
-        return self.send_request('GET', self.LIST_REQ_PATH, params, data)
+    def _list(self, params=None, data=None, stream=False):
+        return self._cached_get(self.LIST_REQ_PATH, params, data, stream)
 
     def _delete(self, resource_ids, params=None, data=None):
         url = self.DETAIL_REQ_PATH.format(id=resource_ids)
-        return self.send_request('DELETE', url, params, data)
+        response = self.send_request('DELETE', url, params, data)
+        self._invalidate_cache()
+        return response
 
     def _bulk_delete(self, resource_ids, params=None):
-        resource_ids_formatted = reduce(
-            lambda a, b: a + "," + b,
-            [str(resource_id) for resource_id in resource_ids]
+        resource_ids_formatted = ','.join(
+            str(resource_id) for resource_id in resource_ids
         )
-        return self.send_request(
+        response = self.send_request(
             'DELETE', self.LIST_REQ_PATH, params,
             {'ids': resource_ids_formatted}
         )
+        self._invalidate_cache()
+        return response
 
     def _update(self, resource_ids, params=None, data=None):
         url = self.DETAIL_REQ_PATH.format(id=resource_ids)
-        return self.send_request('PUT', url, params, data)
+        response = self.send_request('PUT', url, params, data)
+        self._invalidate_cache()
+        return response
+
+    def _update_model(self, model):
+        """PUTs the fields of model that changed since it was read from the
+        API. No request is sent when nothing changed.
+        Returns:
+            Model: The updated model, or model itself if nothing changed.
+        """
+        data = model.changes()
+        if not data:
+            return model
+        response = self._update(model.id, data=data)
+        updated_data = response.json()['data']
+        model.mark_clean(updated_data)
+        return dict_to_model(updated_data, self.MODEL_CLASS)
 
     def _detail(self, resource_ids, params=None, data=None):
         url = self.DETAIL_REQ_PATH.format(id=resource_ids)
-        return self.send_request('GET', url, params, data)
+        return self._cached_get(url, params, data)
 
-    def _find(self, term, params=None, data=None):
+    def _find(self, term, params=None, data=None, stream=False):
         params = params or {}
         params['term'] = term
-        return self.send_request('GET', self.FIND_REQ_PATH, params, data)
+        return self.send_request('GET', self.FIND_REQ_PATH, params, data,
+                                 stream=stream)
 
     def _timeline(self, params=None, data=None):
         return self.send_request('GET', self.TIMELINE_PATH, params, data)
@@ -165,8 +355,228 @@ class BaseResource(object):
                           params=None, data=None):
         entity_path = self.RELATED_ENTITIES_PATH.format(id=resource_ids,
                                                         entity=entity_name)
-        response = self.send_request('GET', entity_path, params, data)
-        return CollectionResponse(response, entity_class)
+
+        def fetch(params, stream=False):
+            return self.send_request('GET', entity_path, params, data,
+                                     stream=stream)
+
+        return self._collection(fetch, params or {}, entity_class)
+
+    def _collection(self, fetch, params, model_class=None):
+        """Reads a listing: fetch(params=params) returns the response, which
+        is wrapped in a CollectionResponse. With stream=True in params, the
+        response is instead wrapped in a StreamedCollection, parsing the items
+        one by one while they are read.
+        Args:
+            fetch(callable): Sends the request, e.g. self._list.
+            params(dict): The params given to the read method, READ_OPTIONS
+                included.
+            model_class(Model): Defaults to MODEL_CLASS.
+        """
+        options = self._read_options(params)
+        model_class = model_class or self.MODEL_CLASS
+        if params.pop('stream', False):
+            from .streaming import StreamedCollection
+            return StreamedCollection(fetch(params=params, stream=True),
+                                      model_class, **options)
+        return CollectionResponse(fetch(params=params), model_class, **options)
+
+    def _read_options(self, params):
+        """Pops the READ_OPTIONS, which tune how the library builds the
+        results and are not sent to the API, out of the request params.
+        Args:
+            params(dict): The params given to a read method (list, find...).
+        Returns:
+            dict: The options found (on top of the api's read_options), as
+                CollectionResponse kwargs.
+        """
+        options = dict(getattr(self.api, 'read_options', None) or {})
+        options.update((name, params.pop(name)) for name in self.READ_OPTIONS
+                       if name in params)
+        return options
+
+    def iter_pages(self, *args, list_method='list', page_size=500,
+                   prefetch=True, **params):
+        """Walks a paginated listing page by page, following
+        next_start/more_items_in_collection.
+
+        While the caller handles a page, the next one is already being fetched
+        by a background thread (unless prefetch is False), so at most two pages
+        are alive at any time.
+        Args:
+            *args: Positional arguments for list_method, e.g. the id of the
+                organization for list_deals.
+            list_method(str|callable): The resource method returning a
+                CollectionResponse, or its name. Defaults to 'list'.
+            page_size(int): The limit sent with each request.
+            prefetch(bool): Whether to fetch the next page in the background.
+                Streamed pages (stream=True) are always fetched one after the
+                other: their pagination is only known once they are read.
+            **params: Extra request params (filters, sorting...).
+        Returns:
+            generator: Yields one CollectionResponse per page.
+        """
+        if not callable(list_method):
+            list_method = getattr(self, list_method)
+
+        def fetch(start):
+            return list_method(*args, start=start, limit=page_size, **params)
+
+        if not prefetch or params.get('stream'):
+            start = params.pop('start', 0)
+            while True:
+                page = fetch(start)
+                yield page
+                if not page.more_items_in_collection:
+                    return
+                start = page.next_start
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            pending = executor.submit(fetch, params.pop('start', 0))
+            while pending is not None:
+                page = pending.result()
+                pending = None
+                if page.more_items_in_collection:
+                    pending = executor.submit(fetch, page.next_start)
+                yield page
+        finally:
+            if pending is not None:
+                pending.cancel()
+            executor.shutdown(wait=False)
+
+    def iter_all(self, *args, **kwargs):
+        """Lazily yields every item of a paginated listing, one at a time.
+
+        Accepts the same arguments as iter_pages, e.g.:
+            api.deal.iter_all(status='open')
+            api.organization.iter_all(org_id, list_method='list_deals')
+            api.deal.iter_all(stream=True)  # parses the pages as they arrive
+        """
+        for page in self.iter_pages(*args, **kwargs):
+            for item in page:
+                yield item
+
+    stream = iter_all
+
+    def to_columns(self, fields=None, output='numpy', **kwargs):
+        """Exports a paginated listing column by column, without building a
+        model per row, e.g.:
+            api.deal.to_columns(fields=['id', 'value', 'add_time'])
+        See pipedrive.columnar.to_columns for the arguments.
+        """
+        from .columnar import to_columns
+        return to_columns(self, fields, output, **kwargs)
+
+    def detail_many(self, resource_ids, concurrency=DEFAULT_CONCURRENCY,
+                    as_completed=False):
+        """Fetches the detail of many resources at once, over a pool of
+        threads sharing the api session.
+        Args:
+            resource_ids(iterable): The ids to fetch. Duplicates are fetched
+                only once.
+            concurrency(int): The maximum number of requests in flight.
+            as_completed(bool): When True, returns a generator yielding
+                (id, model, error) tuples as soon as each request finishes.
+        Returns:
+            BatchResult: The models keyed by id in input order, plus the
+                errors of the ids that failed.
+        """
+        if as_completed:
+            return iter_batch(self.detail, resource_ids, concurrency)
+        return run_batch(self.detail, resource_ids, concurrency)
+
+    def bulk_create(self, models, concurrency=DEFAULT_CONCURRENCY):
+        """Creates many resources at once, one request per model over a pool
+        of threads paced by the api's rate limiter. Models whose creation was
+        surely not processed by the API (throttled, connect timeout) are
+        tried once more after the others.
+        Args:
+            models(iterable): The models to create.
+            concurrency(int): The maximum number of requests in flight.
+        Returns:
+            BatchResult: The created models keyed by the position of the
+                model in the input, plus the errors and the retried positions.
+        """
+        models = list(models)
+        return self._bulk_write('POST', self.create, dict(enumerate(models)),
+                                concurrency)
+
+    def bulk_update(self, models, concurrency=DEFAULT_CONCURRENCY):
+        """Updates many resources at once, like bulk_create.
+        Returns:
+            BatchResult: The updated models keyed by id.
+        """
+        models = OrderedDict((model.id, model) for model in models)
+        return self._bulk_write('PUT', self.update, models, concurrency)
+
+    def bulk_delete(self, resources, chunk_size=None,
+                    concurrency=DEFAULT_CONCURRENCY):
+        """Deletes many resources, BULK_DELETE_LIMIT ids per request, with
+        the requests running concurrently. When a request fails, its ids are
+        deleted one by one, so that a single bad id doesn't fail the others.
+        Args:
+            resources(iterable): The models (or ids) to delete.
+            chunk_size(int): The number of ids per request, defaults to
+                BULK_DELETE_LIMIT.
+            concurrency(int): The maximum number of requests in flight.
+        Returns:
+            BatchResult: The response data keyed by id, plus the errors and
+                the ids deleted one by one.
+        """
+        resource_ids, chunks = self._delete_chunks(resources, chunk_size)
+        chunk_batch = run_batch(self._bulk_delete, chunks, concurrency)
+        batch, failed = self._split_chunks(chunks, chunk_batch)
+
+        def delete(resource_id):
+            return self._delete(resource_id).json().get('data')
+
+        return rerun_failed(batch, delete, failed, resource_ids, concurrency)
+
+    @classmethod
+    def _delete_chunks(cls, resources, chunk_size=None):
+        """The distinct ids of resources, and their chunks of at most
+        chunk_size (BULK_DELETE_LIMIT) ids."""
+        resource_ids = list(OrderedDict.fromkeys(
+            getattr(resource, 'id', resource) for resource in resources
+        ))
+        chunk_size = chunk_size or cls.BULK_DELETE_LIMIT
+        chunks = [tuple(resource_ids[start:start + chunk_size])
+                  for start in range(0, len(resource_ids), chunk_size)]
+        return resource_ids, chunks
+
+    @classmethod
+    def _split_chunks(cls, chunks, chunk_batch):
+        """Spreads the outcome of the chunk requests over their ids.
+        Returns:
+            tuple: (batch, failed), the BatchResult keyed by id and the ids
+                of the failed chunks to delete one by one.
+        """
+        batch = BatchResult()
+        failed = []
+        for chunk in chunks:
+            if chunk in chunk_batch.results:
+                data = chunk_batch.results[chunk].json().get('data')
+                batch.results.update((resource_id, data)
+                                     for resource_id in chunk)
+            else:
+                batch.errors.update((resource_id, chunk_batch.errors[chunk])
+                                    for resource_id in chunk)
+                if len(chunk) > 1:
+                    failed.extend(chunk)
+        return batch, failed
+
+    def _bulk_write(self, method, func, models, concurrency):
+        def write(key):
+            return func(models[key])
+
+        batch = run_batch(write, list(models), concurrency)
+        retry_policy = getattr(self.api, 'retry_policy', None)
+        if retry_policy is None:
+            return batch
+        retryable = [key for key, err in batch.errors.items()
+                     if retry_policy.is_retryable(method, err)]
+        return rerun_failed(batch, write, retryable, list(models))
 
 
 class CollectionResponse(Model):
@@ -177,12 +587,24 @@ class CollectionResponse(Model):
     next_start = IntType()
     more_items_in_collection = BooleanType()
 
-    def __init__(self, response, model_class):
+    def __init__(self, response, model_class, lazy=False, raw=False,
+                 record_type=None):
         super(CollectionResponse, self).__init__()
-        if isinstance(response, requests.Response):
+        if not isinstance(response, dict):
+            # A ParsedResponse, or a requests.Response
             response = response.json()
         items = response.get('data', []) or []
-        self.items = [dict_to_model(item, model_class) for item in items]
+        if raw:
+            # The payload may be shared, e.g. by the ResponseCache. A deep
+            # copy would cost more than building the models
+            self.items = [dict(item) for item in items]
+        elif record_type is not None:
+            make_record = record_factory(model_class, record_type)
+            self.items = [make_record(item) for item in items]
+        elif lazy:
+            self.items = [LazyModel(item, model_class) for item in items]
+        else:
+            self.items = [dict_to_model(item, model_class) for item in items]
         self.success = response.get('success', False)
         if 'additional_data' in response and\
                 'pagination' in response['additional_data']:
@@ -206,26 +628,240 @@ class CollectionResponse(Model):
         return len(self) > 0
 
 
-def dict_to_model(data, model_class):
+class LazyModel(object):
+    """Lightweight stand-in for a model, built over the raw json dict of an
+    item (see CollectionResponse's lazy mode).
+
+    Reading a field converts just that field, once. The full schematics model
+    is only built (by materialize) when something else is needed from it,
+    e.g. validate(), to_primitive() or setting a field; from then on the
+    proxy delegates everything to it. isinstance checks against the model
+    class hold for the proxy.
+    """
+    __slots__ = ('_data', '_model_class', '_values', '_model')
+
+    def __init__(self, data, model_class):
+        object.__setattr__(self, '_data', data)
+        object.__setattr__(self, '_model_class', model_class)
+        object.__setattr__(self, '_values', {})
+        object.__setattr__(self, '_model', None)
+
+    @property
+    def __class__(self):
+        return self._model_class
+
+    def __getattr__(self, name):
+        if self._model is not None:
+            return getattr(self._model, name)
+        fields = field_index(self._model_class)
+        if name not in fields:
+            return getattr(self.materialize(), name)
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        key, field = fields[name]
+        try:
+            value = field_to_native(field, self._data.get(key))
+        except BaseError as exc:
+            raise ModelConversionError({key: exc.messages})
+        self._values[name] = value
+        return value
+
+    def __setattr__(self, name, value):
+        setattr(self.materialize(), name, value)
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+    def __eq__(self, other):
+        if isinstance(other, LazyModel):
+            other = other.materialize()
+        return self.materialize() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '<Lazy %s: %s>' % (self._model_class.__name__,
+                                  self._data.get('id'))
+
+    def get_original_data(self):
+        return deepcopy(self._data)
+
+    def materialize(self):
+        """Returns the full model, building it on the first call and reusing
+        the fields already converted."""
+        if self._model is None:
+            object.__setattr__(self, '_model', dict_to_model(
+                self._data, self._model_class, self._values
+            ))
+        return self._model
+
+
+def record_factory(model_class, record_type):
+    """Returns a function building compact records out of the json items of
+    model_class, without going through schematics: values are kept exactly
+    as the API sent them.
+    Args:
+        model_class(Model): The model whose fields (json keys) the records
+            hold.
+        record_type(str|callable): 'dict' for plain dicts restricted to the
+            model's keys, 'namedtuple' for namedtuples, 'slots' for mutable
+            __slots__ objects, or any callable taking the json dict.
+    """
+    if callable(record_type):
+        return record_type
+    key = (model_class, record_type)
+    try:
+        return _record_factories[key]
+    except KeyError:
+        pass
+    fields = conversion_plan(model_class)[1]
+    names = [field_name for field_name, _, _ in fields]
+    keys = tuple(json_key for _, json_key, _ in fields)
+    class_name = model_class.__name__ + 'Record'
+
+    if record_type == 'dict':
+        def make_record(data):
+            return dict((key, data.get(key)) for key in keys)
+    elif record_type == 'namedtuple':
+        record_class = namedtuple(class_name, names, rename=True)
+        new_record = record_class._make
+
+        def make_record(data):
+            return new_record([data.get(key) for key in keys])
+    elif record_type == 'slots':
+        record_class = type(class_name, (SlotsRecord,), {
+            '__slots__': tuple(names), '_fields': tuple(names),
+        })
+
+        def make_record(data):
+            record = record_class.__new__(record_class)
+            for name, key in zip(names, keys):
+                setattr(record, name, data.get(key))
+            return record
+    else:
+        raise ValueError('Unknown record_type: %r' % (record_type,))
+    _record_factories[key] = make_record
+    return make_record
+
+
+_record_factories = {}
+
+
+class SlotsRecord(object):
+    """Base of the record_type='slots' records: plain attribute holders."""
+    __slots__ = ()
+    _fields = ()
+
+    def _asdict(self):
+        return OrderedDict((name, getattr(self, name))
+                           for name in self._fields)
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__, ', '.join(
+            '%s=%r' % (name, getattr(self, name)) for name in self._fields
+        ))
+
+
+def conversion_plan(model_class):
+    """How dict_to_model populates a model class, computed once per class.
+    Returns:
+        tuple: (fast, fields), fast telling whether the model can be populated
+            directly and fields being the (field name, json key, field)
+            triples of the class.
+    """
+    try:
+        return _conversion_plans[model_class]
+    except KeyError:
+        pass
+    from .models import BaseModel
+    fast = issubclass(model_class, BaseModel) and \
+        model_class.__init__ is BaseModel.__init__
+    fields = tuple(
+        (field_name, field.serialized_name or field_name, field)
+        for field_name, field in model_class.fields.items()
+    )
+    _conversion_plans[model_class] = fast, fields
+    return fast, fields
+
+
+_conversion_plans = {}
+
+
+def field_index(model_class):
+    """Maps the field names of a model class to their (json key, field)."""
+    try:
+        return _field_indexes[model_class]
+    except KeyError:
+        pass
+    index = dict((field_name, (key, field))
+                 for field_name, key, field in conversion_plan(model_class)[1])
+    _field_indexes[model_class] = index
+    return index
+
+
+_field_indexes = {}
+
+
+def field_to_native(field, value):
+    """Converts one json value the way the schematics import would: missing
+    and empty values fall back to the field's default."""
+    if value is None or value == '':
+        value = field.default
+    if value is not None:
+        value = field.to_native(value)
+    return value
+
+
+def dict_to_model(data, model_class, converted=None):
     """Converts the json response to a full fledge model
     The schematics model constructor is strict. If it sees keys that it
     doesn't know about it will raise an exception. This is a problem, both
     because we won't model all of the data at first, but also because the
     lib would break on new fields being returned.
-    Therefore we inspect the model class and remove all keys not present
-    before constructing the model.
+    Therefore only the keys present in the model class are read (empty
+    strings count as missing).
+
+    For BaseModel subclasses that don't override __init__, the model is
+    populated directly from a per-class conversion plan, skipping the
+    generic schematics import loop. The data is not copied: it becomes the
+    model's original data, and get_original_data hands out copies of it.
     Args:
         data(dict): The json response data as returned from the API.
         model_class(Model): The schematics model to instantiate
+        converted(dict): Native values already converted, by field name.
     Returns:
         Model: With the populated data
     """
     if data is None:
         return None
-    data = deepcopy(data)
-    fields = model_class.fields
-    model_keys = set([fields[field_name].serialized_name or field_name
-                      for field_name in fields])
-    safe_keys = set(data.keys()).intersection(model_keys)
-    safe_data = {key: data[key] for key in safe_keys if data[key] != ''}
-    return model_class(raw_data=safe_data, original_data=data)
+    fast, fields = conversion_plan(model_class)
+    if not fast:
+        safe_data = {}
+        for _, key, _ in fields:
+            value = data.get(key)
+            if value is not None and value != '':
+                safe_data[key] = value
+        return model_class(raw_data=safe_data, original_data=data)
+
+    native = dict(converted) if converted else {}
+    errors = {}
+    for field_name, key, field in fields:
+        if field_name in native:
+            continue
+        try:
+            native[field_name] = field_to_native(field, data.get(key))
+        except BaseError as exc:
+            errors[key] = exc.messages
+    if errors:
+        raise ModelConversionError(errors)
+
+    model = model_class.__new__(model_class)
+    model._initial = data
+    model._data = native
+    model._original_data = data
+    return model
@@ -0,0 +1,131 @@
+# encoding:utf-8
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+__all__ = ['BatchResult']
+
+DEFAULT_CONCURRENCY = 8
+
+
+class BatchResult(object):
+    """Outcome of a batch of independent calls, one per key (e.g. a resource
+    id). A failing key never aborts the rest of the batch.
+
+    Attributes:
+        results(OrderedDict): key -> returned value, in input order.
+        errors(OrderedDict): key -> raised exception, in input order.
+        retried(list): The keys that were called again after failing (see
+            rerun_failed), whether they succeeded the second time or not.
+    """
+
+    def __init__(self):
+        self.results = OrderedDict()
+        self.errors = OrderedDict()
+        self.retried = []
+
+    @property
+    def succeeded(self):
+        return list(self.results.keys())
+
+    @property
+    def failed(self):
+        return list(self.errors.keys())
+
+    def __len__(self):
+        return len(self.results)
+
+    def __iter__(self):
+        return iter(self.results.values())
+
+    def __getitem__(self, key):
+        return self.results[key]
+
+    def raise_for_errors(self):
+        """Re-raises the first collected error, if any."""
+        for error in self.errors.values():
+            raise error
+
+    def __repr__(self):
+        return '<BatchResult succeeded=%d failed=%d retried=%d>' % (
+            len(self.results), len(self.errors), len(self.retried)
+        )
+
+
+def iter_batch(func, keys, concurrency=DEFAULT_CONCURRENCY):
+    """Calls func(key) for every distinct key on a bounded thread pool,
+    yielding (key, result, error) tuples as the calls complete.
+    """
+    keys = list(OrderedDict.fromkeys(keys))
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    futures = {executor.submit(func, key): key for key in keys}
+    try:
+        for future in as_completed(futures):
+            error = future.exception()
+            result = None if error is not None else future.result()
+            yield futures[future], result, error
+    finally:
+        # Stops scheduling what's left when the caller stops iterating early
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def run_batch(func, keys, concurrency=DEFAULT_CONCURRENCY):
+    """Calls func(key) for every distinct key on a bounded thread pool.
+    Returns:
+        BatchResult: With results and errors kept in input order.
+    """
+    keys = list(OrderedDict.fromkeys(keys))
+    outcomes = {}
+    for key, result, error in iter_batch(func, keys, concurrency):
+        outcomes[key] = (result, error)
+
+    batch = BatchResult()
+    for key in keys:
+        result, error = outcomes[key]
+        if error is not None:
+            batch.errors[key] = error
+        else:
+            batch.results[key] = result
+    return batch
+
+
+def rerun_failed(batch, func, keys, order, concurrency=1):
+    """Calls func(key) again for some keys that failed in a batch.
+    Args:
+        batch(BatchResult): The first run.
+        func(callable): The call to make for each key.
+        keys(iterable): The failed keys to run again.
+        order(list): Every key of the batch, in input order.
+        concurrency(int): The maximum number of calls in flight.
+    Returns:
+        BatchResult: The outcome of both runs, the second one winning, with
+            the keys run again listed in retried.
+    """
+    keys = list(OrderedDict.fromkeys(keys))
+    if not keys:
+        return batch
+    return merge_rerun(batch, run_batch(func, keys, concurrency), keys, order)
+
+
+def merge_rerun(batch, rerun, keys, order):
+    """The outcome of a batch and of a second run of some of its keys, the
+    second run winning. See rerun_failed.
+    Args:
+        batch(BatchResult): The first run.
+        rerun(BatchResult): The second run, over `keys`.
+        keys(list): The keys run again.
+        order(list): Every key of the batch, in input order.
+    """
+    merged = BatchResult()
+    for key in order:
+        for run in (rerun, batch):
+            if key in run.results:
+                merged.results[key] = run.results[key]
+                break
+            if key in run.errors:
+                merged.errors[key] = run.errors[key]
+                break
+    merged.retried = batch.retried + keys
+    return merged
@@ -0,0 +1,125 @@
+# encoding:utf-8
+import threading
+from collections import OrderedDict
+from time import monotonic
+
+
+__all__ = ['ResponseCache']
+
+
+class CacheEntry(object):
+    __slots__ = ('namespace', 'response', 'expires_at')
+
+    def __init__(self, namespace, response, expires_at):
+        self.namespace = namespace
+        self.response = response
+        self.expires_at = expires_at
+
+    def conditional_headers(self):
+        """Headers to revalidate the entry, if the API sent validators."""
+        headers = {}
+        etag = self.response.headers.get('ETag')
+        if etag:
+            headers['If-None-Match'] = etag
+        last_modified = self.response.headers.get('Last-Modified')
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+
+class ResponseCache(object):
+    """Opt-in, size-bounded LRU cache for GET responses of reference data
+    (users, pipelines, stages, activity types, fields...).
+
+    Only resources with a CACHE_TTL (or listed in `ttls`) are cached. Entries
+    are grouped by resource, so a create/update/delete on a resource drops
+    every cached response of that resource. Expired entries holding an ETag
+    or Last-Modified validator are revalidated with a conditional request
+    instead of being refetched.
+
+        api = PipedriveAPI('token', cache=ResponseCache(ttls={'user': 60}))
+
+    Args:
+        max_entries(int): How many responses are kept before the least
+            recently used ones get evicted.
+        ttls(dict): TTLs in seconds by API_ACESSOR_NAME, overriding the
+            resources' CACHE_TTL. A TTL of None disables caching.
+    """
+
+    def __init__(self, max_entries=1024, ttls=None, clock=monotonic):
+        self.max_entries = max_entries
+        self.ttls = ttls or {}
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ttl_for(self, resource):
+        return self.ttls.get(resource.API_ACESSOR_NAME, resource.CACHE_TTL)
+
+    @staticmethod
+    def key(path, params):
+        params = params or {}
+        return path, tuple(sorted(
+            (name, str(value)) for name, value in params.items()
+            if name != 'api_token'
+        ))
+
+    def get(self, key):
+        """Returns (response, entry): response is the cached response when it
+        is still fresh, entry the stale entry to revalidate otherwise.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, None
+            self._entries.move_to_end(key)
+            if entry.expires_at > self.clock():
+                self.hits += 1
+                return entry.response, None
+            self.misses += 1
+            return None, entry
+
+    def set(self, namespace, key, response, ttl):
+        with self._lock:
+            self._entries[key] = CacheEntry(namespace, response,
+                                            self.clock() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def revalidated(self, key, entry, ttl):
+        """Marks a stale entry as fresh again after a 304 response."""
+        with self._lock:
+            self.revalidations += 1
+            entry.expires_at = self.clock() + ttl
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+
+    def invalidate(self, namespace=None):
+        """Drops every entry of a namespace, or everything."""
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+                return
+            for key in [key for key, entry in self._entries.items()
+                        if entry.namespace == namespace]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidations': self.revalidations,
+                'evictions': self.evictions,
+            }
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,222 @@
+# encoding:utf-8
+import json
+from collections import OrderedDict
+
+from schematics.types import (
+    BooleanType, DateType, DecimalType, FloatType, IntType, NumberType,
+    StringType
+)
+
+from .types import PipedriveDateTime, PipedriveModelType, PipedriveTime
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+__all__ = ['to_columns', 'iter_column_batches']
+
+OUTPUTS = ('numpy', 'arrow', 'lists')
+
+
+def column_kind(field):
+    """The column type of a model field: 'id', 'int', 'float', 'bool',
+    'datetime', 'date', 'seconds' (durations, as ints), 'string' or 'object'
+    (lists, dicts...)."""
+    if isinstance(field, PipedriveModelType):
+        return 'id'
+    if isinstance(field, IntType):
+        return 'int'
+    if isinstance(field, (DecimalType, FloatType, NumberType)):
+        return 'float'
+    if isinstance(field, BooleanType):
+        return 'bool'
+    if isinstance(field, PipedriveDateTime):
+        return 'datetime'
+    # A DateType too, holding "MM:SS" durations
+    if isinstance(field, PipedriveTime):
+        return 'seconds'
+    if isinstance(field, DateType):
+        return 'date'
+    if isinstance(field, StringType):
+        return 'string'
+    return 'object'
+
+
+def column_specs(model_class, fields=None):
+    """The (column name, json key, kind) of the columns to export.
+    Args:
+        model_class(Model): The model of the exported resource.
+        fields(list): Field names to export, defaults to every model field.
+    """
+    model_fields = model_class.fields
+    names = fields or list(model_fields)
+    specs = []
+    for name in names:
+        if name not in model_fields:
+            raise ValueError('%s has no field %s' % (model_class.__name__,
+                                                     name))
+        field = model_fields[name]
+        specs.append((name, field.serialized_name or name, column_kind(field)))
+    return specs
+
+
+def _id(value):
+    if isinstance(value, dict):
+        return value.get('id', value.get('value'))
+    return value
+
+
+def _none_if_empty(value):
+    return None if value == '' else value
+
+
+_to_seconds = PipedriveTime().to_native
+
+
+# kind -> function normalizing the json values of one column of a page into
+# python primitives (None for missing values)
+NORMALIZERS = {
+    'id': lambda values: [_id(value) for value in values],
+    'int': lambda values: [None if v in (None, '') else int(v)
+                           for v in values],
+    'float': lambda values: [None if v in (None, '') else float(v)
+                             for v in values],
+    'bool': lambda values: [None if v in (None, '') else bool(v)
+                            for v in values],
+    'datetime': lambda values: [_none_if_empty(v) for v in values],
+    'date': lambda values: [_none_if_empty(v) for v in values],
+    'seconds': lambda values: [None if v in (None, '') else _to_seconds(v)
+                               for v in values],
+    'string': lambda values: [None if v is None else str(v) for v in values],
+    'object': lambda values: values,
+}
+
+
+def _numpy_column(kind, values):
+    """Converts a page of normalized values into a numpy array in one go.
+    Nullable integer and boolean columns become masked arrays."""
+    if kind in ('id', 'int', 'seconds', 'bool'):
+        mask = numpy.fromiter((v is None for v in values), bool, len(values))
+        dtype = bool if kind == 'bool' else numpy.int64
+        filled = [0 if v is None else v for v in values]
+        return numpy.ma.MaskedArray(numpy.array(filled, dtype=dtype),
+                                    mask=mask)
+    if kind == 'float':
+        return numpy.array([numpy.nan if v is None else v for v in values],
+                           dtype=numpy.float64)
+    if kind == 'datetime':
+        return numpy.array([v or 'NaT' for v in values],
+                           dtype='datetime64[s]')
+    if kind == 'date':
+        return numpy.array([v[:10] if v else 'NaT' for v in values],
+                           dtype='datetime64[D]')
+    return numpy.array(values, dtype=object)
+
+
+def _arrow_type(kind):
+    return {
+        'id': pyarrow.int64(),
+        'int': pyarrow.int64(),
+        'seconds': pyarrow.int64(),
+        'float': pyarrow.float64(),
+        'bool': pyarrow.bool_(),
+        'datetime': pyarrow.timestamp('s'),
+        'date': pyarrow.date32(),
+        'string': pyarrow.string(),
+        'object': pyarrow.string(),
+    }[kind]
+
+
+def _arrow_column(kind, values):
+    if kind in ('datetime', 'date'):
+        array = _numpy_column(kind, values)
+        return pyarrow.array(array, type=_arrow_type(kind),
+                             mask=numpy.isnat(array))
+    if kind == 'object':
+        # Arrow columns need a single type: nested values are kept as json
+        values = [None if v is None else json.dumps(v) for v in values]
+    return pyarrow.array(values, type=_arrow_type(kind))
+
+
+def _check_output(output):
+    if output not in OUTPUTS:
+        raise ValueError('output must be one of %s' % ', '.join(OUTPUTS))
+    if output in ('numpy', 'arrow') and numpy is None:
+        raise ImportError('Exporting to %s requires numpy' % output)
+    if output == 'arrow' and pyarrow is None:
+        raise ImportError('Exporting to arrow requires pyarrow')
+
+
+def iter_column_batches(resource, fields=None, output='numpy',
+                        list_method='list', page_size=500, **params):
+    """Streams a paginated listing as column batches, one per page, without
+    building a model per row: each page is read in raw mode and every column
+    is converted as a whole.
+    Args:
+        resource(BaseResource): E.g. api.deal.
+        fields(list): The model fields to export, defaults to all of them.
+        output(str): 'numpy' for OrderedDicts of numpy arrays, 'arrow' for
+            pyarrow.RecordBatch objects, 'lists' for OrderedDicts of lists.
+        list_method(str): The listing to export, see BaseResource.iter_pages.
+        page_size(int): The number of rows per request (and batch).
+        **params: Extra request params (filters...).
+    Returns:
+        generator: The batches.
+    """
+    _check_output(output)
+    specs = column_specs(resource.MODEL_CLASS, fields)
+    for page in resource.iter_pages(list_method=list_method,
+                                    page_size=page_size, raw=True, **params):
+        rows = page.items
+        columns = OrderedDict()
+        for name, key, kind in specs:
+            values = NORMALIZERS[kind]([row.get(key) for row in rows])
+            if output == 'numpy':
+                values = _numpy_column(kind, values)
+            elif output == 'arrow':
+                values = _arrow_column(kind, values)
+            columns[name] = values
+        if output == 'arrow':
+            yield pyarrow.RecordBatch.from_arrays(list(columns.values()),
+                                                  names=list(columns))
+        else:
+            yield columns
+
+
+def to_columns(resource, fields=None, output='numpy', **kwargs):
+    """Exports a whole paginated listing into columns. Accepts the same
+    arguments as iter_column_batches.
+    Returns:
+        OrderedDict|pyarrow.Table: Column name -> numpy array (or list) for
+            the 'numpy' and 'lists' outputs, a pyarrow.Table made of one
+            record batch per page for 'arrow'.
+    """
+    batches = iter_column_batches(resource, fields, output, **kwargs)
+    if output == 'arrow':
+        specs = column_specs(resource.MODEL_CLASS, fields)
+        schema = pyarrow.schema([(name, _arrow_type(kind))
+                                 for name, _, kind in specs])
+        return pyarrow.Table.from_batches(list(batches), schema=schema)
+
+    chunks = OrderedDict((name, []) for name, _, _ in
+                         column_specs(resource.MODEL_CLASS, fields))
+    for batch in batches:
+        for name, values in batch.items():
+            chunks[name].append(values)
+    if output == 'lists':
+        return OrderedDict((name, [value for chunk in values
+                                   for value in chunk])
+                           for name, values in chunks.items())
+    return OrderedDict(
+        (name, numpy.ma.concatenate(values)
+         if values and isinstance(values[0], numpy.ma.MaskedArray)
+         else numpy.concatenate(values) if values else numpy.array([]))
+        for name, values in chunks.items()
+    )
@@ -0,0 +1,149 @@
+# encoding:utf-8
+import keyword
+import re
+import threading
+
+from schematics.types import StringType, DecimalType, BaseType
+
+from .models import User, Organization, Person
+from .types import (
+    PipedriveDate, PipedriveModelType, PipedriveTimeOfDay, PipedriveEnumType,
+    PipedriveSetType
+)
+
+
+__all__ = ['compile_model', 'custom_model']
+
+CUSTOM_FIELD_KEY = re.compile(r'^[0-9a-f]{40}$')
+
+# field_type -> factory of the schematics type, called with the field's
+# options and the keyword arguments of the type
+FIELD_TYPES = {
+    'varchar': lambda options, **kwargs: StringType(**kwargs),
+    'varchar_auto': lambda options, **kwargs: StringType(**kwargs),
+    'text': lambda options, **kwargs: StringType(**kwargs),
+    'phone': lambda options, **kwargs: StringType(**kwargs),
+    'address': lambda options, **kwargs: StringType(**kwargs),
+    'double': lambda options, **kwargs: DecimalType(**kwargs),
+    'monetary': lambda options, **kwargs: DecimalType(**kwargs),
+    'date': lambda options, **kwargs: PipedriveDate(**kwargs),
+    'daterange': lambda options, **kwargs: PipedriveDate(**kwargs),
+    'time': lambda options, **kwargs: PipedriveTimeOfDay(**kwargs),
+    'timerange': lambda options, **kwargs: PipedriveTimeOfDay(**kwargs),
+    'enum': lambda options, **kwargs: PipedriveEnumType(options, **kwargs),
+    'set': lambda options, **kwargs: PipedriveSetType(options, **kwargs),
+    'user': lambda options, **kwargs: PipedriveModelType(User, **kwargs),
+    'org': lambda options, **kwargs: PipedriveModelType(Organization,
+                                                        **kwargs),
+    'people': lambda options, **kwargs: PipedriveModelType(Person, **kwargs),
+}
+
+# Companion keys sent along with some field types, e.g. the currency of a
+# monetary field comes in "<key>_currency"
+COMPANION_KEYS = {
+    'monetary': (('_currency', lambda options, **kwargs: StringType(**kwargs)),),
+    'daterange': (('_until', FIELD_TYPES['daterange']),),
+    'timerange': (('_until', FIELD_TYPES['timerange']),),
+}
+
+
+def _attr(field, name):
+    if isinstance(field, dict):
+        return field.get(name)
+    return getattr(field, name, None)
+
+
+def _option_id(value):
+    value = str(value)
+    return int(value) if value.isdigit() else value
+
+
+def field_alias(name, taken):
+    """Turns a field's display name into a python identifier that isn't in
+    `taken` yet (and adds it there)."""
+    alias = re.sub(r'[^0-9a-zA-Z]+', '_', name or '').strip('_').lower()
+    alias = alias or 'custom_field'
+    if alias[0].isdigit():
+        alias = 'field_' + alias
+    if keyword.iskeyword(alias):
+        alias += '_'
+    candidate, suffix = alias, 2
+    while candidate in taken:
+        candidate = '%s_%d' % (alias, suffix)
+        suffix += 1
+    taken.add(candidate)
+    return candidate
+
+
+def compile_model(model_class, fields, name=None):
+    """Builds a subclass of model_class with an attribute for each custom
+    field in `fields` (the items of a FieldResource listing).
+
+    The attributes are named after the fields' display names ("Story" becomes
+    `story`) and map to the 40 chars keys through serialized_name, so
+    dict_to_model and to_primitive work with the API's keys unchanged. The
+    field key behind each alias is kept in the CUSTOM_FIELDS dict of the
+    class.
+    Args:
+        model_class(Model): The model to extend, e.g. Deal.
+        fields(iterable): FieldModel instances (or dicts) describing the
+            fields of model_class.
+        name(str): The name of the new class. Defaults to
+            "Custom<model_class name>".
+    Returns:
+        type: The compiled model class.
+    """
+    taken = set(model_class.fields)
+    known_keys = set(field.serialized_name or field_name
+                     for field_name, field in model_class.fields.items())
+    custom_fields = dict(getattr(model_class, 'CUSTOM_FIELDS', {}))
+    attrs = {'__module__': model_class.__module__}
+
+    for field in fields:
+        key = _attr(field, 'key')
+        if not key or not CUSTOM_FIELD_KEY.match(key) or key in known_keys:
+            continue
+        field_type = _attr(field, 'field_type')
+        options = dict(
+            (_option_id(_attr(option, 'id')), _attr(option, 'label'))
+            for option in _attr(field, 'options') or []
+        )
+        factory = FIELD_TYPES.get(
+            field_type, lambda options, **kwargs: BaseType(**kwargs)
+        )
+        alias = field_alias(_attr(field, 'name'), taken)
+        attrs[alias] = factory(options, serialized_name=key)
+        custom_fields[alias] = key
+        for suffix, companion in COMPANION_KEYS.get(field_type, ()):
+            companion_alias = field_alias(alias + suffix, taken)
+            attrs[companion_alias] = companion(options,
+                                               serialized_name=key + suffix)
+            custom_fields[companion_alias] = key + suffix
+
+    attrs['CUSTOM_FIELDS'] = custom_fields
+    return type(name or 'Custom' + model_class.__name__, (model_class,), attrs)
+
+
+_compiled_models = {}
+_compiled_models_lock = threading.Lock()
+
+
+def custom_model(field_resource, model_class, refresh=False):
+    """Returns the model_class subclass compiled from the fields listed by
+    field_resource, compiling it on the first call for each account (api
+    token) and reusing it afterwards.
+    Args:
+        field_resource(FieldResource): E.g. api.dealField.
+        model_class(Model): The model to extend, e.g. Deal.
+        refresh(bool): Lists the fields and compiles the model again, e.g.
+            after a custom field was created.
+    """
+    key = (field_resource.api.api_token, field_resource.API_ACESSOR_NAME,
+           model_class)
+    with _compiled_models_lock:
+        compiled = _compiled_models.get(key)
+    if compiled is None or refresh:
+        compiled = compile_model(model_class, field_resource.iter_all())
+        with _compiled_models_lock:
+            _compiled_models[key] = compiled
+    return compiled
@@ -3,8 +3,9 @@ import json
 from schematics.types import StringType, IntType
 from schematics.types.compound import ListType, ModelType
 from schematics.models import Model
-from pipedrive import BaseResource, PipedriveAPI, CollectionResponse, dict_to_model
-from .models import BaseModel
+from pipedrive import BaseResource, PipedriveAPI, dict_to_model
+from .models import BaseModel, Deal, Organization, Person, Activity, Note
+from .custom_fields import custom_model
 
 
 # Generic classes for fields and their resources
@@ -27,6 +28,9 @@ class FieldModel(BaseModel):
 
 class FieldResource(BaseResource):
     FIELD_CLASS = FieldModel
+    CACHE_TTL = 600
+    PARENT_MODEL_CLASS = None
+    PARENT_RESOURCE_NAME = None
 
     def detail(self, resource_ids):
         response = self._detail(resource_ids)
@@ -45,7 +49,21 @@ class FieldResource(BaseResource):
         return dict_to_model(response.json()['data'], self.FIELD_CLASS)
 
     def list(self, **params):
-        return CollectionResponse(self._list(params=params), self.FIELD_CLASS)
+        return self._collection(self._list, params, self.FIELD_CLASS)
+
+    def compile_model(self, install=False, refresh=False):
+        """Returns a subclass of PARENT_MODEL_CLASS with typed, human
+        readable attributes for the account's custom fields. Compiled classes
+        are cached per account (see custom_fields.custom_model).
+
+        With install=True the parent resource of this api (e.g. api.deal for
+        api.dealField) starts returning instances of the compiled class.
+        """
+        model_class = custom_model(self, self.PARENT_MODEL_CLASS, refresh)
+        if install:
+            parent = getattr(self.api, self.PARENT_RESOURCE_NAME)
+            parent.MODEL_CLASS = model_class
+        return model_class
 
 
 # Specific classes for fields and their resources
@@ -78,6 +96,8 @@ class DealFieldResource(FieldResource):
     API_ACESSOR_NAME = 'dealField'
     LIST_REQ_PATH = '/dealFields'
     DETAIL_REQ_PATH = '/dealFields/{id}'
+    PARENT_MODEL_CLASS = Deal
+    PARENT_RESOURCE_NAME = 'deal'
 
 
 class OrganizationFieldResource(FieldResource):
@@ -85,6 +105,8 @@ class OrganizationFieldResource(FieldResource):
     API_ACESSOR_NAME = 'organizationField'
     LIST_REQ_PATH = '/organizationFields'
     DETAIL_REQ_PATH = '/organizationFields/{id}'
+    PARENT_MODEL_CLASS = Organization
+    PARENT_RESOURCE_NAME = 'organization'
 
 
 class PersonFieldResource(FieldResource):
@@ -92,6 +114,8 @@ class PersonFieldResource(FieldResource):
     API_ACESSOR_NAME = 'personField'
     LIST_REQ_PATH = '/personFields'
     DETAIL_REQ_PATH = '/personFields/{id}'
+    PARENT_MODEL_CLASS = Person
+    PARENT_RESOURCE_NAME = 'person'
 
 
 class ProductFieldResource(FieldResource):
@@ -106,6 +130,8 @@ class ActivityFieldResource(FieldResource):
     API_ACESSOR_NAME = 'activityField'
     LIST_REQ_PATH = '/activityFields'
     DETAIL_REQ_PATH = '/activityFields/{id}'
+    PARENT_MODEL_CLASS = Activity
+    PARENT_RESOURCE_NAME = 'activity'
 
 
 class NoteFieldResource(FieldResource):
@@ -113,6 +139,8 @@ class NoteFieldResource(FieldResource):
     API_ACESSOR_NAME = 'noteField'
     LIST_REQ_PATH = '/noteFields'
     DETAIL_REQ_PATH = '/noteFields/{id}'
+    PARENT_MODEL_CLASS = Note
+    PARENT_RESOURCE_NAME = 'note'
 
 
 PipedriveAPI.register_resource(DealFieldResource)
@@ -0,0 +1,323 @@
+# encoding:utf-8
+import json
+import re
+import sqlite3
+import threading
+from logging import getLogger
+from time import time
+
+from .base import CollectionResponse
+from .sync import DELETE, SyncCheckpointStore, SyncEngine
+
+
+__all__ = ['LocalMirror']
+
+logger = getLogger('pipedrive.mirror')
+
+# resource -> (json key of the name, json key of the owner)
+MIRROR_RESOURCES = {
+    'deal': ('title', 'user_id'),
+    'person': ('name', 'owner_id'),
+    'organization': ('name', 'owner_id'),
+}
+
+# list() params that can be answered locally -> mirror column
+LOCAL_FILTERS = {
+    'user_id': 'owner_id',
+    'owner_id': 'owner_id',
+    'org_id': 'org_id',
+    'person_id': 'person_id',
+    'stage_id': 'stage_id',
+}
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS mirror_objects ('
+    'resource TEXT NOT NULL, id INTEGER NOT NULL, name TEXT, '
+    'owner_id INTEGER, org_id INTEGER, person_id INTEGER, stage_id INTEGER, '
+    'data TEXT NOT NULL, PRIMARY KEY (resource, id))',
+    'CREATE TABLE IF NOT EXISTS mirror_contacts ('
+    'resource TEXT NOT NULL, id INTEGER NOT NULL, kind TEXT NOT NULL, '
+    'value TEXT NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS mirror_refreshes ('
+    'resource TEXT PRIMARY KEY, refreshed_at REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS mirror_objects_name '
+    'ON mirror_objects (resource, name COLLATE NOCASE)',
+    'CREATE INDEX IF NOT EXISTS mirror_objects_owner '
+    'ON mirror_objects (resource, owner_id)',
+    'CREATE INDEX IF NOT EXISTS mirror_objects_org '
+    'ON mirror_objects (resource, org_id)',
+    'CREATE INDEX IF NOT EXISTS mirror_objects_person '
+    'ON mirror_objects (resource, person_id)',
+    'CREATE INDEX IF NOT EXISTS mirror_objects_stage '
+    'ON mirror_objects (resource, stage_id)',
+    'CREATE INDEX IF NOT EXISTS mirror_contacts_value '
+    'ON mirror_contacts (resource, kind, value)',
+    'CREATE INDEX IF NOT EXISTS mirror_contacts_object '
+    'ON mirror_contacts (resource, id)',
+)
+
+
+def related_id(value):
+    """The id of a related object, which the API sends either as a number or
+    as a dict describing the object."""
+    if isinstance(value, dict):
+        value = value.get('value', value.get('id'))
+    return value
+
+
+def contact_values(value):
+    """The values of a phone/email field, which the API sends as a list of
+    {"value": ..., "primary": ...} dicts."""
+    if not value:
+        return []
+    if not isinstance(value, list):
+        value = [value]
+    values = [item.get('value') if isinstance(item, dict) else item
+              for item in value]
+    return [str(item) for item in values if item]
+
+
+def like_prefix(term):
+    """The LIKE pattern of the names starting with term, with the wildcards
+    of term escaped."""
+    return re.sub(r'([\\%_])', r'\\\1', term) + '%'
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+def normalize_phone(phone):
+    return re.sub(r'\D', '', phone)
+
+
+class MirroredResource(object):
+    """Serves the find() and list() of a resource from the mirror, with the
+    signatures of the api resource. Calls the mirror can't answer (unknown
+    params, nothing found) go to the API when the mirror has fallback on.
+
+    find() matches the names starting with the term (case insensitively), a
+    prefix match that the name index answers without scanning the table. A
+    term found in the middle of a name ("smith" for "John Smith") isn't
+    matched locally: when nothing else matches, the query goes to the API.
+    """
+
+    def __init__(self, mirror, resource):
+        self.mirror = mirror
+        self.resource = resource
+
+    def find(self, term, **params):
+        options = self.resource._read_options(params)
+        start = int(params.pop('start', 0))
+        limit = int(params.pop('limit', 100))
+        search_by_email = params.pop('search_by_email', False)
+        filters = self._local_filters(params)
+        if filters is None:
+            return self._fallback('find', term, start, limit, options,
+                                  search_by_email=search_by_email, **params)
+
+        # One indexed lookup per way of matching, rather than an OR the
+        # query planner answers with a scan
+        resource = self.resource.API_ACESSOR_NAME
+        lookups = ["SELECT id FROM mirror_objects WHERE resource = ? AND "
+                   "name LIKE ? ESCAPE '\\'"]
+        args = [resource, like_prefix(term)]
+        if search_by_email:
+            lookups.append('SELECT id FROM mirror_contacts WHERE '
+                           'resource = ? AND kind = ? AND value = ?')
+            args.extend([resource, 'email', normalize_email(term)])
+        phone = normalize_phone(term)
+        if len(phone) >= 5:
+            lookups.append('SELECT id FROM mirror_contacts WHERE '
+                           'resource = ? AND kind = ? AND value = ?')
+            args.extend([resource, 'phone', phone])
+        response = self._query('id IN (%s)' % ' UNION '.join(lookups), args,
+                               filters, start, limit)
+        if not response['data']:
+            return self._fallback('find', term, start, limit, options,
+                                  search_by_email=search_by_email, **params)
+        return CollectionResponse(response, self.resource.MODEL_CLASS,
+                                  **options)
+
+    def list(self, **params):
+        options = self.resource._read_options(params)
+        start = int(params.pop('start', 0))
+        limit = int(params.pop('limit', 100))
+        filters = self._local_filters(params)
+        if filters is None:
+            return self._fallback('list', None, start, limit, options,
+                                  **params)
+        response = self._query('1', [], filters, start, limit)
+        return CollectionResponse(response, self.resource.MODEL_CLASS,
+                                  **options)
+
+    def _local_filters(self, params):
+        """Maps list/find params to mirror columns, None when some param
+        can only be handled by the API."""
+        if any(name not in LOCAL_FILTERS for name in params):
+            return None
+        if not self.mirror.ensure_fresh(self.resource.API_ACESSOR_NAME):
+            return None
+        return [(LOCAL_FILTERS[name], related_id(value))
+                for name, value in params.items()]
+
+    def _query(self, where, args, filters, start, limit):
+        for column, value in filters:
+            where += ' AND %s = ?' % column
+            args.append(value)
+        rows = self.mirror.execute(
+            'SELECT data FROM mirror_objects WHERE resource = ? AND %s '
+            'ORDER BY id LIMIT ? OFFSET ?' % where,
+            [self.resource.API_ACESSOR_NAME] + args + [limit + 1, start]
+        )
+        more = len(rows) > limit
+        return {
+            'success': True,
+            'data': [json.loads(data) for data, in rows[:limit]],
+            'additional_data': {'pagination': {
+                'start': start,
+                'limit': limit,
+                'more_items_in_collection': more,
+                'next_start': start + limit if more else None,
+            }},
+        }
+
+    def _fallback(self, method, term, start, limit, options, **params):
+        if not self.mirror.fallback:
+            return CollectionResponse({'success': True, 'data': []},
+                                      self.resource.MODEL_CLASS, **options)
+        self.mirror.fallbacks += 1
+        params.update(options)
+        params.update(start=start, limit=limit)
+        if not params.get('search_by_email'):
+            params.pop('search_by_email', None)
+        if method == 'find':
+            return self.resource.find(term, **params)
+        return self.resource.list(**params)
+
+
+class LocalMirror(object):
+    """A local copy of deals, persons and organizations in SQLite, indexed by
+    name, email, phone, owner, organization, person and stage, so that
+    lookup heavy jobs don't pay a request per lookup:
+
+        mirror = LocalMirror(api, 'mirror.db', max_age=900)
+        mirror.person.find('john@example.com', search_by_email=1)
+        mirror.deal.list(stage_id=3)
+
+    The mirror is kept up to date by a SyncEngine. Before answering, a
+    resource whose last refresh is older than max_age seconds is refreshed,
+    which only pulls what changed since. When the refresh fails, or the
+    query uses params the mirror doesn't index, or nothing is found locally,
+    the query goes to the API (unless fallback is False).
+    Args:
+        api(PipedriveAPI): The api to mirror.
+        path(str): The SQLite database file, in-memory by default.
+        resources(iterable): The mirrored resources.
+        max_age(float): Seconds a refresh is trusted for.
+        fallback(bool): Whether to query the API when the mirror can't
+            answer.
+    """
+
+    def __init__(self, api, path=':memory:', resources=None, max_age=3600,
+                 fallback=True, clock=time, **sync_options):
+        self.api = api
+        self.resources = tuple(resources or MIRROR_RESOURCES)
+        self.max_age = max_age
+        self.fallback = fallback
+        self.clock = clock
+        self.fallbacks = 0
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.RLock()
+        with self._lock, self._connection:
+            for statement in SCHEMA:
+                self._connection.execute(statement)
+        self.engine = SyncEngine(api, SyncCheckpointStore(path),
+                                 resources=self.resources, raw=True,
+                                 **sync_options)
+
+    def __getattr__(self, item):
+        if item in MIRROR_RESOURCES and item in self.resources:
+            return MirroredResource(self, getattr(self.api, item))
+        raise AttributeError('%s is not mirrored.' % item)
+
+    def execute(self, query, args=()):
+        with self._lock:
+            return self._connection.execute(query, args).fetchall()
+
+    def refresh(self, resources=None):
+        """Applies what changed since the last refresh of the resources (all
+        of them by default)."""
+        for name in resources or self.resources:
+            with self._lock:
+                for change in self.engine.changes_of(name):
+                    self._apply(change)
+                with self._connection:
+                    self._connection.execute(
+                        'INSERT OR REPLACE INTO mirror_refreshes '
+                        '(resource, refreshed_at) VALUES (?, ?)',
+                        (name, self.clock())
+                    )
+
+    def refreshed_at(self, resource):
+        rows = self.execute('SELECT refreshed_at FROM mirror_refreshes '
+                            'WHERE resource = ?', (resource,))
+        return rows[0][0] if rows else None
+
+    def ensure_fresh(self, resource):
+        """Refreshes the resource when its data is older than max_age.
+        Returns:
+            bool: Whether the local data can be used.
+        """
+        refreshed_at = self.refreshed_at(resource)
+        if refreshed_at is not None and \
+                self.clock() - refreshed_at <= self.max_age:
+            return True
+        try:
+            self.refresh([resource])
+        except Exception as err:
+            if not self.fallback:
+                raise
+            logger.warning("Couldn't refresh the %s mirror (%s), querying "
+                           "the API instead", resource, err)
+            return False
+        return True
+
+    def _apply(self, change):
+        with self._connection:
+            self._connection.execute(
+                'DELETE FROM mirror_contacts WHERE resource = ? AND id = ?',
+                (change.resource, change.id)
+            )
+            if change.action == DELETE:
+                self._connection.execute(
+                    'DELETE FROM mirror_objects WHERE resource = ? AND id = ?',
+                    (change.resource, change.id)
+                )
+                return
+            data = change.model
+            name_key, owner_key = MIRROR_RESOURCES[change.resource]
+            self._connection.execute(
+                'INSERT OR REPLACE INTO mirror_objects (resource, id, name, '
+                'owner_id, org_id, person_id, stage_id, data) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (change.resource, change.id, data.get(name_key),
+                 related_id(data.get(owner_key)),
+                 related_id(data.get('org_id')),
+                 related_id(data.get('person_id')),
+                 related_id(data.get('stage_id')), json.dumps(data))
+            )
+            contacts = [('email', normalize_email(email))
+                        for email in contact_values(data.get('email'))]
+            contacts.extend(('phone', normalize_phone(phone))
+                            for phone in contact_values(data.get('phone')))
+            self._connection.executemany(
+                'INSERT INTO mirror_contacts (resource, id, kind, value) '
+                'VALUES (?, ?, ?, ?)',
+                [(change.resource, change.id, kind, value)
+                 for kind, value in contacts if value]
+            )
+
+    def close(self):
+        self._connection.close()
+        self.engine.store.close()
@@ -3,9 +3,10 @@ from copy import deepcopy
 
 from schematics.models import Model
 from schematics.types import (
-    StringType, IntType, DecimalType, EmailType, BooleanType
+    StringType, IntType, DecimalType, EmailType, BooleanType, BaseType
 )
-from schematics.types.compound import ListType
+from schematics.types.compound import DictType, ListType
+from .base import dict_to_model
 from .types import (
     PipedriveDateTime, PipedriveModelType, PipedriveDate, PipedriveTime,
     PipedrivePhoneEmailType
@@ -14,6 +15,7 @@ from .types import (
 
 class BaseModel(Model):
     _original_data = None
+    _baseline = None
 
     def __init__(self, raw_data=None, deserialize_mapping=None,
                  strict=True, original_data=None):
@@ -23,6 +25,38 @@ class BaseModel(Model):
     def get_original_data(self):
         return deepcopy(self._original_data)
 
+    def changes(self):
+        """The fields modified since the model was read from the API, as the
+        primitive dict an update should send. A model that wasn't read from
+        the API (it has no original data) is new: all its fields are
+        returned.
+        """
+        current = self.to_primitive()
+        if self._original_data is None:
+            return current
+        if self._baseline is None:
+            # The original data goes through the same conversions, so that
+            # only real modifications differ
+            self._baseline = dict_to_model(
+                self._original_data, self.__class__
+            ).to_primitive()
+        return dict(
+            (key, current.get(key))
+            for key in set(current) | set(self._baseline)
+            if key != 'id' and current.get(key) != self._baseline.get(key)
+        )
+
+    def has_changed(self):
+        return bool(self.changes())
+
+    def mark_clean(self, original_data=None):
+        """Makes the current state (or original_data, e.g. the json returned
+        by an update) the reference changes() compares to."""
+        if original_data is None:
+            original_data = self.to_primitive()
+        self._original_data = original_data
+        self._baseline = None
+
 
 class User(BaseModel):
     """
@@ -160,3 +194,37 @@ class Person(BaseModel):
     phone = PipedrivePhoneEmailType(required=False)
     email = PipedrivePhoneEmailType(required=False)
     visible_to = IntType(required=False, choices=(0, 1, 2, 3))
+
+
+class RecentItem(BaseModel):
+    """
+    An entry of the recents (changelog) listing: `data` holds the raw json
+    of the changed object, whose kind is given by `item` (deal, person...).
+    """
+    item = StringType(required=True)
+    id = IntType(required=False)
+    data = BaseType(required=False)
+
+
+class TimelineTotals(BaseModel):
+    """
+    The totals of a deals timeline period, the values being by currency.
+    """
+    count = IntType(required=False)
+    values = DictType(DecimalType, required=False)
+    weighted_values = DictType(DecimalType, required=False)
+    open_count = IntType(required=False)
+    open_values = DictType(DecimalType, required=False)
+    weighted_open_values = DictType(DecimalType, required=False)
+    won_count = IntType(required=False)
+    won_values = DictType(DecimalType, required=False)
+
+
+class TimelinePeriod(BaseModel):
+    """
+    A period (day, week, month or quarter) of a deals timeline.
+    """
+    period_start = PipedriveDateTime(required=False)
+    period_end = PipedriveDateTime(required=False)
+    deals = ListType(PipedriveModelType(Deal), required=False)
+    totals = PipedriveModelType(TimelineTotals, required=False)
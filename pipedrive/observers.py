@@ -0,0 +1,283 @@
+# encoding:utf-8
+import re
+import threading
+from collections import OrderedDict
+from logging import getLogger
+from time import monotonic
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+
+__all__ = [
+    'RequestEvent', 'Observer', 'EndpointStats', 'PrometheusObserver',
+    'OpenTelemetryObserver',
+]
+
+logger = getLogger('pipedrive.observers')
+
+ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+
+def path_template(path):
+    """The path with its ids replaced, e.g. /deals/{id}/activities, so that
+    requests to the same endpoint are grouped together."""
+    return ID_SEGMENT.sub('/{id}', path)
+
+
+class RequestEvent(object):
+    """Describes one call to the API, retries included. Observers get it
+    when the request starts and again, completed, when it ends.
+
+    Attributes:
+        resource(str): The first path segment, e.g. 'deals'.
+        method(str): The HTTP method.
+        path(str): The requested path, e.g. /deals/42.
+        path_template(str): The path with ids replaced, e.g. /deals/{id}.
+        status_code(int): The status of the last response, None when no
+            response came back.
+        latency(float): Seconds from the start to the end of the request,
+            retries and backoff included.
+        bytes_out(int): Size of the last request body.
+        bytes_in(int): Size of the last response body.
+        retries(int): How many times the request was retried.
+        error(Exception): What made the request fail, if it failed.
+        rate_limit(dict): RateLimiter.snapshot() when the request ended:
+            the remaining budget, concurrency limit...
+        context(dict): Free space for observers, e.g. to keep a span
+            between on_request_start and on_request_end.
+    """
+    __slots__ = ('resource', 'method', 'path', 'path_template', 'started',
+                 'status_code', 'latency', 'bytes_out', 'bytes_in', 'retries',
+                 'error', 'rate_limit', 'context')
+
+    def __init__(self, method, path, clock=monotonic):
+        self.method = method.upper()
+        self.path = path
+        self.path_template = path_template(path)
+        self.resource = path.strip('/').split('/', 1)[0]
+        self.started = clock()
+        self.status_code = None
+        self.latency = None
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.retries = 0
+        self.error = None
+        self.rate_limit = None
+        self.context = {}
+
+    def finish(self, response=None, error=None, rate_limit=None,
+               clock=monotonic):
+        self.latency = clock() - self.started
+        self.error = error
+        self.rate_limit = rate_limit
+        if response is None and error is not None:
+            response = getattr(error, 'response', None)
+        if response is not None:
+            self.status_code = getattr(response, 'status_code', None)
+            self.bytes_in = len(getattr(response, '_content', None) or b'')
+            request = getattr(response, 'request', None)
+            body = getattr(request, 'body', None) or b''
+            self.bytes_out = len(body)
+
+    @property
+    def succeeded(self):
+        return self.error is None
+
+    def __repr__(self):
+        return '<RequestEvent %s %s %s %.3fs>' % (
+            self.method, self.path_template, self.status_code,
+            self.latency or 0.0
+        )
+
+
+class Observer(object):
+    """Base class of the objects that get the events of every API call,
+    registered with PipedriveAPI(observers=[...]) or api.add_observer().
+    Both hooks run on the thread sending the request and must be quick.
+    """
+
+    def on_request_start(self, event):
+        pass
+
+    def on_request_end(self, event):
+        pass
+
+
+def notify(observers, hook, event):
+    """Calls a hook of each observer. A failing observer is logged and never
+    breaks the request."""
+    for observer in observers:
+        try:
+            getattr(observer, hook)(event)
+        except Exception:
+            logger.exception('Observer %r failed on %s', observer, hook)
+
+
+class EndpointStats(Observer):
+    """Dependency-free aggregation of the events per endpoint, to see which
+    ones dominate the latency and the budget:
+
+        stats = EndpointStats()
+        api.add_observer(stats)
+        ...
+        for endpoint, totals in stats.report():
+            print(endpoint, totals['count'], totals['latency'])
+    """
+
+    FIELDS = ('count', 'errors', 'retries', 'latency', 'max_latency',
+              'bytes_in', 'bytes_out')
+
+    def __init__(self):
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def on_request_end(self, event):
+        key = (event.method, event.path_template)
+        with self._lock:
+            totals = self._totals.setdefault(
+                key, dict.fromkeys(self.FIELDS, 0)
+            )
+            totals['count'] += 1
+            totals['errors'] += 0 if event.succeeded else 1
+            totals['retries'] += event.retries
+            totals['latency'] += event.latency
+            totals['max_latency'] = max(totals['max_latency'], event.latency)
+            totals['bytes_in'] += event.bytes_in
+            totals['bytes_out'] += event.bytes_out
+
+    def report(self):
+        """Returns ((method, path template), totals) pairs, the endpoints
+        with the highest total latency first."""
+        with self._lock:
+            items = [(key, dict(totals))
+                     for key, totals in self._totals.items()]
+        return sorted(items, key=lambda item: -item[1]['latency'])
+
+    def reset(self):
+        with self._lock:
+            self._totals.clear()
+
+
+class PrometheusObserver(Observer):
+    """Exports the events as prometheus_client metrics:
+
+    - <namespace>_request_duration_seconds: histogram by resource, method,
+      path template and status.
+    - <namespace>_request_bytes / _response_bytes / _retries: counters.
+    - <namespace>_rate_limit_remaining and _concurrency_limit: gauges of the
+      rate limiter headroom.
+    Args:
+        registry(CollectorRegistry): Defaults to prometheus_client's global
+            registry.
+        namespace(str): Prefix of the metric names.
+        buckets(tuple): Buckets of the latency histogram.
+    """
+
+    def __init__(self, registry=None, namespace='pipedrive', buckets=None):
+        if prometheus_client is None:
+            raise ImportError('PrometheusObserver requires prometheus_client')
+        options = {}
+        if registry is not None:
+            options['registry'] = registry
+        labels = ('resource', 'method', 'path')
+        histogram_options = dict(options)
+        if buckets is not None:
+            histogram_options['buckets'] = buckets
+        self.latency = prometheus_client.Histogram(
+            namespace + '_request_duration_seconds',
+            'Duration of the Pipedrive API requests, retries included',
+            labels + ('status',), **histogram_options
+        )
+        self.bytes_out = prometheus_client.Counter(
+            namespace + '_request_bytes', 'Bytes sent to the Pipedrive API',
+            labels, **options
+        )
+        self.bytes_in = prometheus_client.Counter(
+            namespace + '_response_bytes',
+            'Bytes received from the Pipedrive API', labels, **options
+        )
+        self.retries = prometheus_client.Counter(
+            namespace + '_retries', 'Retried Pipedrive API requests', labels,
+            **options
+        )
+        self.remaining = prometheus_client.Gauge(
+            namespace + '_rate_limit_remaining',
+            'Requests left in the current rate limit window', **options
+        )
+        self.concurrency = prometheus_client.Gauge(
+            namespace + '_concurrency_limit',
+            'Requests allowed in flight by the rate limiter', **options
+        )
+
+    def on_request_end(self, event):
+        labels = (event.resource, event.method, event.path_template)
+        status = str(event.status_code) if event.status_code else 'error'
+        self.latency.labels(*(labels + (status,))).observe(event.latency)
+        self.bytes_out.labels(*labels).inc(event.bytes_out)
+        self.bytes_in.labels(*labels).inc(event.bytes_in)
+        if event.retries:
+            self.retries.labels(*labels).inc(event.retries)
+        rate_limit = event.rate_limit or {}
+        if rate_limit.get('remaining') is not None:
+            self.remaining.set(rate_limit['remaining'])
+        if rate_limit.get('concurrency') is not None:
+            self.concurrency.set(rate_limit['concurrency'])
+
+
+class OpenTelemetryObserver(Observer):
+    """Wraps each API call in an OpenTelemetry client span named after the
+    endpoint, e.g. "GET /deals/{id}".
+    Args:
+        tracer(Tracer): Defaults to the "pipedrive" tracer of the global
+            tracer provider.
+    """
+
+    def __init__(self, tracer=None):
+        if tracer is None:
+            if otel_trace is None:
+                raise ImportError(
+                    'OpenTelemetryObserver requires opentelemetry-api'
+                )
+            tracer = otel_trace.get_tracer('pipedrive')
+        self.tracer = tracer
+
+    def on_request_start(self, event):
+        options = {'attributes': OrderedDict([
+            ('http.request.method', event.method),
+            ('url.template', event.path_template),
+            ('pipedrive.resource', event.resource),
+        ])}
+        if otel_trace is not None:
+            options['kind'] = otel_trace.SpanKind.CLIENT
+        event.context['span'] = self.tracer.start_span(
+            '%s %s' % (event.method, event.path_template), **options
+        )
+
+    def on_request_end(self, event):
+        span = event.context.pop('span', None)
+        if span is None:
+            return
+        if event.status_code is not None:
+            span.set_attribute('http.response.status_code', event.status_code)
+        span.set_attribute('pipedrive.retries', event.retries)
+        span.set_attribute('pipedrive.bytes_in', event.bytes_in)
+        span.set_attribute('pipedrive.bytes_out', event.bytes_out)
+        rate_limit = event.rate_limit or {}
+        if rate_limit.get('remaining') is not None:
+            span.set_attribute('pipedrive.rate_limit.remaining',
+                               rate_limit['remaining'])
+        if event.error is not None:
+            span.record_exception(event.error)
+            if otel_trace is not None:
+                span.set_status(otel_trace.Status(
+                    otel_trace.StatusCode.ERROR, str(event.error)
+                ))
+        span.end()
@@ -0,0 +1,184 @@
+# encoding:utf-8
+import re
+import threading
+from time import monotonic, sleep
+from urllib.parse import urlsplit
+
+
+__all__ = ['RateLimiter']
+
+MAX_CONCURRENCY = 32
+
+ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+
+def _int_header(headers, name):
+    try:
+        return int(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def endpoint_key(method, url):
+    """The endpoint of a request, ids left out, e.g. GET /v1/deals/{id}."""
+    return '%s %s' % (method.upper(),
+                      ID_SEGMENT.sub('/{id}', urlsplit(url).path))
+
+
+class RateLimiter(object):
+    """Client-side throttling shared by every request of a PipedriveAPI (and
+    by several PipedriveAPI objects using the same token, if they are given
+    the same instance). It's thread-safe and combines:
+
+    - A token bucket pacing requests at `rate` per second. The rate is also
+      derived from the X-RateLimit-Remaining / X-RateLimit-Reset headers, so
+      whatever budget is left in the current window gets spread evenly over
+      the time left in it instead of being burned upfront.
+    - An AIMD concurrency limit: it grows by `increase / limit` on every
+      successful response and is multiplied by `decrease` whenever a 429 comes
+      back or the latency jumps above `latency_factor` times its moving
+      average. The averages are kept per endpoint (see endpoint_key): a page
+      of 500 deals is not a spike next to a single user's detail.
+
+    Args:
+        rate(float): Static ceiling of requests per second, or None to rely
+            on the response headers only.
+        burst(int): Size of the token bucket.
+        max_concurrency(int): Upper (and initial) bound of requests in flight.
+        min_concurrency(int): Lower bound the AIMD decrease never crosses.
+        increase(float): Additive increase factor.
+        decrease(float): Multiplicative decrease factor.
+        latency_factor(float): How far above the moving average a latency
+            must be to count as a spike.
+    """
+
+    def __init__(self, rate=None, burst=10, max_concurrency=MAX_CONCURRENCY,
+                 min_concurrency=1, increase=1.0, decrease=0.5,
+                 latency_factor=3.0, clock=monotonic, sleep=sleep):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.clock = clock
+        self.sleep = sleep
+
+        self.concurrency = float(max_concurrency)
+        self.in_flight = 0
+        self.tokens = float(burst)
+        self.limit = None
+        self.remaining = None
+        self.reset_at = None
+        self.latencies = {}
+        self.throttled = 0
+        self._refilled_at = clock()
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Blocks until a request may be sent.
+        Returns:
+            float: The clock value to hand back to release().
+        """
+        with self._condition:
+            while self.in_flight >= max(int(self.concurrency), 1):
+                self._condition.wait()
+            self.in_flight += 1
+        try:
+            while True:
+                with self._condition:
+                    delay = self._take_token()
+                if delay <= 0:
+                    return self.clock()
+                self.sleep(delay)
+        except BaseException:
+            self._leave()
+            raise
+
+    def release(self, started, response=None, endpoint=None):
+        """Gives the slot taken by acquire() back and learns from the
+        response (which is None when the request itself failed).
+        Args:
+            started(float): What acquire() returned.
+            response(requests.Response): The response, if any.
+            endpoint(str): The endpoint whose latencies the request's is
+                compared to, see endpoint_key.
+        """
+        now = self.clock()
+        latency = now - started
+        status_code = getattr(response, 'status_code', None)
+        with self._condition:
+            self.in_flight -= 1
+            self._read_headers(getattr(response, 'headers', None), now)
+            average = self.latencies.get(endpoint)
+            spike = average is not None and \
+                latency > self.latency_factor * average
+            if status_code == 429 or spike:
+                self.concurrency = max(float(self.min_concurrency),
+                                       self.concurrency * self.decrease)
+                if status_code == 429:
+                    self.throttled += 1
+                    self.tokens = 0.0
+            elif status_code is not None and status_code < 400:
+                self.concurrency = min(
+                    float(self.max_concurrency),
+                    self.concurrency + self.increase / self.concurrency
+                )
+            if status_code != 429:
+                self.latencies[endpoint] = latency if average is None else \
+                    0.8 * average + 0.2 * latency
+            self._condition.notify_all()
+
+    def snapshot(self):
+        """The current state of the limiter, as a dict."""
+        with self._condition:
+            return {
+                'concurrency': int(self.concurrency),
+                'in_flight': self.in_flight,
+                'limit': self.limit,
+                'remaining': self.remaining,
+                'rate': self._current_rate(self.clock()),
+                'throttled': self.throttled,
+            }
+
+    def _leave(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def _current_rate(self, now):
+        rates = [self.rate] if self.rate else []
+        if self.remaining is not None and self.reset_at is not None and \
+                self.reset_at > now:
+            rates.append(self.remaining / (self.reset_at - now))
+        return min(rates) if rates else None
+
+    def _take_token(self):
+        now = self.clock()
+        rate = self._current_rate(now)
+        if rate is None:
+            return 0
+        if rate <= 0:
+            # Budget exhausted: wait for the window to reset
+            return self.reset_at - now
+        self.tokens = min(float(self.burst),
+                          self.tokens + (now - self._refilled_at) * rate)
+        self._refilled_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            if self.remaining is not None:
+                self.remaining -= 1
+            return 0
+        return (1 - self.tokens) / rate
+
+    def _read_headers(self, headers, now):
+        if not headers:
+            return
+        remaining = _int_header(headers, 'X-RateLimit-Remaining')
+        if remaining is None:
+            return
+        self.remaining = remaining
+        self.limit = _int_header(headers, 'X-RateLimit-Limit')
+        reset = _int_header(headers, 'X-RateLimit-Reset')
+        self.reset_at = now + max(reset, 1) if reset is not None else None
@@ -0,0 +1,137 @@
+# encoding:utf-8
+from collections import OrderedDict
+from logging import getLogger
+
+from schematics.models import Model
+
+from .base import DEFAULT_CONCURRENCY, LazyModel, PipedriveAPI
+from .types import PipedriveModelType
+
+
+__all__ = ['resolve', 'IdentityMap']
+
+logger = getLogger('pipedrive.relations')
+
+
+class IdentityMap(object):
+    """One shared instance per (model class, id). Handing the same map to
+    several resolve() calls lets them reuse what was already fetched.
+
+    Attributes:
+        errors(OrderedDict): (model class, id) -> the exception raised while
+            fetching that object. Such references keep their stub.
+    """
+
+    def __init__(self):
+        self._objects = {}
+        self.errors = OrderedDict()
+
+    def get(self, model_class, resource_id):
+        return self._objects.get((model_class, resource_id))
+
+    def add(self, model, model_class=None):
+        """Registers model unless an instance with its id is already known,
+        and returns the registered instance."""
+        key = (model_class or type(model), model.id)
+        return self._objects.setdefault(key, model)
+
+    def __contains__(self, key):
+        return key in self._objects
+
+    def __len__(self):
+        return len(self._objects)
+
+
+def is_stub(model):
+    """Whether model was built out of a bare numeric id."""
+    original = getattr(model, '_original_data', None)
+    return original is not None and set(original) == {'id'}
+
+
+_resources_by_model = {}
+
+
+def resource_class_for(model_class):
+    """The registered resource whose MODEL_CLASS is model_class."""
+    try:
+        return _resources_by_model[model_class]
+    except KeyError:
+        pass
+    for resource_class in PipedriveAPI.resource_registry.values():
+        if resource_class.MODEL_CLASS is model_class:
+            _resources_by_model[model_class] = resource_class
+            return resource_class
+    raise ValueError('No resource serves %s objects' % model_class.__name__)
+
+
+def _set(item, name, value):
+    if isinstance(item, LazyModel) and item._model is None:
+        # Keeps the proxy lazy instead of materializing it
+        item._values[name] = value
+    else:
+        setattr(item, name, value)
+
+
+def resolve(api, collection, *field_names, concurrency=DEFAULT_CONCURRENCY,
+            identity_map=None):
+    """Replaces the related objects of a whole collection, e.g. the
+    organizations and stages of a page of deals, with complete shared
+    instances:
+
+        deals = api.deal.list()
+        api.resolve(deals, 'org_id', 'stage_id')
+
+    The related objects the API only gave the id of are fetched once per
+    distinct id, concurrently (and through the api's cache, when set up).
+    Related objects with the same id end up being the same instance.
+    Args:
+        api(PipedriveAPI): The api to fetch the related objects with.
+        collection(iterable): Models (or lazy models), e.g. a
+            CollectionResponse. Other items (raw dicts, records) are skipped.
+        *field_names: The PipedriveModelType fields to resolve.
+        concurrency(int): The maximum number of requests in flight.
+        identity_map(IdentityMap): The instances already known.
+    Returns:
+        IdentityMap: Every related instance, plus the fetch errors.
+    """
+    identity_map = identity_map if identity_map is not None else \
+        IdentityMap()
+    items = [item for item in collection if isinstance(item, Model)]
+    references = []
+    missing = OrderedDict()
+    for item in items:
+        # item.__class__ is the model class for lazy models too
+        fields = item.__class__.fields
+        for name in field_names:
+            field = fields.get(name)
+            if not isinstance(field, PipedriveModelType):
+                raise ValueError('%s.%s is not a PipedriveModelType field' %
+                                 (item.__class__.__name__, name))
+            value = getattr(item, name)
+            if value is None or value.id is None:
+                continue
+            model_class = field.model_class
+            references.append((item, name, model_class, value))
+            if (model_class, value.id) in identity_map:
+                continue
+            if is_stub(value):
+                missing.setdefault(model_class, OrderedDict())[value.id] = None
+            else:
+                identity_map.add(value, model_class)
+
+    for model_class, resource_ids in missing.items():
+        accessor = resource_class_for(model_class).API_ACESSOR_NAME
+        batch = getattr(api, accessor).detail_many(list(resource_ids),
+                                                   concurrency)
+        for model in batch:
+            identity_map.add(model, model_class)
+        for resource_id, error in batch.errors.items():
+            logger.warning("Couldn't resolve %s %s: %s",
+                           model_class.__name__, resource_id, error)
+            identity_map.errors[(model_class, resource_id)] = error
+
+    for item, name, model_class, value in references:
+        instance = identity_map.get(model_class, value.id)
+        if instance is not None and instance is not value:
+            _set(item, name, instance)
+    return identity_map
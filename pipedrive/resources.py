@@ -1,8 +1,12 @@
 # encoding:utf-8
+from functools import partial
+
 from .base import BaseResource, PipedriveAPI, CollectionResponse, dict_to_model
+from .batch import DEFAULT_CONCURRENCY, run_batch
+from .timeline import fetch_timeline, to_date
 from pipedrive import (
     User, Pipeline, Stage, SearchResult, Organization,
-    Deal, Activity, ActivityType, Note, Person)
+    Deal, Activity, ActivityType, Note, Person, RecentItem)
 
 
 class UserResource(BaseResource):
@@ -11,6 +15,7 @@ class UserResource(BaseResource):
     LIST_REQ_PATH = '/users'
     DETAIL_REQ_PATH = '/users/{id}'
     FIND_REQ_PATH = '/users/find'
+    CACHE_TTL = 300
 
     def detail(self, resource_ids):
         response = self._detail(resource_ids)
@@ -21,26 +26,13 @@ class UserResource(BaseResource):
         return dict_to_model(response.json()['data'], self.MODEL_CLASS)
 
     def list(self, **params):
-        return CollectionResponse(self._list(params=params), self.MODEL_CLASS)
+        return self._collection(self._list, params)
 
     def find(self, term, **params):
-        return CollectionResponse(
-            self._find(term, params=params),
-            self.MODEL_CLASS
-        )
+        return self._collection(partial(self._find, term), params)
 
     def all(self):
-        users = []
-
-        has_more_users = True
-        next_start = 0
-        while has_more_users:
-            result = self.list(start=next_start, limit=500)
-            users = users + result.items
-            has_more_users = result.more_items_in_collection
-            next_start = result.next_start
-
-        return users
+        return list(self.iter_all())
 
 
 class PipelineResource(BaseResource):
@@ -48,6 +40,7 @@ class PipelineResource(BaseResource):
     API_ACESSOR_NAME = 'pipeline'
     LIST_REQ_PATH = '/pipelines'
     DETAIL_REQ_PATH = '/pipelines/{id}'
+    CACHE_TTL = 600
 
     def detail(self, resource_ids):
         response = self._detail(resource_ids)
@@ -58,7 +51,7 @@ class PipelineResource(BaseResource):
         return dict_to_model(response.json()['data'], self.MODEL_CLASS)
 
     def list(self, **params):
-        return CollectionResponse(self._list(params=params), self.MODEL_CLASS)
+        return self._collection(self._list, params)
 
 
 class StageResource(BaseResource):
@@ -66,6 +59,7 @@ class StageResource(BaseResource):
     API_ACESSOR_NAME = 'stage'
     LIST_REQ_PATH = '/stages'
     DETAIL_REQ_PATH = '/stages/{id}'
+    CACHE_TTL = 600
 
     def detail(self, resource_ids):
         response = self._detail(resource_ids)
@@ -76,26 +70,30 @@ class StageResource(BaseResource):
         return dict_to_model(response.json()['data'], self.MODEL_CLASS)
 
     def list(self, **params):
-        return CollectionResponse(self._list(params=params), self.MODEL_CLASS)
+        return self._collection(self._list, params)
 
     def stages_of_pipeline(self, pipeline, **params):
         params['pipeline_id'] = pipeline.id
-        return CollectionResponse(self._list(params=params), self.MODEL_CLASS)
+        return self._collection(self._list, params)
 
 
 class SearchResource(BaseResource):
     API_ACESSOR_NAME = 'search'
     SEARCH_PATH = '/searchResults'
     SEARCH_FIELD_PATH = '/searchResults/field'
+    # Results go stale quickly, they are only worth caching for a short while
+    CACHE_TTL = 30
 
     def search_all_fields(self, term, **params):
         """Search for 'term' in all fields of all objects"""
         params['term'] = term
-        response = self.send_request('GET', self.SEARCH_PATH, params, data=None)
-        search_result = response.json()
-        for item in search_result.get('data', []) or []:
-            item['result'] = item['title']
-        return CollectionResponse(search_result, SearchResult)
+        options = self._read_options(params)
+        search_result = self._cached_get(self.SEARCH_PATH, params).json()
+        # The json may be cached, it is left untouched
+        items = [dict(item, result=item['title'])
+                 for item in search_result.get('data', []) or []]
+        return CollectionResponse(dict(search_result, data=items),
+                                  SearchResult, **options)
 
     def search_single_field(self, term, field, **params):
         """Search for 'term' in a specific field of a specific type of object.
@@ -107,14 +105,62 @@ class SearchResource(BaseResource):
             'field_key': field.key,
             'return_item_ids': 1,
         })
-        response = self.send_request(
-            'GET', self.SEARCH_FIELD_PATH, params, data=None
-        )
-        search_result = response.json()
-        for item in search_result.get('data', []) or []:
-            item['result'] = item[field.key]
-            item['type'] = field.FIELD_PARENT_TYPE.replace('Field', '')
-        return CollectionResponse(search_result, SearchResult)
+        options = self._read_options(params)
+        search_result = self._cached_get(self.SEARCH_FIELD_PATH, params).json()
+        item_type = field.FIELD_PARENT_TYPE.replace('Field', '')
+        items = [dict(item, result=item[field.key], type=item_type)
+                 for item in search_result.get('data', []) or []]
+        return CollectionResponse(dict(search_result, data=items),
+                                  SearchResult, **options)
+
+    def iter_results(self, term, field=None, page_size=100, **params):
+        """Lazily yields every result of a search, page by page, e.g.:
+            api.search.iter_results('acme')
+            api.search.iter_results('acme', field=name_field)
+        Accepts the arguments of iter_pages (prefetch, raw...).
+        """
+        if field is None:
+            return self.iter_all(term, list_method='search_all_fields',
+                                 page_size=page_size, **params)
+        return self.iter_all(term, field, list_method='search_single_field',
+                             page_size=page_size, **params)
+
+    def hydrate(self, results, concurrency=DEFAULT_CONCURRENCY):
+        """Fetches the full objects of search results, grouped by type (deal,
+        person, organization...), in one concurrent batch instead of a
+        detail() call after another, e.g.:
+            found = api.search.hydrate(api.search.iter_results('acme'))
+            deal = found[('deal', 42)]
+        Args:
+            results(iterable): SearchResults (models, records or raw dicts).
+            concurrency(int): The maximum number of requests in flight.
+        Returns:
+            BatchResult: The models keyed by (type, id), in input order.
+                Results of a type no registered resource serves (files...)
+                are in the errors.
+        """
+        def fetch(key):
+            result_type, resource_id = self._check_result_key(self.api, key)
+            return getattr(self.api, result_type).detail(resource_id)
+
+        return run_batch(fetch, self._result_keys(results), concurrency)
+
+    @classmethod
+    def _result_keys(cls, results):
+        """The (type, id) keys of search results."""
+        keys = []
+        for result in results:
+            if isinstance(result, dict):
+                keys.append((result.get('type'), result.get('id')))
+            else:
+                keys.append((result.type, result.id))
+        return keys
+
+    @classmethod
+    def _check_result_key(cls, api, key):
+        if key[0] not in api.resource_registry:
+            raise ValueError('No resource serves %s results' % key[0])
+        return key
 
 
 class OrganizationResource(BaseResource):
@@ -134,20 +180,13 @@ class OrganizationResource(BaseResource):
         return dict_to_model(response.json()['data'], self.MODEL_CLASS)
 
     def update(self, organization):
-        response = self._update(
-            organization.id,
-            data=organization.to_primitive()
-        )
-        return dict_to_model(response.json()['data'], self.MODEL_CLASS)
+        return self._update_model(organization)
 
     def list(self, **params):
-        return CollectionResponse(self._list(params=params), self.MODEL_CLASS)
+        return self._collection(self._list, params)
 
     def find(self, term, **params):
-        return CollectionResponse(
-            self._find(term, params=params),
-            self.MODEL_CLASS
-        )
+        return self._collection(partial(self._find, term), params)
 
     def list_activities(self, resource_ids, **params):
         return self._related_entities(
@@ -161,11 +200,6 @@ class OrganizationResource(BaseResource):
             params=params
         )
 
-    def bulk_delete(self, organizations):
-        organizations_ids = [organization.id for organization in organizations]
-        response = self._bulk_delete(organizations_ids)
-        return response.json()
-
 
 class DealResource(BaseResource):
     MODEL_CLASS = Deal
@@ -185,13 +219,10 @@ class DealResource(BaseResource):
         return dict_to_model(response.json()['data'], self.MODEL_CLASS)
 
     def list(self, **params):
-        return CollectionResponse(self._list(params=params), self.MODEL_CLASS)
+        return self._collection(self._list, params)
 
     def find(self, term, **params):
-        return CollectionResponse(
-            self._find(term, params=params),
-            self.MODEL_CLASS
-        )
+        return self._collection(partial(self._find, term), params)
 
     def list_activities(self, resource_ids, **params):
         return self._related_entities(
@@ -203,18 +234,13 @@ class DealResource(BaseResource):
         response = self._delete(deal.id)
         return response.json()
 
-    def bulk_delete(self, deals):
-        deals_ids = [deal.id for deal in deals]
-        response = self._bulk_delete(deals_ids)
-        return response.json()
-
     def timeline(self, start_date, interval, amount, field_key, params=None,
                  user_id=None, pipeline_id=None, filter_id=None, details=True,
                  currency='default_currency'):
         if interval not in ['day', 'week', 'month', 'quarter']:
             raise ValueError('interval must be day, week, month or quarter')
         params = params or {}
-        params['start_date'] = start_date  # TODO force it into YYYY-MM-DD
+        params['start_date'] = to_date(start_date).strftime('%Y-%m-%d')
         params['interval'] = interval
         params['amount'] = amount
         # field_key should be in ['add_time', 'update_time',
@@ -233,13 +259,27 @@ class DealResource(BaseResource):
             params['exclude_deals'] = 1
         if user_id is not None:
             params['user_id'] = user_id
-        if user_id is not None:
+        if pipeline_id is not None:
             params['pipeline_id'] = pipeline_id
         if filter_id is not None:
             params['filter_id'] = filter_id
         response = self._timeline(params=params)
         return response.json()
 
+    def timeline_periods(self, start_date, interval, amount, field_key,
+                         chunk_size=None, concurrency=DEFAULT_CONCURRENCY,
+                         **kwargs):
+        """Fetches a long timeline in chunks of intervals, concurrently,
+        merged into typed periods, e.g.:
+            timeline = api.deal.timeline_periods('2015-01-01', 'month', 24,
+                                                 'add_time')
+            timeline.totals().count
+            timeline.aggregate(by=('currency', 'stage_id'))
+        See pipedrive.timeline.fetch_timeline for the arguments.
+        """
+        return fetch_timeline(self, start_date, interval, amount, field_key,
+                              chunk_size, concurrency, **kwargs)
+
 
 class NoteResource(BaseResource):
     MODEL_CLASS = Note
@@ -256,7 +296,7 @@ class NoteResource(BaseResource):
         return dict_to_model(response.json()['data'], self.MODEL_CLASS)
 
     def list(self, **params):
-        return CollectionResponse(self._list(params=params), self.MODEL_CLASS)
+        return self._collection(self._list, params)
 
     def delete(self, activityType):
         response = self._delete(activityType.id)
@@ -278,24 +318,14 @@ class ActivityResource(BaseResource):
         return dict_to_model(response.json()['data'], self.MODEL_CLASS)
 
     def list(self, **params):
-        return CollectionResponse(self._list(params=params), self.MODEL_CLASS)
+        return self._collection(self._list, params)
 
     def delete(self, activity):
         response = self._delete(activity.id)
         return response.json()
 
-    def bulk_delete(self, activities):
-        activities_ids = [activity.id for activity in activities]
-
-        response = self._bulk_delete(activities_ids)
-        return response.json()
-
     def update(self, activity):
-        response = self._update(
-            activity.id,
-            data=activity.to_primitive()
-        )
-        return dict_to_model(response.json()['data'], self.MODEL_CLASS)
+        return self._update_model(activity)
 
 
 class ActivityTypeResource(BaseResource):
@@ -303,6 +333,7 @@ class ActivityTypeResource(BaseResource):
     API_ACESSOR_NAME = 'activityType'
     LIST_REQ_PATH = '/activityTypes'
     DETAIL_REQ_PATH = '/activityTypes/{id}'
+    CACHE_TTL = 600
 
     def detail(self, resource_ids):
         response = self._detail(resource_ids)
@@ -313,18 +344,12 @@ class ActivityTypeResource(BaseResource):
         return dict_to_model(response.json()['data'], self.MODEL_CLASS)
 
     def list(self, **params):
-        return CollectionResponse(self._list(params=params), self.MODEL_CLASS)
+        return self._collection(self._list, params)
 
     def delete(self, activityType):
         response = self._delete(activityType.id)
         return response.json()
 
-    def bulk_delete(self, activityTypes):
-        activityTypes_ids = [activityType.id for activityType in activityTypes]
-
-        response = self._bulk_delete(activityTypes_ids)
-        return response.json()
-
 
 class PersonResource(BaseResource):
     MODEL_CLASS = Person
@@ -343,30 +368,36 @@ class PersonResource(BaseResource):
         return dict_to_model(response.json()['data'], self.MODEL_CLASS)
 
     def update(self, person):
-        response = self._update(
-            person.id,
-            data=person.to_primitive()
-        )
-        return dict_to_model(response.json()['data'], self.MODEL_CLASS)
+        return self._update_model(person)
 
     def find(self, term, **params):
-        return CollectionResponse(
-            self._find(term, params=params),
-            self.MODEL_CLASS
-        )
+        return self._collection(partial(self._find, term), params)
 
     def list(self, **params):
-        return CollectionResponse(self._list(params=params), self.MODEL_CLASS)
+        return self._collection(self._list, params)
 
     def delete(self, person):
         response = self._delete(person.id)
         return response.json()
 
-    def bulk_delete(self, persons):
-        person_ids = [person.id for person in persons]
 
-        response = self._bulk_delete(person_ids)
-        return response.json()
+class RecentsResource(BaseResource):
+    MODEL_CLASS = RecentItem
+    API_ACESSOR_NAME = 'recents'
+    LIST_REQ_PATH = '/recents'
+
+    def list(self, since_timestamp, items=None, **params):
+        """Lists what changed since a moment, oldest changes first.
+        Args:
+            since_timestamp(str): UTC time, as "YYYY-MM-DD HH:MM:SS".
+            items(str|list): The kinds of objects to list, e.g. 'deal' or
+                ['deal', 'person']. Defaults to all of them.
+        """
+        params['since_timestamp'] = since_timestamp
+        if items is not None:
+            params['items'] = items if isinstance(items, str) else \
+                ','.join(items)
+        return self._collection(self._list, params)
 
 
 # Registers the resources
@@ -381,5 +412,6 @@ for resource_class in [
     ActivityResource,
     ActivityTypeResource,
     PersonResource,
+    RecentsResource,
 ]:
     PipedriveAPI.register_resource(resource_class)
@@ -0,0 +1,101 @@
+# encoding:utf-8
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+__all__ = ['ParsedResponse', 'get_json_decoder']
+
+
+def get_json_decoder(decoder=None):
+    """Returns the function decoding the response bodies.
+    Args:
+        decoder(str|callable): 'json', 'orjson', 'ujson', or any callable
+            taking the body bytes. Defaults to orjson when it is installed,
+            the standard json module otherwise.
+    """
+    if callable(decoder):
+        return decoder
+    if decoder is None:
+        return orjson.loads if orjson is not None else json.loads
+    if decoder == 'json':
+        return json.loads
+    if decoder == 'orjson':
+        if orjson is None:
+            raise ImportError('The orjson decoder requires orjson')
+        return orjson.loads
+    if decoder == 'ujson':
+        if ujson is None:
+            raise ImportError('The ujson decoder requires ujson')
+        return ujson.loads
+    raise ValueError('Unknown json decoder %s' % decoder)
+
+
+class ParsedResponse(object):
+    """What send_request returns: an API response whose body was decoded,
+    once, right after it was received.
+
+    json() returns the decoded body, so the resources can use it like a
+    requests.Response. Anything else (ok, request, raise_for_status...) is
+    read from the underlying response. The decoded body is shared by
+    everything reusing the response (ResponseCache, SingleFlight), so it
+    must be treated as read-only.
+
+    Attributes:
+        response(requests.Response): The HTTP response.
+        payload(dict): The decoded body.
+    """
+    __slots__ = ('response', 'payload')
+
+    def __init__(self, response, payload):
+        self.response = response
+        self.payload = payload
+
+    @classmethod
+    def decode(cls, response, loads=json.loads):
+        """Raises ValueError when the body isn't json."""
+        return cls(response, loads(response.content))
+
+    def json(self, **kwargs):
+        return self.payload
+
+    @property
+    def success(self):
+        return self.payload.get('success', False)
+
+    @property
+    def data(self):
+        return self.payload.get('data')
+
+    @property
+    def additional_data(self):
+        return self.payload.get('additional_data') or {}
+
+    @property
+    def pagination(self):
+        return self.additional_data.get('pagination') or {}
+
+    @property
+    def status_code(self):
+        return self.response.status_code
+
+    @property
+    def headers(self):
+        return self.response.headers
+
+    def __getattr__(self, name):
+        if name in ParsedResponse.__slots__:
+            # Not set yet, e.g. while copying
+            raise AttributeError(name)
+        return getattr(self.response, name)
+
+    def __repr__(self):
+        return '<ParsedResponse [%s]>' % self.response.status_code
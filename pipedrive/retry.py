@@ -0,0 +1,172 @@
+# encoding:utf-8
+import asyncio
+import random
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from time import monotonic
+
+from requests import exceptions as http_errors
+
+
+__all__ = ['RetryPolicy', 'CircuitBreaker', 'CircuitOpenError']
+
+# Errors raised when the API couldn't be reached or didn't answer in time
+TRANSIENT_ERRORS = (
+    http_errors.ConnectionError, http_errors.Timeout,
+    ConnectionError, TimeoutError, asyncio.TimeoutError,
+)
+
+
+def status_code_of(err):
+    """The HTTP status code attached to an exception, if any."""
+    return getattr(getattr(err, 'response', None), 'status_code', None)
+
+
+def retry_after_of(err):
+    """The delay requested by the Retry-After header of the response attached
+    to an exception, in seconds, or None.
+    """
+    headers = getattr(getattr(err, 'response', None), 'headers', None) or {}
+    value = headers.get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RetryPolicy(object):
+    """Decides whether a failed request is retried and how long to wait.
+
+    Waits follow the "decorrelated jitter" scheme: each delay is picked at
+    random between `backoff_base` and `multiplier` times the previous delay,
+    capped at `max_backoff`. A Retry-After header sent by the API takes
+    precedence. No retry is scheduled beyond `max_retries` or past the total
+    `time_budget` (in seconds) of the request.
+
+    Only idempotent methods are retried on any transient error (connection
+    errors, timeouts, 429 and 5xx). Other methods (POST) are retried only
+    when the request surely wasn't processed: on 429 or connect timeouts.
+    """
+
+    IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+    RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+    UNPROCESSED_STATUSES = frozenset([429])
+
+    def __init__(self, max_retries=4, backoff_base=1.0, multiplier=3.0,
+                 max_backoff=30.0, time_budget=120.0):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.multiplier = multiplier
+        self.max_backoff = max_backoff
+        self.time_budget = time_budget
+
+    def is_retryable(self, method, err):
+        status_code = status_code_of(err)
+        if method.upper() not in self.IDEMPOTENT_METHODS:
+            return status_code in self.UNPROCESSED_STATUSES or \
+                isinstance(err, http_errors.ConnectTimeout)
+        if status_code is not None:
+            return status_code in self.RETRY_STATUSES
+        return isinstance(err, TRANSIENT_ERRORS)
+
+    def next_delay(self, method, err, attempt, elapsed, previous_delay=None):
+        """Returns how many seconds to wait before retrying, or None when the
+        request must not be retried.
+        Args:
+            method(str): The HTTP method of the request.
+            err(Exception): What made the last attempt fail.
+            attempt(int): How many retries were already made.
+            elapsed(float): Seconds spent on the request so far.
+            previous_delay(float): The delay before the last attempt.
+        """
+        if attempt >= self.max_retries or not self.is_retryable(method, err):
+            return None
+        delay = retry_after_of(err)
+        if delay is None:
+            upper = max(self.backoff_base,
+                        (previous_delay or self.backoff_base) * self.multiplier)
+            delay = min(self.max_backoff,
+                        random.uniform(self.backoff_base, upper))
+        if self.time_budget is not None and \
+                elapsed + delay > self.time_budget:
+            return None
+        return delay
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit is open."""
+
+    def __init__(self, retry_in):
+        super(CircuitOpenError, self).__init__(
+            'The Pipedrive API looks degraded, not sending requests for '
+            'another %.1fs' % retry_in
+        )
+        self.retry_in = retry_in
+
+
+class CircuitBreaker(object):
+    """Fails fast while the API is degraded.
+
+    After `failure_threshold` consecutive server-side failures (connection
+    errors, timeouts, 5xx) the circuit opens and every request raises
+    CircuitOpenError for `recovery_timeout` seconds. Then a single trial
+    request is let through (half-open): success closes the circuit, failure
+    opens it again.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30.0,
+                 clock=monotonic):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            retry_in = self.opened_at + self.recovery_timeout - self.clock()
+            if self.state == self.OPEN and retry_in <= 0:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            raise CircuitOpenError(max(retry_in, 0.0))
+
+    def record(self, err=None):
+        """Records the outcome of a request that went through
+        before_request. err is None for successes.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+            if err is None or not self.is_failure(err):
+                self.state = self.CLOSED
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == self.HALF_OPEN or \
+                    self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+    @staticmethod
+    def is_failure(err):
+        status_code = status_code_of(err)
+        if status_code is not None:
+            return status_code >= 500
+        return isinstance(err, TRANSIENT_ERRORS)
@@ -0,0 +1,101 @@
+# encoding:utf-8
+import threading
+from time import monotonic
+
+
+__all__ = ['SingleFlight']
+
+
+class _Call(object):
+    __slots__ = ('done', 'result', 'error', 'finished_at')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.finished_at = None
+
+
+class SingleFlight(object):
+    """Coalesces identical concurrent requests: while a GET is in flight,
+    other threads asking for the same method, path, params and headers wait
+    for it and get the same response (or exception) instead of sending their
+    own request.
+
+    With a `window`, a completed response keeps being handed out for that
+    many seconds after it arrived. Failures are never reused.
+
+        api = PipedriveAPI('token', single_flight=SingleFlight(window=0.5))
+
+    Args:
+        window(float): Seconds a response is shared after completion.
+    """
+
+    METHODS = frozenset(['GET', 'HEAD'])
+    # How many finished calls are kept before expired ones are swept
+    SWEEP_THRESHOLD = 256
+
+    def __init__(self, window=0.0, clock=monotonic):
+        self.window = window
+        self.clock = clock
+        self.shared = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def applies_to(self, method):
+        return method.upper() in self.METHODS
+
+    @staticmethod
+    def key(method, path, params=None, headers=None):
+        return (
+            method.upper(), path,
+            tuple(sorted((name, str(value))
+                         for name, value in (params or {}).items()
+                         if name != 'api_token')),
+            tuple(sorted((headers or {}).items())),
+        )
+
+    def do(self, key, func):
+        """Returns func(), or the outcome of the identical call in flight (or
+        finished within the window)."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call.finished_at is not None and \
+                    not self._reusable(call):
+                call = None
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                if len(self._calls) > self.SWEEP_THRESHOLD:
+                    self._sweep()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                call.finished_at = self.clock()
+                if not self._reusable(call) and self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def _reusable(self, call):
+        return call.error is None and \
+            self.clock() - call.finished_at < self.window
+
+    def _sweep(self):
+        for key in [key for key, call in self._calls.items()
+                    if call.finished_at is not None and
+                    not self._reusable(call)]:
+            del self._calls[key]
@@ -0,0 +1,225 @@
+# encoding:utf-8
+import codecs
+import json
+import re
+
+from .base import (
+    LazyModel, PipedriveException, dict_to_model, record_factory
+)
+
+
+__all__ = ['StreamedCollection', 'iter_json_items']
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class _JsonBuffer(object):
+    """The part of a json document received and not parsed yet."""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decode = codecs.getincrementaldecoder('utf-8')().decode
+        self.decoder = json.JSONDecoder()
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Reads the next chunk, dropping the text already parsed. Returns
+        False at the end of the document."""
+        if self.eof:
+            return False
+        text = ''
+        for chunk in self.chunks:
+            text = self.decode(chunk)
+            if text:
+                break
+        else:
+            text = self.decode(b'', True)
+            self.eof = True
+        self.text = self.text[self.pos:] + text
+        self.pos = 0
+        return bool(text)
+
+    def peek(self):
+        """Skips whitespace and returns the next character, '' at the end."""
+        while True:
+            self.pos = WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, characters):
+        character = self.peek()
+        if not character or character not in characters:
+            raise ValueError('Expected one of %r at %r' % (
+                characters, self.text[self.pos:self.pos + 20]
+            ))
+        self.pos += 1
+        return character
+
+    def value(self):
+        """Parses the next json value, reading as many chunks as it takes."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.text, self.pos)
+            except ValueError:
+                if self.fill():
+                    continue
+                raise
+            # A value ending the buffer may be cut short, e.g. a number
+            if end == len(self.text) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_items(chunks, envelope, key='data'):
+    """Parses a json object out of an iterable of bytes, yielding the items
+    of its `key` array one by one as soon as they are read. The other members
+    of the object are set on `envelope` as they come.
+
+    Only the item being parsed and one chunk are held in memory.
+    Args:
+        chunks(iterable): The body, e.g. response.iter_content().
+        envelope(dict): Gets the members of the object other than `key`.
+        key(str): The name of the array whose items are yielded.
+    """
+    buffer = _JsonBuffer(chunks)
+    buffer.expect('{')
+    if buffer.peek() == '}':
+        return
+    while True:
+        name = buffer.value()
+        if not isinstance(name, str):
+            raise ValueError('Expected an object key, got %r' % (name,))
+        buffer.expect(':')
+        if name == key and buffer.peek() == '[':
+            buffer.pos += 1
+            if buffer.peek() == ']':
+                buffer.pos += 1
+            else:
+                while True:
+                    yield buffer.value()
+                    if buffer.expect(',]') == ']':
+                        break
+        else:
+            envelope[name] = buffer.value()
+        if buffer.expect(',}') == '}':
+            return
+
+
+def iter_body(response, chunk_size=CHUNK_SIZE):
+    """The body of a response in chunks, read from the socket unless it was
+    already read (e.g. by an in-memory transport)."""
+    content = response._content
+    if content is False:
+        return response.iter_content(chunk_size)
+    content = content or b''
+    return (content[start:start + chunk_size]
+            for start in range(0, len(content), chunk_size))
+
+
+class StreamedCollection(object):
+    """A page of a listing whose items are parsed and converted one at a
+    time while the response body is read, e.g. list(stream=True). At most one
+    item is alive at a time instead of the whole page (bytes, dicts and
+    models).
+
+    The items can be iterated once. The pagination comes at the end of the
+    body: reading it (next_start, more_items_in_collection...) skips over
+    the items not iterated yet. The connection is released once the body is
+    read, or by close().
+    Args:
+        response(requests.Response): A response sent with stream=True.
+        model_class(Model): The class of the items.
+        lazy, raw, record_type: How the items are built, as in
+            CollectionResponse.
+    """
+
+    def __init__(self, response, model_class, lazy=False, raw=False,
+                 record_type=None, chunk_size=CHUNK_SIZE):
+        self.response = response
+        self.envelope = {}
+        if raw:
+            self._convert = None
+        elif record_type is not None:
+            self._convert = record_factory(model_class, record_type)
+        elif lazy:
+            self._convert = lambda item: LazyModel(item, model_class)
+        else:
+            self._convert = lambda item: dict_to_model(item, model_class)
+        self._items = iter_json_items(iter_body(response, chunk_size),
+                                      self.envelope)
+        self._done = False
+
+    def __iter__(self):
+        convert = self._convert
+        for item in self._parsed():
+            yield item if convert is None else convert(item)
+
+    def _parsed(self):
+        try:
+            for item in self._items:
+                yield item
+        except ValueError as err:
+            self.close()
+            raise PipedriveException('Invalid JSON in the response: %s' % err,
+                                     {}, self.response)
+        self._finish()
+
+    def _finish(self):
+        if self._done:
+            return
+        self.close()
+        if not self.envelope.get('success', False):
+            raise PipedriveException(self.envelope.get('error', ''), {},
+                                     self.response)
+
+    def close(self):
+        self._done = True
+        if self.response.raw is not None:
+            # Read from the socket, release the connection
+            self.response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _drain(self):
+        """Parses the rest of the body, skipping the items."""
+        if not self._done:
+            for _ in self._parsed():
+                pass
+
+    @property
+    def pagination(self):
+        self._drain()
+        additional_data = self.envelope.get('additional_data') or {}
+        return additional_data.get('pagination') or {}
+
+    @property
+    def success(self):
+        self._drain()
+        return self.envelope.get('success', False)
+
+    @property
+    def start(self):
+        return self.pagination.get('start', 0)
+
+    @property
+    def limit(self):
+        return self.pagination.get('limit', 100)
+
+    @property
+    def next_start(self):
+        return self.pagination.get('next_start', 0)
+
+    @property
+    def more_items_in_collection(self):
+        return self.pagination.get('more_items_in_collection', False)
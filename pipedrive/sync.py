@@ -0,0 +1,219 @@
+# encoding:utf-8
+import sqlite3
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from .base import dict_to_model
+
+
+__all__ = ['SyncEngine', 'SyncCheckpointStore', 'Change']
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+UPSERT = 'upsert'
+DELETE = 'delete'
+
+# A change to apply downstream. model is the resource's model (or the raw
+# dict when the engine runs with raw=True)
+Change = namedtuple('Change', ['action', 'resource', 'id', 'model'])
+
+# since: lower bound of the pass in progress, None for the initial full pass.
+# started: when that pass began, the lower bound of the next one.
+# start: offset of the next page to fetch in the pass.
+# last_id: the last id yielded by the initial full pass.
+Checkpoint = namedtuple('Checkpoint', ['since', 'started', 'start',
+                                       'last_id'])
+
+
+def utcnow():
+    return datetime.utcnow()
+
+
+def is_deleted(data):
+    """Whether the json of an object of the recents listing describes a
+    deleted object."""
+    if not data:
+        return True
+    return bool(data.get('deleted')) or data.get('active_flag') is False or \
+        data.get('status') == 'deleted'
+
+
+class SyncCheckpointStore(object):
+    """Keeps the checkpoint of each synced resource in a SQLite database, so
+    that a sync resumes where it stopped, even after a crash.
+    Args:
+        path(str): The database file. Defaults to an in-memory database,
+            which only lasts as long as the store.
+    """
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS sync_checkpoints ('
+                'resource TEXT PRIMARY KEY, since TEXT, started TEXT, '
+                'start INTEGER NOT NULL DEFAULT 0, last_id INTEGER)'
+            )
+            columns = [row[1] for row in self._connection.execute(
+                'PRAGMA table_info(sync_checkpoints)'
+            )]
+            if 'last_id' not in columns:
+                # A store created before the column existed
+                self._connection.execute(
+                    'ALTER TABLE sync_checkpoints ADD COLUMN last_id INTEGER'
+                )
+
+    def get(self, resource):
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT since, started, start, last_id FROM sync_checkpoints '
+                'WHERE resource = ?', (resource,)
+            ).fetchone()
+        return Checkpoint(*row) if row else Checkpoint(None, None, 0, None)
+
+    def save(self, resource, checkpoint):
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO sync_checkpoints '
+                '(resource, since, started, start, last_id) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (resource,) + tuple(checkpoint)
+            )
+
+    def reset(self, resource=None):
+        """Forgets the checkpoint of a resource (or of all of them), so that
+        the next sync pulls everything again."""
+        with self._lock, self._connection:
+            if resource is None:
+                self._connection.execute('DELETE FROM sync_checkpoints')
+            else:
+                self._connection.execute(
+                    'DELETE FROM sync_checkpoints WHERE resource = ?',
+                    (resource,)
+                )
+
+    def close(self):
+        self._connection.close()
+
+
+class SyncEngine(object):
+    """Pulls only what changed since the last sync.
+
+    The first sync of a resource walks its whole listing. The following ones
+    walk the recents listing from the moment the previous sync started, and
+    yield the objects created, updated or deleted since then:
+
+        engine = SyncEngine(api, SyncCheckpointStore('sync.db'))
+        for change in engine.changes():
+            if change.action == 'delete':
+                warehouse.delete(change.resource, change.id)
+            else:
+                warehouse.upsert(change.resource, change.model)
+
+    The first sync pages through the listing by id, which edits don't change.
+    Each page is requested from the last object already yielded: if that
+    object isn't the first row any more, objects were deleted before it and
+    the rows shifted, so the engine steps back until it finds it again. No
+    object is skipped, whatever changes while the pass runs.
+
+    The checkpoint is saved after the changes of each page were consumed, so
+    an interrupted sync replays at most one page. Delivery is at least once:
+    objects changed while a sync runs show up again in the next one, so
+    changes must be applied idempotently.
+    Args:
+        api(PipedriveAPI): The api to sync from.
+        store(SyncCheckpointStore): Where the checkpoints are kept.
+        resources(iterable): API_ACESSOR_NAMEs of the synced resources.
+        page_size(int): The number of objects per request.
+        raw(bool): Yield the json dicts instead of models.
+        overlap(int): Seconds the next sync starts before the current one
+            did, to absorb clock skew with the API.
+    """
+    RESOURCES = ('deal', 'person', 'organization')
+
+    def __init__(self, api, store, resources=None, page_size=500, raw=False,
+                 overlap=60, now=utcnow):
+        self.api = api
+        self.store = store
+        self.resources = tuple(resources or self.RESOURCES)
+        self.page_size = page_size
+        self.raw = raw
+        self.overlap = overlap
+        self.now = now
+
+    def changes(self, resources=None):
+        """Yields a Change for each object changed since the last sync of the
+        given resources (all of the engine's ones by default)."""
+        for name in resources or self.resources:
+            for change in self.changes_of(name):
+                yield change
+
+    def changes_of(self, name):
+        resource = getattr(self.api, name)
+        checkpoint = self.store.get(name)
+        if checkpoint.started is None:
+            started = self.now() - timedelta(seconds=self.overlap)
+            checkpoint = checkpoint._replace(
+                started=started.strftime(TIMESTAMP_FORMAT)
+            )
+            self.store.save(name, checkpoint)
+
+        if checkpoint.since is None:
+            changes = self._full_pass(name, resource, checkpoint)
+        else:
+            changes = self._recent_changes(name, resource, checkpoint)
+        for change in changes:
+            yield change
+
+    def _full_pass(self, name, resource, checkpoint):
+        start, last_id = checkpoint.start, checkpoint.last_id
+        while True:
+            # From the last object yielded, to check the rows didn't shift
+            fetch_start = start - 1 if last_id is not None and start else \
+                start
+            page = resource.list(start=fetch_start, limit=self.page_size,
+                                 raw=True, sort='id ASC')
+            items = page.items
+            if fetch_start < start and \
+                    (not items or items[0].get('id') > last_id):
+                # Objects before it were deleted: step back
+                start = max(fetch_start - self.page_size + 1, 0)
+                continue
+            for item in items:
+                if last_id is not None and item.get('id') <= last_id:
+                    continue
+                yield self._change(resource, UPSERT, item.get('id'), item)
+                last_id = item.get('id')
+            if page.more_items_in_collection:
+                start = page.next_start
+                self.store.save(name, checkpoint._replace(start=start,
+                                                          last_id=last_id))
+            else:
+                self.store.save(name, Checkpoint(checkpoint.started, None, 0,
+                                                 None))
+                return
+
+    def _recent_changes(self, name, resource, checkpoint):
+        pages = self.api.recents.iter_pages(
+            checkpoint.since, items=name, start=checkpoint.start,
+            page_size=self.page_size, raw=True
+        )
+        for page in pages:
+            for item in page.items:
+                data = item.get('data')
+                action = DELETE if is_deleted(data) else UPSERT
+                yield self._change(resource, action, item.get('id'), data)
+            if page.more_items_in_collection:
+                checkpoint = checkpoint._replace(start=page.next_start)
+            else:
+                checkpoint = Checkpoint(checkpoint.started, None, 0, None)
+            self.store.save(name, checkpoint)
+
+    def _change(self, resource, action, resource_id, data):
+        model = data
+        if data and not self.raw:
+            model = dict_to_model(data, resource.MODEL_CLASS)
+        return Change(action, resource.API_ACESSOR_NAME, resource_id, model)
@@ -0,0 +1,238 @@
+# encoding:utf-8
+import calendar
+import datetime
+from collections import OrderedDict
+
+from .base import dict_to_model
+from .batch import DEFAULT_CONCURRENCY, run_batch
+from .models import TimelinePeriod, TimelineTotals
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+__all__ = ['Timeline', 'fetch_timeline']
+
+INTERVALS = ('day', 'week', 'month', 'quarter')
+
+# How many intervals each request covers by default
+CHUNK_SIZES = {'day': 31, 'week': 8, 'month': 3, 'quarter': 1}
+
+DATE_FORMAT = '%Y-%m-%d'
+
+
+def to_date(value):
+    """A date out of a date, a datetime or a "YYYY-MM-DD" string."""
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.datetime.strptime(str(value)[:10], DATE_FORMAT).date()
+
+
+def add_intervals(start, interval, count):
+    """The date `count` intervals after start. Months and quarters keep the
+    day of the month when it exists (Jan 31 + 1 month is Feb 28 or 29)."""
+    if interval == 'day':
+        return start + datetime.timedelta(days=count)
+    if interval == 'week':
+        return start + datetime.timedelta(weeks=count)
+    months = count * (3 if interval == 'quarter' else 1)
+    year, month = divmod(start.month - 1 + months, 12)
+    year += start.year
+    day = min(start.day, calendar.monthrange(year, month + 1)[1])
+    return datetime.date(year, month + 1, day)
+
+
+def timeline_chunks(start_date, interval, amount, chunk_size):
+    """Splits amount intervals from start_date into (start date, amount)
+    chunks of at most chunk_size intervals."""
+    start = to_date(start_date)
+    return [(add_intervals(start, interval, offset),
+             min(chunk_size, amount - offset))
+            for offset in range(0, amount, chunk_size)]
+
+
+def _id(value):
+    if isinstance(value, dict):
+        return value.get('id', value.get('value'))
+    return value
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class Timeline(object):
+    """The periods of a deals timeline, as returned by fetch_timeline (see
+    DealResource.timeline_periods).
+
+    The json of the periods is kept as is: the periods are only converted to
+    TimelinePeriod models (with their deals) when `periods` is read, while
+    totals() and aggregate() work straight on the json.
+    Attributes:
+        data(list): The json of the periods, in chronological order.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self._periods = None
+
+    @property
+    def periods(self):
+        if self._periods is None:
+            self._periods = [dict_to_model(period, TimelinePeriod)
+                             for period in self.data]
+        return self._periods
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        return iter(self.periods)
+
+    def __getitem__(self, index):
+        return self.periods[index]
+
+    def totals(self):
+        """The totals of the periods added up: counts are summed, values
+        summed by currency.
+        Returns:
+            TimelineTotals
+        """
+        merged = {}
+        for period in self.data:
+            for key, value in (period.get('totals') or {}).items():
+                if isinstance(value, dict):
+                    sums = merged.setdefault(key, {})
+                    for currency, amount in value.items():
+                        sums[currency] = sums.get(currency, 0) + \
+                            _number(amount)
+                elif isinstance(value, (int, float)):
+                    merged[key] = merged.get(key, 0) + value
+        return dict_to_model(merged, TimelineTotals)
+
+    def aggregate(self, by=('currency',), field='value', output='lists'):
+        """Sums and counts the deals of each period by group, reading only
+        the needed keys of their json (no Deal model is built), e.g.:
+            timeline.aggregate(by=('currency', 'stage_id'))
+        Args:
+            by(tuple): The deal keys to group by. Nested objects (stage_id,
+                user_id...) are grouped by id.
+            field(str): The deal key holding the amount to sum.
+            output(str): 'lists' for plain lists, 'numpy' for numpy arrays
+                (the sums are then computed with numpy.bincount).
+        Returns:
+            OrderedDict: Columns period_start, the `by` keys, count and sum,
+                one row per period and group found in it.
+        """
+        if output not in ('lists', 'numpy'):
+            raise ValueError('output must be lists or numpy')
+        if output == 'numpy' and numpy is None:
+            raise ImportError('The numpy output requires numpy')
+        by = tuple(by)
+        groups = OrderedDict()
+        period_index, group_index, amounts = [], [], []
+        for index, period in enumerate(self.data):
+            for deal in period.get('deals') or []:
+                key = tuple(_id(deal.get(name)) for name in by)
+                period_index.append(index)
+                group_index.append(groups.setdefault(key, len(groups)))
+                amounts.append(_number(deal.get(field)))
+
+        cells = len(self.data) * len(groups)
+        if numpy is not None and cells:
+            flat = numpy.asarray(period_index, dtype=numpy.int64) * \
+                len(groups) + numpy.asarray(group_index, dtype=numpy.int64)
+            counts = numpy.bincount(flat, minlength=cells)
+            sums = numpy.bincount(flat, weights=numpy.asarray(amounts),
+                                  minlength=cells)
+            cells = numpy.nonzero(counts)[0].tolist()
+            counts = counts.tolist()
+            sums = sums.tolist()
+        else:
+            counts, sums = {}, {}
+            for index, group, amount in zip(period_index, group_index,
+                                            amounts):
+                cell = index * len(groups) + group
+                counts[cell] = counts.get(cell, 0) + 1
+                sums[cell] = sums.get(cell, 0.0) + amount
+            cells = sorted(counts)
+
+        keys = list(groups)
+        columns = OrderedDict([('period_start', [])])
+        columns.update((name, []) for name in by)
+        columns['count'] = []
+        columns['sum'] = []
+        for cell in cells:
+            index, group = divmod(cell, len(groups))
+            columns['period_start'].append(self.data[index].get('period_start'))
+            for name, value in zip(by, keys[group]):
+                columns[name].append(value)
+            columns['count'].append(counts[cell])
+            columns['sum'].append(sums[cell])
+        if output == 'numpy':
+            columns = OrderedDict(
+                (name, numpy.asarray(values, dtype=object)
+                 if name in by or name == 'period_start'
+                 else numpy.asarray(values))
+                for name, values in columns.items()
+            )
+        return columns
+
+
+def fetch_timeline(resource, start_date, interval, amount, field_key,
+                   chunk_size=None, concurrency=DEFAULT_CONCURRENCY,
+                   **kwargs):
+    """Fetches a deals timeline in chunks of intervals, concurrently, and
+    merges them into a Timeline.
+    Args:
+        resource(DealResource): Sends the requests, through its timeline().
+        start_date(date|str): The start of the first period.
+        interval(str): 'day', 'week', 'month' or 'quarter'.
+        amount(int): How many intervals the timeline covers.
+        field_key(str): The date field placing the deals in the periods.
+        chunk_size(int): How many intervals each request covers, defaults to
+            CHUNK_SIZES[interval].
+        concurrency(int): The maximum number of requests in flight.
+        **kwargs: The other arguments of DealResource.timeline (params,
+            user_id, pipeline_id, filter_id, details, currency).
+    Returns:
+        Timeline
+    """
+    chunks = plan_timeline(start_date, interval, amount, chunk_size)
+    params = kwargs.pop('params', None) or {}
+
+    def fetch(chunk):
+        chunk_start, chunk_amount = chunk
+        response = resource.timeline(chunk_start, interval, chunk_amount,
+                                     field_key, params=dict(params), **kwargs)
+        return response.get('data') or []
+
+    return merge_timeline(run_batch(fetch, chunks, concurrency))
+
+
+def plan_timeline(start_date, interval, amount, chunk_size=None):
+    """Checks the interval and splits the timeline into (start date, amount)
+    chunks, see fetch_timeline."""
+    if interval not in INTERVALS:
+        raise ValueError('interval must be day, week, month or quarter')
+    chunk_size = chunk_size or CHUNK_SIZES[interval]
+    return timeline_chunks(start_date, interval, amount, chunk_size)
+
+
+def merge_timeline(batch):
+    """Merges the periods of the chunks fetched by a batch into a Timeline,
+    raising the first error of the batch."""
+    batch.raise_for_errors()
+    periods = OrderedDict()
+    for chunk_periods in batch:
+        for period in chunk_periods:
+            # Chunks starting mid-period may repeat a period
+            periods.setdefault(period.get('period_start'), period)
+    return Timeline(list(periods.values()))
@@ -0,0 +1,504 @@
+# encoding:utf-8
+import json
+import re
+import socket
+import threading
+import weakref
+from collections import OrderedDict
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import requests
+from http.cookiejar import DefaultCookiePolicy
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.packages.urllib3.connection import HTTPConnection
+
+
+__all__ = [
+    'Transport', 'RequestsTransport', 'FakeBackend', 'CassetteTransport',
+    'CassetteError',
+]
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Request params that never filter a listing
+LISTING_PARAMS = frozenset(['api_token', 'start', 'limit', 'sort', 'term',
+                            'search_by_email'])
+
+
+def build_response(status_code, content, headers, url):
+    """Wraps raw response parts in a requests.Response, so the resources (and
+    CollectionResponse) can handle them exactly like the ones coming from the
+    network.
+    """
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content
+    response.headers = CaseInsensitiveDict(headers)
+    response.url = url
+    response.encoding = 'utf-8'
+    return response
+
+
+def json_response(status_code, payload, url):
+    return build_response(status_code, json.dumps(payload).encode('utf-8'),
+                          {'Content-Type': 'application/json'}, url)
+
+
+def api_path(url):
+    """The API path of a url, e.g. /deals/1 for .../v1/deals/1."""
+    path = urlsplit(url).path
+    return path[3:] if path.startswith('/v1/') else path
+
+
+class Transport(object):
+    """Performs the HTTP requests of a PipedriveAPI.
+
+    A transport has the interface of requests.Session.request, which is what
+    PipedriveAPI uses when it isn't given one. Replace it to serve the
+    requests from memory (FakeBackend), from recorded cassettes
+    (CassetteTransport) or through a different HTTP client. With stream=True
+    the body may be left unread, to be parsed as it arrives (the in-memory
+    transports ignore it).
+    """
+
+    def request(self, method, url, params=None, data=None, headers=None,
+                stream=False):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections use the given socket options, e.g. TCP
+    keep-alive probes."""
+
+    def __init__(self, socket_options=None, **kwargs):
+        self.socket_options = socket_options
+        super(KeepAliveAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.socket_options is not None:
+            kwargs['socket_options'] = self.socket_options
+        super(KeepAliveAdapter, self).init_poolmanager(*args, **kwargs)
+
+
+def keep_alive_options(idle, interval=None, count=None):
+    """Socket options sending TCP keep-alive probes after `idle` seconds of
+    silence, so that pooled connections dropped by a proxy or NAT are
+    noticed. The per-probe tuning is only set where the OS supports it."""
+    options = list(HTTPConnection.default_socket_options)
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    for name, value in (('TCP_KEEPIDLE', idle),
+                        ('TCP_KEEPINTVL', interval or idle),
+                        ('TCP_KEEPCNT', count or 3)):
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return options
+
+
+class RequestsTransport(Transport):
+    """Sends the requests with requests sessions tuned for many threads
+    sharing one PipedriveAPI:
+
+        api = PipedriveAPI('token', transport=RequestsTransport(
+            pool_maxsize=64, timeout=(5, 60), tcp_keepalive=60
+        ))
+
+    Sessions keep no cookies, so sending a request changes no shared state.
+    Args:
+        pool_connections(int): How many hosts a session keeps a pool for.
+        pool_maxsize(int): The connections kept open per host. Give it the
+            number of threads sending requests, otherwise connections get
+            opened and thrown away (or waited for, with pool_block).
+        pool_block(bool): Whether threads wait for a pooled connection
+            instead of opening extra ones.
+        timeout(float|tuple): Seconds to connect and to wait for data, as
+            accepted by requests. None waits forever.
+        keep_alive(bool): Whether connections are reused between requests.
+        tcp_keepalive(int): Seconds of silence before TCP keep-alive probes
+            are sent on pooled connections, None for the OS default.
+        compress(bool): Whether gzip/deflate compressed responses are asked
+            for (requests decompresses them).
+        per_thread(bool): Whether each thread gets its own session (and
+            pools) instead of sharing one.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, pool_block=False,
+                 timeout=None, keep_alive=True, tcp_keepalive=None,
+                 compress=True, per_thread=False):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.tcp_keepalive = tcp_keepalive
+        self.compress = compress
+        self.per_thread = per_thread
+        # Sessions of the threads that are gone are closed when collected
+        self.sessions = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shared = None if per_thread else self.new_session()
+
+    def new_session(self):
+        session = requests.Session()
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        socket_options = None
+        if self.tcp_keepalive is not None:
+            socket_options = keep_alive_options(self.tcp_keepalive)
+        adapter = KeepAliveAdapter(
+            socket_options=socket_options,
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize, pool_block=self.pool_block
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['Accept-Encoding'] = \
+            'gzip, deflate' if self.compress else 'identity'
+        session.headers['Connection'] = \
+            'keep-alive' if self.keep_alive else 'close'
+        with self._lock:
+            self.sessions.add(session)
+        return session
+
+    @property
+    def session(self):
+        """The session of the calling thread."""
+        if self._shared is not None:
+            return self._shared
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self.new_session()
+        return session
+
+    def request(self, method, url, params=None, data=None, headers=None,
+                stream=False):
+        return self.session.request(method, url, params=params, data=data,
+                                    headers=headers, timeout=self.timeout,
+                                    stream=stream)
+
+    def close(self):
+        with self._lock:
+            sessions = list(self.sessions)
+        for session in sessions:
+            session.close()
+
+
+def _related_id(value):
+    if isinstance(value, dict):
+        return value.get('value', value.get('id'))
+    return value
+
+
+class FakeBackend(Transport):
+    """An in-memory Pipedrive account, answering the requests of the
+    registered resources the way the API does: creation, detail, update,
+    deletion, bulk deletion, paginated listings (with equality filters and
+    sorting), find and recents.
+
+        backend = FakeBackend({'deal': [{'id': 1, 'title': 'Seeded'}]})
+        api = PipedriveAPI('token', transport=backend)
+        api.deal.create(Deal({'title': 'New'}))
+        api.deal.list()
+
+    PipedriveAPI uses a FakeBackend when it isn't given an api token.
+    Args:
+        data(dict): Initial objects, lists of dicts by API_ACESSOR_NAME.
+        clock(callable): Returns the current UTC datetime.
+    """
+
+    def __init__(self, data=None, clock=datetime.utcnow):
+        self.clock = clock
+        self.requests = 0
+        self._objects = {}
+        self._changes = []
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._routes = None
+        for accessor, items in (data or {}).items():
+            self.seed(accessor, items)
+
+    def seed(self, accessor, items):
+        """Adds objects of a resource, e.g. seed('deal', [{...}, ...])."""
+        store = self._store(self._resource(accessor).LIST_REQ_PATH)
+        with self._lock:
+            for item in items:
+                item = dict(item)
+                if item.get('id') is None:
+                    item['id'] = self._new_id()
+                self._next_id = max(self._next_id, item['id'] + 1)
+                store[item['id']] = item
+
+    def items(self, accessor):
+        """The objects currently held for a resource."""
+        return list(self._store(self._resource(accessor).LIST_REQ_PATH)
+                    .values())
+
+    def request(self, method, url, params=None, data=None, headers=None,
+                stream=False):
+        with self._lock:
+            self.requests += 1
+            status_code, payload = self._handle(
+                method.upper(), api_path(url), dict(params or {}), data
+            )
+        return json_response(status_code, payload, url)
+
+    def _resource(self, accessor):
+        from .base import PipedriveAPI
+        try:
+            return PipedriveAPI.resource_registry[accessor]
+        except KeyError:
+            raise ValueError('No resource is registered as %s' % accessor)
+
+    def _store(self, list_path):
+        return self._objects.setdefault(list_path, OrderedDict())
+
+    def _new_id(self):
+        new_id = self._next_id
+        self._next_id += 1
+        return new_id
+
+    def _now(self):
+        return self.clock().strftime(TIMESTAMP_FORMAT)
+
+    def _route(self, path):
+        """Returns (resource class, kind, id) for a path, kind being 'list',
+        'detail' or 'find'."""
+        if self._routes is None:
+            from .base import PipedriveAPI
+            routes = []
+            for resource in PipedriveAPI.resource_registry.values():
+                if resource.LIST_REQ_PATH:
+                    routes.append((re.compile(
+                        '^%s$' % re.escape(resource.LIST_REQ_PATH)
+                    ), resource, 'list'))
+                if resource.FIND_REQ_PATH:
+                    routes.append((re.compile(
+                        '^%s$' % re.escape(resource.FIND_REQ_PATH)
+                    ), resource, 'find'))
+                if resource.DETAIL_REQ_PATH:
+                    routes.append((re.compile('^%s$' % re.escape(
+                        resource.DETAIL_REQ_PATH
+                    ).replace(r'\{id\}', r'(\d+)')), resource, 'detail'))
+            # Find paths (/deals/find) before the detail ones
+            self._routes = sorted(routes, key=lambda route: route[2] != 'find')
+        for pattern, resource, kind in self._routes:
+            match = pattern.match(path)
+            if match:
+                resource_id = int(match.group(1)) if match.groups() else None
+                return resource, kind, resource_id
+        return None, None, None
+
+    def _handle(self, method, path, params, data):
+        if path == '/recents':
+            return self._recents(params)
+        resource, kind, resource_id = self._route(path)
+        if resource is None:
+            return 404, {'success': False, 'error': 'Unknown path %s' % path}
+        store = self._store(resource.LIST_REQ_PATH)
+        accessor = resource.API_ACESSOR_NAME
+
+        if kind == 'detail':
+            item = store.get(resource_id)
+            if item is None:
+                return 404, {'success': False, 'error': 'Not found'}
+            if method == 'GET':
+                return 200, {'success': True, 'data': item}
+            if method == 'PUT':
+                item.update(data or {})
+                item['id'] = resource_id
+                item['update_time'] = self._now()
+                self._changed(accessor, item)
+                return 200, {'success': True, 'data': item}
+            if method == 'DELETE':
+                del store[resource_id]
+                self._changed(accessor, dict(item, deleted=True))
+                return 200, {'success': True, 'data': {'id': resource_id}}
+        elif kind == 'list':
+            if method == 'GET':
+                return self._listing(list(store.values()), params)
+            if method == 'POST':
+                item = dict(data or {})
+                item['id'] = self._new_id()
+                item['add_time'] = item['update_time'] = self._now()
+                store[item['id']] = item
+                self._changed(accessor, item)
+                return 201, {'success': True, 'data': item}
+            if method == 'DELETE':
+                ids = [int(resource_id) for resource_id in
+                       str((data or {}).get('ids', '')).split(',')
+                       if resource_id.strip()]
+                for resource_id in ids:
+                    item = store.pop(resource_id, None)
+                    if item is not None:
+                        self._changed(accessor, dict(item, deleted=True))
+                return 200, {'success': True, 'data': {'id': ids}}
+        elif kind == 'find' and method == 'GET':
+            return self._listing(self._found(store.values(), params), params)
+        return 405, {'success': False, 'error': 'Method not allowed'}
+
+    def _changed(self, accessor, item):
+        self._changes.append((self._now(), accessor, dict(item)))
+
+    def _found(self, items, params):
+        term = str(params.get('term', '')).lower()
+        found = []
+        for item in items:
+            name = str(item.get('name') or item.get('title') or '').lower()
+            emails = [str(_related_id(email)).lower()
+                      for email in item.get('email') or []]
+            if term in name or (params.get('search_by_email') and
+                                term in emails):
+                found.append(item)
+        return found
+
+    def _listing(self, items, params):
+        for name, value in params.items():
+            if name in LISTING_PARAMS:
+                continue
+            items = [item for item in items if name not in item or
+                     str(_related_id(item[name])) == str(value)]
+        sort = params.get('sort')
+        if sort:
+            for clause in reversed(str(sort).split(',')):
+                parts = clause.split()
+                if not parts:
+                    continue
+                descending = len(parts) > 1 and parts[1].upper() == 'DESC'
+                items = sorted(items, key=lambda item: str(
+                    item.get(parts[0]) or ''
+                ), reverse=descending)
+        return 200, self._page(items, params)
+
+    def _recents(self, params):
+        since = str(params.get('since_timestamp', ''))
+        kinds = params.get('items')
+        kinds = set(str(kinds).split(',')) if kinds else None
+        latest = OrderedDict()
+        for timestamp, accessor, item in self._changes:
+            if timestamp < since or (kinds and accessor not in kinds):
+                continue
+            latest.pop((accessor, item['id']), None)
+            latest[(accessor, item['id'])] = {
+                'item': accessor, 'id': item['id'], 'data': item,
+            }
+        return 200, self._page(list(latest.values()), params)
+
+    @staticmethod
+    def _page(items, params):
+        start = int(params.get('start', 0) or 0)
+        limit = int(params.get('limit', 100) or 100)
+        more = start + limit < len(items)
+        return {
+            'success': True,
+            'data': items[start:start + limit],
+            'additional_data': {'pagination': {
+                'start': start,
+                'limit': limit,
+                'more_items_in_collection': more,
+                'next_start': start + limit if more else None,
+            }},
+        }
+
+
+class CassetteError(LookupError):
+    """Raised when a replayed request isn't in the cassette."""
+
+
+class CassetteTransport(Transport):
+    """Records the API interactions into a json file (a cassette) and plays
+    them back later, offline:
+
+        # Once, against the real API (or any other transport)
+        transport = CassetteTransport('deals.json', mode='record')
+        api = PipedriveAPI('token', transport=transport)
+        ...
+        transport.save()
+
+        # Then, in tests
+        api = PipedriveAPI('token', transport=CassetteTransport('deals.json'))
+
+    Requests are matched on method, path, params and data (the api token is
+    never recorded). Identical requests are played back in recording order.
+    Args:
+        path(str): The cassette file.
+        mode(str): 'record' or 'replay'.
+        transport(Transport): Where recorded requests are sent, defaults to a
+            requests.Session.
+    """
+
+    def __init__(self, path, mode='replay', transport=None):
+        if mode not in ('record', 'replay'):
+            raise ValueError('mode must be record or replay')
+        self.path = path
+        self.mode = mode
+        self.transport = transport
+        self.interactions = []
+        self._played = set()
+        self._lock = threading.Lock()
+        if mode == 'replay':
+            with open(path) as cassette:
+                self.interactions = json.load(cassette)['interactions']
+        elif transport is None:
+            self.transport = requests.Session()
+
+    @staticmethod
+    def request_key(method, url, params=None, data=None):
+        params = dict((name, str(value))
+                      for name, value in (params or {}).items()
+                      if name != 'api_token')
+        if isinstance(data, dict):
+            data = dict((name, None if value is None else str(value))
+                        for name, value in data.items())
+        return OrderedDict([
+            ('method', method.upper()),
+            ('path', api_path(url)),
+            ('params', params),
+            ('data', data),
+        ])
+
+    def request(self, method, url, params=None, data=None, headers=None,
+                stream=False):
+        key = self.request_key(method, url, params, data)
+        if self.mode == 'replay':
+            return self._replay(key, url)
+        response = self.transport.request(method, url, params=params,
+                                          data=data, headers=headers)
+        with self._lock:
+            self.interactions.append(OrderedDict([
+                ('request', key),
+                ('response', OrderedDict([
+                    ('status_code', response.status_code),
+                    ('headers', dict(response.headers)),
+                    ('body', response.content.decode('utf-8')),
+                ])),
+            ]))
+        return response
+
+    def _replay(self, key, url):
+        with self._lock:
+            for index, interaction in enumerate(self.interactions):
+                if index not in self._played and \
+                        interaction['request'] == key:
+                    self._played.add(index)
+                    recorded = interaction['response']
+                    return build_response(
+                        recorded['status_code'],
+                        recorded['body'].encode('utf-8'),
+                        recorded['headers'], url
+                    )
+        raise CassetteError('%s %s is not in %s' % (key['method'],
+                                                     key['path'], self.path))
+
+    def save(self):
+        with self._lock:
+            with open(self.path, 'w') as cassette:
+                json.dump({'interactions': self.interactions}, cassette,
+                          indent=2)
+
+    def close(self):
+        if self.mode == 'record':
+            self.save()
@@ -1,6 +1,6 @@
 # encoding:utf-8
 import datetime
-from schematics.types import DateType, BaseType, StringType
+from schematics.types import DateType, BaseType, StringType, IntType
 from schematics.exceptions import ConversionError
 from pipedrive import dict_to_model
 import json
@@ -8,6 +8,8 @@ import json
 
 class PipedriveDate(DateType):
     def to_native(self, value, context=None):
+        if isinstance(value, datetime.date):
+            return value
         try:
             return datetime.datetime.strptime(value, "%Y-%m-%d")
         except ValueError:
@@ -16,6 +18,8 @@ class PipedriveDate(DateType):
 
 class PipedriveTime(DateType):
     def to_native(self, value, context=None):
+        if isinstance(value, int):
+            return value
         if value.find(':') < 0:
             return 0
 
@@ -29,9 +33,60 @@ class PipedriveTime(DateType):
 
 class PipedriveDateTime(DateType):
     def to_native(self, value, context=None):
+        if isinstance(value, datetime.datetime):
+            return value
         return datetime.datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
 
 
+class PipedriveTimeOfDay(BaseType):
+    """Time custom fields, sent by the API as "HH:MM" or "HH:MM:SS"."""
+    def to_native(self, value, context=None):
+        if isinstance(value, datetime.time):
+            return value
+        for time_format in ("%H:%M:%S", "%H:%M"):
+            try:
+                return datetime.datetime.strptime(value, time_format).time()
+            except ValueError:
+                pass
+        raise ConversionError('Could not parse time %s' % value)
+
+    def to_primitive(self, value, context=None):
+        return value.strftime("%H:%M:%S")
+
+
+class PipedriveEnumType(IntType):
+    """Single option custom fields. The value is the option id; `options`
+    maps the ids to their labels."""
+    def __init__(self, options=None, *args, **kwargs):
+        super(PipedriveEnumType, self).__init__(*args, **kwargs)
+        self.options = options or {}
+
+    def label(self, value):
+        return self.options.get(value)
+
+
+class PipedriveSetType(BaseType):
+    """Multiple options custom fields. The API sends the option ids as a
+    comma separated string; natively they are a list of ids."""
+    def __init__(self, options=None, *args, **kwargs):
+        super(PipedriveSetType, self).__init__(*args, **kwargs)
+        self.options = options or {}
+
+    def to_native(self, value, context=None):
+        if isinstance(value, (list, tuple)):
+            items = value
+        else:
+            items = [item for item in str(value).split(',') if item.strip()]
+        return [int(item) if str(item).strip().isdigit() else item
+                for item in items]
+
+    def to_primitive(self, value, context=None):
+        return ','.join(str(item) for item in value)
+
+    def labels(self, value):
+        return [self.options.get(item) for item in value or []]
+
+
 class PipedrivePhoneEmailType(StringType):
     def to_native(self, value, context=None):
         return '[{"label":"","value":"%s","primary": true}]' % value
@@ -86,7 +141,7 @@ class PipedriveModelType(BaseType):
             return value
 
         if isinstance(value, int):
-            return self.model_class({'id': value})
+            return dict_to_model({'id': value}, self.model_class)
 
         if isinstance(value, dict):
             return dict_to_model(value, self.model_class)
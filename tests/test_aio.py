@@ -0,0 +1,199 @@
+import asyncio
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import TestCase
+from urllib.parse import parse_qs, urlsplit
+
+from pipedrive import (
+    AsyncPipedriveAPI, AsyncResource, AsyncTransport, Deal, DealResource,
+    FakeBackend, Person, StreamTransport
+)
+from pipedrive.aio import build_response
+from pipedrive.batch import run_batch
+from .utils import get_test_data
+
+
+class FakeTransport(AsyncTransport):
+    def __init__(self, payloads):
+        self.payloads = payloads
+        self.requests = []
+
+    async def request(self, method, url, params=None, data=None,
+                      headers=None):
+        self.requests.append((method, url, params, data))
+        await asyncio.sleep(0)
+        path = urlsplit(url).path
+        if path not in self.payloads:
+            body = b'{"success": false, "error": "Not found"}'
+            return build_response(404, body, {}, url)
+        body = json.dumps(self.payloads[path]).encode('utf-8')
+        return build_response(200, body, {}, url)
+
+
+class AsyncResourceTest(TestCase):
+    def setUp(self):
+        deal = get_test_data('deal-detail.json')
+        self.transport = FakeTransport({
+            '/v1/deals/1': {'success': True, 'data': deal},
+            '/v1/deals': {
+                'success': True,
+                'data': [deal, deal],
+                'additional_data': {'pagination': {
+                    'start': 0, 'limit': 2, 'next_start': 2,
+                    'more_items_in_collection': True,
+                }},
+            },
+        })
+        self.api = AsyncPipedriveAPI('token', transport=self.transport)
+
+    def test_detail(self):
+        deal = asyncio.run(self.api.deal.detail(1))
+        self.assertIsInstance(deal, Deal)
+        self.assertEqual(deal.title, 'From api')
+        self.assertEqual(len(self.transport.requests), 1)
+
+    def test_list(self):
+        result = asyncio.run(self.api.deal.list(limit=2))
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result.next_start, 2)
+        params = self.transport.requests[0][2]
+        self.assertEqual(params['limit'], 2)
+        self.assertEqual(params['api_token'], 'token')
+
+    def test_gather(self):
+        async def fetch_all():
+            return await asyncio.gather(
+                *[self.api.deal.detail(1) for _ in range(20)]
+            )
+
+        deals = asyncio.run(fetch_all())
+        self.assertEqual(len(deals), 20)
+        self.assertEqual(len(self.transport.requests), 20)
+
+    def test_detail_many(self):
+        result = asyncio.run(self.api.deal.detail_many([1, 2, 1]))
+        self.assertEqual(result.succeeded, [1])
+        self.assertEqual(result.failed, [2])
+
+    def test_iter_all(self):
+        async def collect():
+            return [deal async for deal in self.api.deal.iter_all(
+                page_size=2, prefetch=False
+            )]
+
+        # The fake endpoint always claims there are more items, so stop after
+        # the first page by flipping the flag.
+        pagination = self.transport.payloads['/v1/deals']['additional_data']
+        pagination['pagination']['more_items_in_collection'] = False
+        deals = asyncio.run(collect())
+        self.assertEqual(len(deals), 2)
+        self.assertEqual(self.transport.requests[0][2]['start'], 0)
+
+    def test_stream_is_ignored(self):
+        async def collect():
+            page = await self.api.deal.list(limit=2, stream=True)
+            deals = [deal async for deal in self.api.deal.iter_all(
+                page_size=2, stream=True
+            )]
+            return page, deals
+
+        pagination = self.transport.payloads['/v1/deals']['additional_data']
+        pagination['pagination']['more_items_in_collection'] = False
+        page, deals = asyncio.run(collect())
+        self.assertEqual(len(page), 2)
+        self.assertEqual(page.next_start, 2)
+        self.assertEqual(len(deals), 2)
+        self.assertNotIn('stream', self.transport.requests[0][2])
+
+    def test_unknown_resource(self):
+        with self.assertRaises(AttributeError):
+            self.api.lol
+
+
+class FanOutResource(DealResource):
+    API_ACESSOR_NAME = 'fan_out'
+
+    def details(self, resource_ids):
+        return run_batch(self.detail, resource_ids)
+
+
+class AsyncBulkTest(TestCase):
+    def setUp(self):
+        self.backend = FakeBackend({'deal': [
+            {'id': deal_id, 'title': 'Deal %d' % deal_id}
+            for deal_id in range(1, 6)
+        ]})
+        self.api = AsyncPipedriveAPI('token', transport=self.backend)
+
+    def test_bulk_create(self):
+        result = asyncio.run(self.api.deal.bulk_create(
+            [Deal({'title': 'a'}), Deal({'title': 'b'})]
+        ))
+        self.assertEqual(result.succeeded, [0, 1])
+        self.assertEqual([deal.title for deal in result], ['a', 'b'])
+        self.assertEqual(len(self.backend.items('deal')), 7)
+
+    def test_bulk_update(self):
+        async def rename():
+            people = await self.api.person.bulk_create(
+                [Person({'name': 'a'}), Person({'name': 'b'})]
+            )
+            for person in people:
+                person.name = person.name.upper()
+            return await self.api.person.bulk_update(people)
+
+        result = asyncio.run(rename())
+        self.assertFalse(result.errors)
+        self.assertEqual([item['name'] for item in self.backend.items('person')],
+                         ['A', 'B'])
+
+    def test_bulk_delete(self):
+        result = asyncio.run(self.api.deal.bulk_delete([1, 2, 3],
+                                                       chunk_size=2))
+        self.assertEqual(result.succeeded, [1, 2, 3])
+        self.assertEqual([item['id'] for item in self.backend.items('deal')],
+                         [4, 5])
+
+    def test_threaded_method(self):
+        resource = AsyncResource(self.api, FanOutResource)
+        with self.assertRaises(NotImplementedError):
+            asyncio.run(resource.details([1, 2]))
+
+
+class StreamTransportTest(TestCase):
+    def setUp(self):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = parse_qs(urlsplit(self.path).query)
+                body = json.dumps({
+                    'success': True,
+                    'data': {'id': 7, 'name': query['term'][0]},
+                }).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_round_trip(self):
+        api = AsyncPipedriveAPI(
+            'token', transport=StreamTransport(),
+            base_url='http://127.0.0.1:%d' % self.server.server_port
+        )
+        response = asyncio.run(api.send_request('GET', '/users', {'term': 'x'}))
+        self.assertEqual(response.json()['data']['name'], 'x')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+from unittest import TestCase
+
+import threading
+
+from pipedrive import (
+    PipedriveAPI, PipedriveException, BatchResult, Deal, Activity
+)
+from .utils import detail_handler, make_response, stub_api
+
+
+def detail_api(failing_ids=()):
+    return stub_api(detail_handler({'title': 'Deal'}, missing=failing_ids))
+
+
+class DetailManyTest(TestCase):
+    def test_input_order(self):
+        api = detail_api()
+        ids = [5, 3, 9, 1, 3]
+        result = api.deal.detail_many(ids, concurrency=4)
+        self.assertIsInstance(result, BatchResult)
+        self.assertEqual(result.succeeded, [5, 3, 9, 1])
+        self.assertEqual([deal.id for deal in result], [5, 3, 9, 1])
+        self.assertIsInstance(result[9], Deal)
+        self.assertEqual(len(api.transport.paths), 4)
+
+    def test_failures_do_not_abort(self):
+        api = detail_api(failing_ids=(2,))
+        result = api.deal.detail_many(range(1, 5))
+        self.assertEqual(result.succeeded, [1, 3, 4])
+        self.assertEqual(result.failed, [2])
+        self.assertRaises(PipedriveException, result.raise_for_errors)
+
+    def test_as_completed(self):
+        api = detail_api(failing_ids=(2,))
+        outcomes = {
+            deal_id: (deal, error) for deal_id, deal, error in
+            api.deal.detail_many(range(1, 4), as_completed=True)
+        }
+        self.assertEqual(sorted(outcomes), [1, 2, 3])
+        self.assertIsNone(outcomes[2][0])
+        self.assertIsInstance(outcomes[2][1], PipedriveException)
+        self.assertEqual(outcomes[3][0].id, 3)
+
+
+class WriteAPI(PipedriveAPI):
+    def __init__(self, throttled=(), bad_ids=()):
+        super(WriteAPI, self).__init__('token')
+        self.throttled = set(throttled)
+        self.bad_ids = bad_ids
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def send_request(self, method, path, params=None, data=None,
+                     headers=None):
+        with self.lock:
+            self.requests.append((method, path, data))
+        if method == 'DELETE':
+            ids = str(data['ids']).split(',') if data else \
+                [path.rsplit('/', 1)[1]]
+            if any(int(resource_id) in self.bad_ids for resource_id in ids):
+                raise PipedriveException(
+                    'Bad id', {}, make_response({'success': False}, 400)
+                )
+            return make_response({'success': True, 'data': {'id': ids}})
+        subject = data['subject']
+        with self.lock:
+            if subject in self.throttled:
+                self.throttled.remove(subject)
+                raise PipedriveException(
+                    'Too many requests', {},
+                    make_response({'success': False}, 429)
+                )
+        body = dict(data, id=int(path.rsplit('/', 1)[1])
+                    if method == 'PUT' else len(self.requests))
+        return make_response({'success': True, 'data': body})
+
+
+def activity(subject, activity_id=None):
+    return Activity({'subject': subject, 'type': 'call', 'id': activity_id})
+
+
+class BulkWriteTest(TestCase):
+    def test_bulk_create(self):
+        api = WriteAPI(throttled=['b'])
+        result = api.activity.bulk_create(
+            [activity(subject) for subject in 'abc'], concurrency=3
+        )
+        self.assertEqual(result.succeeded, [0, 1, 2])
+        self.assertEqual(result.retried, [1])
+        self.assertEqual([item.subject for item in result], ['a', 'b', 'c'])
+        self.assertEqual(len(api.requests), 4)
+
+    def test_bulk_update(self):
+        api = WriteAPI()
+        result = api.activity.bulk_update(
+            [activity('a', 10), activity('b', 20)]
+        )
+        self.assertEqual(result.succeeded, [10, 20])
+        self.assertEqual(result[20].subject, 'b')
+        self.assertEqual(sorted(method for method, _, _ in api.requests),
+                         ['PUT', 'PUT'])
+
+    def test_bulk_delete_chunks(self):
+        api = WriteAPI()
+        result = api.deal.bulk_delete(range(1, 251), concurrency=2)
+        self.assertEqual(result.succeeded, list(range(1, 251)))
+        chunks = sorted(len(data['ids'].split(','))
+                        for _, _, data in api.requests)
+        self.assertEqual(chunks, [50, 100, 100])
+
+    def test_bulk_delete_isolates_failures(self):
+        api = WriteAPI(bad_ids=(3,))
+        deals = [Deal({'id': deal_id, 'title': 'Deal'})
+                 for deal_id in range(1, 6)]
+        result = api.deal.bulk_delete(deals, chunk_size=2)
+        self.assertEqual(result.succeeded, [1, 2, 4, 5])
+        self.assertEqual(result.failed, [3])
+        self.assertEqual(result.retried, [3, 4])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+from unittest import TestCase
+
+from benchmarks import suite
+from benchmarks.fakeserver import FakePipedriveServer
+from pipedrive import PipedriveAPI
+
+
+class FakeServerTest(TestCase):
+    def test_base_url(self):
+        with FakePipedriveServer(deals=30) as server:
+            api = PipedriveAPI('token', base_url=server.base_url)
+            self.assertEqual(len(list(api.deal.iter_all(page_size=7))), 30)
+            self.assertEqual(api.user.detail(3).id, 3)
+            self.assertEqual(server.requests, 6)
+
+
+class SuiteTest(TestCase):
+    def test_run(self):
+        report = suite.run(deals=1000, repeat=1,
+                           names=['pagination', 'retries'])
+        self.assertEqual(report['meta']['deals'], 1000)
+        retries = report['results']['retries']
+        self.assertEqual(retries['records'], 1000)
+        self.assertGreater(retries['faults_injected'], 0)
+        self.assertEqual(retries['retries'], retries['faults_injected'])
+
+    def test_compare(self):
+        previous = {'results': {'pagination': {
+            'raw_seconds': 1.0, 'raw_records_per_second': 100.0,
+            'requests': 3,
+        }}}
+        current = {'results': {'pagination': {
+            'raw_seconds': 1.5, 'raw_records_per_second': 90.0,
+            'requests': 9,
+        }}}
+        self.assertEqual(suite.compare(current, previous, tolerance=0.2),
+                         [('pagination', 'raw_seconds', 1.0, 1.5)])
+
+
+if __name__ == '__main__':
+    unittest.main()
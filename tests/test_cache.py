@@ -0,0 +1,87 @@
+import unittest
+from unittest import TestCase
+
+from pipedrive import PipedriveAPI, ResponseCache
+from .utils import make_response
+
+
+class CountingAPI(PipedriveAPI):
+    def __init__(self, **kwargs):
+        super(CountingAPI, self).__init__('token', **kwargs)
+        self.requests = []
+        self.not_modified = False
+
+    def send_request(self, method, path, params=None, data=None,
+                     headers=None):
+        self.requests.append((method, path, headers))
+        if headers and self.not_modified:
+            return make_response({}, 304)
+        return make_response(
+            {'success': True, 'data': {'id': 1, 'name': 'Stage %d' % len(
+                self.requests), 'pipeline_id': 1}},
+            headers={'ETag': '"v1"'}
+        )
+
+
+class FakeClock(object):
+    now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class ResponseCacheTest(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = ResponseCache(max_entries=2, clock=self.clock)
+        self.api = CountingAPI(cache=self.cache)
+
+    def test_hits(self):
+        first = self.api.stage.detail(1)
+        second = self.api.stage.detail(1)
+        self.assertEqual(first.name, second.name)
+        self.assertEqual(len(self.api.requests), 1)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_uncached_resources(self):
+        self.api.deal.detail(1)
+        self.api.deal.detail(1)
+        self.assertEqual(len(self.api.requests), 2)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_per_resource_ttl(self):
+        self.cache.ttls['stage'] = None
+        self.api.stage.detail(1)
+        self.api.stage.detail(1)
+        self.assertEqual(len(self.api.requests), 2)
+
+    def test_lru_eviction(self):
+        for stage_id in (1, 2, 1, 3):
+            self.api.stage.detail(stage_id)
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+        self.api.stage.detail(1)
+        self.api.stage.detail(2)
+        self.assertEqual(len(self.api.requests), 4)
+
+    def test_invalidation_on_write(self):
+        stage = self.api.stage.detail(1)
+        self.api.stage.create(stage)
+        self.api.stage.detail(1)
+        self.assertEqual([r[0] for r in self.api.requests],
+                         ['GET', 'POST', 'GET'])
+
+    def test_revalidation(self):
+        self.api.stage.detail(1)
+        self.clock.now = 601
+        self.api.not_modified = True
+        stage = self.api.stage.detail(1)
+        self.assertEqual(stage.name, 'Stage 1')
+        self.assertEqual(self.api.requests[1][2], {'If-None-Match': '"v1"'})
+        self.assertEqual(self.cache.stats()['revalidations'], 1)
+        self.api.stage.detail(1)
+        self.assertEqual(len(self.api.requests), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
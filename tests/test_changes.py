@@ -0,0 +1,74 @@
+import unittest
+from unittest import TestCase
+
+from pipedrive import (
+    PipedriveAPI, Organization, Person, CollectionResponse, dict_to_model
+)
+from .utils import make_response
+
+
+ORGANIZATION = {'id': 5, 'name': 'Acme', 'owner_id': {'id': 7, 'name': 'Me'},
+                'address': 'Main St', 'people_count': 3}
+
+
+class UpdateAPI(PipedriveAPI):
+    def __init__(self):
+        super(UpdateAPI, self).__init__('token')
+        self.sent = []
+
+    def send_request(self, method, path, params=None, data=None,
+                     headers=None):
+        self.sent.append((method, path, data))
+        return make_response({'success': True,
+                              'data': dict(ORGANIZATION, **data)})
+
+
+class ChangesTest(TestCase):
+    def test_unchanged(self):
+        organization = dict_to_model(ORGANIZATION, Organization)
+        self.assertEqual(organization.changes(), {})
+        self.assertFalse(organization.has_changed())
+
+    def test_modified_fields(self):
+        organization = dict_to_model(ORGANIZATION, Organization)
+        organization.name = 'Acme Inc'
+        organization.address = None
+        organization.owner_id = 8
+        self.assertEqual(organization.changes(), {
+            'name': 'Acme Inc', 'address': None, 'owner_id': 8,
+        })
+
+    def test_new_models_send_everything(self):
+        organization = Organization({'name': 'New'})
+        self.assertEqual(organization.changes(),
+                         organization.to_primitive())
+
+    def test_lazy_models(self):
+        organization = CollectionResponse(
+            {'success': True, 'data': [ORGANIZATION]}, Organization, lazy=True
+        )[0]
+        self.assertEqual(organization.changes(), {})
+        organization.name = 'Lazy'
+        self.assertEqual(organization.changes(), {'name': 'Lazy'})
+
+
+class MinimalUpdateTest(TestCase):
+    def test_sends_only_the_diff(self):
+        api = UpdateAPI()
+        organization = dict_to_model(ORGANIZATION, Organization)
+        organization.name = 'Acme Inc'
+        updated = api.organization.update(organization)
+        self.assertEqual(api.sent, [('PUT', '/organizations/5',
+                                     {'name': 'Acme Inc'})])
+        self.assertEqual(updated.name, 'Acme Inc')
+        self.assertFalse(organization.has_changed())
+
+    def test_skips_unchanged_models(self):
+        api = UpdateAPI()
+        person = dict_to_model({'id': 3, 'name': 'Someone'}, Person)
+        self.assertIs(api.person.update(person), person)
+        self.assertEqual(api.sent, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+from unittest import TestCase
+
+from pipedrive import PipedriveAPI, columnar
+from .utils import make_response, paginated_payload, stub_api
+
+
+DEALS = [
+    {'id': 1, 'title': 'First', 'value': 10, 'currency': 'EUR',
+     'user_id': {'id': 666, 'name': 'Arthur', 'value': 666},
+     'add_time': '2015-01-28 23:28:43', 'visible_to': [1, 3]},
+    {'id': 2, 'title': 'Second', 'value': '12.5', 'user_id': None,
+     'add_time': None},
+    {'id': 3, 'title': 'Third', 'value': None, 'user_id': 42,
+     'add_time': '2016-02-01 10:00:00'},
+]
+
+ACTIVITIES = [
+    {'id': 1, 'subject': 'Call', 'type': 'call', 'done': 1,
+     'duration': '01:30', 'due_date': '2020-03-01', 'due_time': '10:00'},
+    {'id': 2, 'subject': 'Lunch', 'type': 'lunch', 'duration': '',
+     'due_date': None, 'due_time': None},
+]
+
+
+class ColumnarTest(TestCase):
+    def setUp(self):
+        self.api = PipedriveAPI('token')
+        self.requests = []
+
+        def send_request(method, path, params=None, data=None, headers=None):
+            self.requests.append(dict(params))
+            return make_response(paginated_payload(
+                DEALS, params.get('start', 0), params.get('limit', 100)
+            ))
+
+        self.api.send_request = send_request
+
+    def test_lists(self):
+        columns = self.api.deal.to_columns(
+            fields=['id', 'value', 'user_id', 'add_time', 'visible_to'],
+            output='lists', page_size=2
+        )
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(list(columns),
+                         ['id', 'value', 'user_id', 'add_time', 'visible_to'])
+        self.assertEqual(columns['id'], [1, 2, 3])
+        self.assertEqual(columns['value'], [10.0, 12.5, None])
+        self.assertEqual(columns['user_id'], [666, None, 42])
+        self.assertEqual(columns['add_time'],
+                         ['2015-01-28 23:28:43', None, '2016-02-01 10:00:00'])
+        self.assertEqual(columns['visible_to'], [[1, 3], None, None])
+
+    def test_batches(self):
+        batches = list(columnar.iter_column_batches(
+            self.api.deal, ['id'], output='lists', page_size=2
+        ))
+        self.assertEqual([batch['id'] for batch in batches], [[1, 2], [3]])
+
+    def test_unknown_field(self):
+        self.assertRaises(ValueError, self.api.deal.to_columns,
+                          fields=['nope'], output='lists')
+
+    def test_unknown_output(self):
+        self.assertRaises(ValueError, self.api.deal.to_columns, output='csv')
+
+    @unittest.skipIf(columnar.numpy is None, 'numpy is not installed')
+    def test_numpy(self):
+        numpy = columnar.numpy
+        columns = self.api.deal.to_columns(
+            fields=['id', 'title', 'value', 'user_id', 'add_time'],
+            page_size=2
+        )
+        self.assertEqual(columns['id'].dtype, numpy.int64)
+        self.assertEqual(columns['title'].tolist(),
+                         ['First', 'Second', 'Third'])
+        self.assertTrue(numpy.isnan(columns['value'][2]))
+        self.assertEqual(columns['value'][:2].tolist(), [10.0, 12.5])
+        self.assertIsInstance(columns['user_id'], numpy.ma.MaskedArray)
+        self.assertEqual(columns['user_id'].mask.tolist(),
+                         [False, True, False])
+        self.assertEqual(columns['add_time'].dtype,
+                         numpy.dtype('datetime64[s]'))
+        self.assertTrue(numpy.isnat(columns['add_time'][1]))
+        self.assertEqual(str(columns['add_time'][0]), '2015-01-28T23:28:43')
+
+    @unittest.skipIf(columnar.pyarrow is None, 'pyarrow is not installed')
+    def test_arrow(self):
+        pyarrow = columnar.pyarrow
+        table = self.api.deal.to_columns(
+            fields=['id', 'value', 'user_id', 'add_time', 'visible_to'],
+            output='arrow', page_size=2
+        )
+        self.assertEqual(table.num_rows, 3)
+        self.assertEqual(len(table.to_batches()), 2)
+        self.assertEqual(table.schema.field('add_time').type,
+                         pyarrow.timestamp('s'))
+        self.assertEqual(table.column('user_id').to_pylist(), [666, None, 42])
+        self.assertEqual(table.column('visible_to').to_pylist(),
+                         ['[1, 3]', None, None])
+        self.assertEqual(table.column('add_time').null_count, 1)
+
+
+def activities_handler(method, path, params, data):
+    return make_response(paginated_payload(
+        ACTIVITIES, params.get('start', 0), params.get('limit', 100)
+    ))
+
+
+class ActivityColumnsTest(TestCase):
+    def setUp(self):
+        self.api = stub_api(activities_handler)
+
+    def test_lists(self):
+        columns = self.api.activity.to_columns(output='lists')
+        # Durations and times are exported as seconds, like the model's
+        self.assertEqual(columns['duration'], [90, None])
+        self.assertEqual(columns['due_time'], [600, None])
+        self.assertEqual(columns['due_date'], ['2020-03-01', None])
+
+    @unittest.skipIf(columnar.numpy is None, 'numpy is not installed')
+    def test_numpy(self):
+        columns = self.api.activity.to_columns()
+        self.assertEqual(columns['duration'].dtype, columnar.numpy.int64)
+        self.assertEqual(columns['duration'].mask.tolist(), [False, True])
+        self.assertEqual(columns['due_time'][0], 600)
+
+    @unittest.skipIf(columnar.pyarrow is None, 'pyarrow is not installed')
+    def test_arrow(self):
+        table = self.api.activity.to_columns(output='arrow')
+        self.assertEqual(table.schema.field('duration').type,
+                         columnar.pyarrow.int64())
+        self.assertEqual(table.column('due_time').to_pylist(), [600, None])
@@ -0,0 +1,103 @@
+import datetime
+import unittest
+from decimal import Decimal
+from unittest import TestCase
+
+from pipedrive import (
+    PipedriveAPI, Deal, Organization, User, compile_model, dict_to_model
+)
+from .utils import make_response, paginated_payload
+
+BUDGET = 'a' * 40
+KICKOFF = 'b' * 40
+SEGMENT = 'c' * 40
+TAGS = 'd' * 40
+CALL_AT = 'e' * 40
+ACCOUNT_MANAGER = 'f' * 40
+
+FIELDS = [
+    {'key': 'title', 'name': 'Title', 'field_type': 'varchar'},
+    {'key': BUDGET, 'name': 'Budget', 'field_type': 'monetary'},
+    {'key': KICKOFF, 'name': 'Kick-off date', 'field_type': 'date'},
+    {'key': SEGMENT, 'name': 'Segment', 'field_type': 'enum',
+     'options': [{'id': 1, 'label': 'SMB'}, {'id': 2, 'label': 'Enterprise'}]},
+    {'key': TAGS, 'name': 'Tags', 'field_type': 'set',
+     'options': [{'id': 3, 'label': 'Hot'}, {'id': 4, 'label': 'Partner'}]},
+    {'key': CALL_AT, 'name': 'Call at', 'field_type': 'time'},
+    {'key': ACCOUNT_MANAGER, 'name': 'Title', 'field_type': 'user'},
+]
+
+
+class CompileModelTest(TestCase):
+    def setUp(self):
+        self.model_class = compile_model(Deal, FIELDS)
+
+    def test_aliases(self):
+        self.assertTrue(issubclass(self.model_class, Deal))
+        self.assertEqual(self.model_class.CUSTOM_FIELDS, {
+            'budget': BUDGET,
+            'budget_currency': BUDGET + '_currency',
+            'kick_off_date': KICKOFF,
+            'segment': SEGMENT,
+            'tags': TAGS,
+            'call_at': CALL_AT,
+            'title_2': ACCOUNT_MANAGER,
+        })
+
+    def test_conversion(self):
+        deal = dict_to_model({
+            'id': 1, 'title': 'Deal',
+            BUDGET: '10.5', BUDGET + '_currency': 'EUR',
+            KICKOFF: '2015-02-01', SEGMENT: '2', TAGS: '3,4',
+            CALL_AT: '13:30:00', ACCOUNT_MANAGER: {'id': 9, 'name': 'Ann'},
+        }, self.model_class)
+        self.assertEqual(deal.budget, Decimal('10.5'))
+        self.assertEqual(deal.budget_currency, 'EUR')
+        self.assertEqual(deal.kick_off_date.year, 2015)
+        self.assertEqual(deal.segment, 2)
+        self.assertEqual(
+            self.model_class.fields['segment'].label(deal.segment),
+            'Enterprise'
+        )
+        self.assertEqual(deal.tags, [3, 4])
+        self.assertEqual(deal.call_at, datetime.time(13, 30))
+        self.assertIsInstance(deal.title_2, User)
+
+        primitive = deal.to_primitive()
+        self.assertEqual(primitive[TAGS], '3,4')
+        self.assertEqual(primitive[ACCOUNT_MANAGER], 9)
+
+    def test_existing_keys_are_kept(self):
+        key = 'a76bd6ffcbc917963e9dd574f2bd38ee60c789e3'
+        model_class = compile_model(Organization, [
+            {'key': key, 'name': 'Story', 'field_type': 'text'}
+        ])
+        self.assertEqual(model_class.CUSTOM_FIELDS, {})
+
+
+class FieldsAPI(PipedriveAPI):
+    requests = 0
+
+    def send_request(self, method, path, params=None, data=None,
+                     headers=None):
+        FieldsAPI.requests += 1
+        return make_response(paginated_payload(
+            FIELDS, params['start'], params['limit']
+        ))
+
+
+class CustomModelTest(TestCase):
+    def test_cached_per_account_and_installed(self):
+        api = FieldsAPI('account-1')
+        model_class = api.dealField.compile_model(install=True)
+        self.assertIs(api.dealField.compile_model(), model_class)
+        self.assertIs(api.deal.MODEL_CLASS, model_class)
+        self.assertIs(FieldsAPI('account-1').dealField.compile_model(),
+                      model_class)
+        self.assertIsNot(FieldsAPI('account-2').dealField.compile_model(),
+                         model_class)
+        self.assertEqual(FieldsAPI.requests, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
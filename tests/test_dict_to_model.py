@@ -0,0 +1,42 @@
+import unittest
+from unittest import TestCase
+
+from schematics.exceptions import ModelConversionError
+
+from pipedrive import Deal, Stage, User, dict_to_model
+from .utils import get_test_data
+
+
+class DictToModelTest(TestCase):
+    def test_same_as_schematics_import(self):
+        for json in ['deal-detail.json', 'deal-detail-numeric-user-id.json']:
+            data = get_test_data(json)
+            fast = dict_to_model(data, Deal)
+            safe_data = {key: value for key, value in data.items()
+                         if key in Deal.fields and value != ''}
+            slow = Deal(raw_data=safe_data)
+            self.assertEqual(fast.to_primitive(), slow.to_primitive())
+            self.assertIsInstance(fast.user_id, User)
+            self.assertIsInstance(fast.stage_id, Stage)
+
+    def test_original_data_is_not_copied_upfront(self):
+        data = get_test_data('deal-detail.json')
+        deal = dict_to_model(data, Deal)
+        self.assertIs(deal._original_data, data)
+        original = deal.get_original_data()
+        self.assertEqual(original, data)
+        original['title'] = 'Changed'
+        self.assertEqual(deal.get_original_data()['title'], 'From api')
+
+    def test_defaults_and_empty_strings(self):
+        user = dict_to_model({'id': 1, 'name': ''}, User)
+        self.assertIsNone(user.name)
+        self.assertEqual(user.active_flag, 0)
+
+    def test_conversion_errors(self):
+        with self.assertRaises(ModelConversionError):
+            dict_to_model({'title': 'Deal', 'value': 'lots'}, Deal)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+from unittest import TestCase
+
+from pipedrive import PipedriveAPI, CollectionResponse, Deal, User
+from pipedrive.base import LazyModel
+from .utils import get_test_data, make_response, paginated_payload
+
+
+class LazyCollectionTest(TestCase):
+    def setUp(self):
+        self.data = get_test_data('deal-detail.json')
+        self.collection = CollectionResponse(
+            {'success': True, 'data': [self.data]}, Deal, lazy=True
+        )
+        self.deal = self.collection[0]
+
+    def test_proxy(self):
+        self.assertIsInstance(self.deal, LazyModel)
+        self.assertIsInstance(self.deal, Deal)
+        self.assertEqual(self.deal.title, 'From api')
+
+    def test_fields_are_converted_once_on_access(self):
+        user = self.deal.user_id
+        self.assertIs(self.deal.user_id, user)
+        self.assertIsInstance(user, User)
+        self.assertEqual(list(self.deal._values), ['user_id'])
+        self.assertIsNone(self.deal._model)
+
+    def test_materialize(self):
+        user = self.deal.user_id
+        primitive = self.deal.to_primitive()
+        self.assertIsNotNone(self.deal._model)
+        self.assertIs(self.deal._model.user_id, user)
+        self.assertEqual(primitive['user_id'], 666)
+        self.assertIsNone(self.deal.validate())
+
+    def test_setting_fields(self):
+        self.deal.title = 'Changed'
+        self.assertEqual(self.deal.title, 'Changed')
+        self.assertEqual(self.deal.get_original_data()['title'], 'From api')
+
+
+class LazyOptionTest(TestCase):
+    def test_list_lazy(self):
+        api = PipedriveAPI('token')
+        requests = []
+
+        def send_request(method, path, params=None, data=None, headers=None):
+            requests.append(dict(params))
+            return make_response(paginated_payload(
+                [{'id': 1, 'title': 'Deal'}], 0, 10
+            ))
+
+        api.send_request = send_request
+        deals = api.deal.list(lazy=True)
+        self.assertIsInstance(deals[0], LazyModel)
+        self.assertNotIn('lazy', requests[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+from unittest import TestCase
+
+from pipedrive import BASE_URL, FakeBackend, PipedriveAPI, LocalMirror, Person
+from pipedrive.transport import api_path
+from .utils import make_response, paginated_payload, stub_api
+
+
+PERSONS = [
+    {'id': 1, 'name': 'John Smith', 'owner_id': {'id': 7, 'value': 7},
+     'org_id': {'value': 30, 'name': 'Acme'},
+     'email': [{'value': 'John@Example.com', 'primary': True}],
+     'phone': [{'value': '+55 (11) 5555-0101', 'primary': True}]},
+    {'id': 2, 'name': 'Jane Doe', 'owner_id': 8, 'org_id': None,
+     'email': [], 'phone': []},
+    {'id': 3, 'name': 'Johnny Walker', 'owner_id': 7, 'org_id': 31},
+]
+
+
+class LocalMirrorTest(TestCase):
+    def setUp(self):
+        self.changed = []
+        self.api = stub_api(self.handle)
+        self.transport = self.api.transport
+        self.now = 1000.0
+        self.mirror = LocalMirror(self.api, resources=['person'],
+                                  max_age=60, clock=lambda: self.now)
+        self.mirror.refresh()
+        del self.transport.requests[:]
+
+    def handle(self, method, path, params, data):
+        if path == '/persons/find':
+            return make_response({'success': True, 'data': [
+                {'id': 99, 'name': params['term']}
+            ]})
+        items = PERSONS if path == '/persons' else self.changed
+        return make_response(paginated_payload(
+            items, params.get('start', 0), params.get('limit', 100)
+        ))
+
+    def test_find_by_name(self):
+        persons = self.mirror.person.find('john')
+        self.assertEqual([person.id for person in persons], [1, 3])
+        self.assertIsInstance(persons[0], Person)
+        self.assertEqual(self.transport.paths, [])
+
+    def test_find_by_email_and_phone(self):
+        found = self.mirror.person.find('john@example.com', search_by_email=1)
+        self.assertEqual([person.id for person in found], [1])
+        found = self.mirror.person.find('5511 5555 0101')
+        self.assertEqual([person.id for person in found], [1])
+
+    def test_find_with_filter(self):
+        found = self.mirror.person.find('john', org_id=31)
+        self.assertEqual([person.id for person in found], [3])
+
+    def test_list(self):
+        page = self.mirror.person.list(owner_id=7, limit=1)
+        self.assertEqual([person.id for person in page], [1])
+        self.assertTrue(page.more_items_in_collection)
+        self.assertEqual(page.next_start, 1)
+        page = self.mirror.person.list(owner_id=7, start=1, raw=True)
+        self.assertEqual([person['id'] for person in page], [3])
+
+    def test_falls_back_to_the_api(self):
+        found = self.mirror.person.find('Nobody')
+        self.assertEqual([person.id for person in found], [99])
+        self.assertEqual(self.transport.paths, ['/persons/find'])
+        self.assertEqual(self.mirror.fallbacks, 1)
+
+    def test_unknown_params_go_to_the_api(self):
+        self.mirror.person.list(sort='name ASC')
+        self.assertEqual(self.transport.paths, ['/persons'])
+
+    def test_refreshes_when_stale(self):
+        self.changed = [
+            {'item': 'person', 'id': 2,
+             'data': {'id': 2, 'name': 'Jane Doe', 'active_flag': False}},
+            {'item': 'person', 'id': 4,
+             'data': {'id': 4, 'name': 'John New', 'owner_id': 7}},
+        ]
+        self.now += 30
+        self.assertEqual(len(self.mirror.person.find('Jane')), 1)
+        self.assertEqual(self.transport.paths, [])
+
+        self.now += 60
+        found = self.mirror.person.find('j', raw=True)
+        self.assertEqual(self.transport.paths, ['/recents'])
+        self.assertEqual([person['id'] for person in found], [1, 3, 4])
+
+    def test_find_matches_the_start_of_names(self):
+        found = self.mirror.person.find('JOHNNY')
+        self.assertEqual([person.id for person in found], [3])
+        self.assertEqual(self.transport.paths, [])
+        found = self.mirror.person.find('Smith')
+        self.assertEqual([person.id for person in found], [99])
+        self.assertEqual(self.transport.paths, ['/persons/find'])
+
+    def test_find_escapes_wildcards(self):
+        found = self.mirror.person.find('J%n')
+        self.assertEqual([person.id for person in found], [99])
+
+    def test_find_uses_the_name_index(self):
+        plan = self.mirror.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM mirror_objects WHERE "
+            "resource = ? AND name LIKE ? ESCAPE '\\'", ('person', 'jo%')
+        )
+        self.assertIn('mirror_objects_name', plan[0][-1])
+
+
+class EditingBackend(FakeBackend):
+    """Renames a person right after serving the first page of persons."""
+
+    def __init__(self, data):
+        super(EditingBackend, self).__init__(data)
+        self.edited = False
+
+    def request(self, method, url, params=None, data=None, headers=None,
+                stream=False):
+        response = super(EditingBackend, self).request(
+            method, url, params, data, headers, stream
+        )
+        if api_path(url) == '/persons' and not self.edited:
+            self.edited = True
+            super(EditingBackend, self).request(
+                'PUT', BASE_URL + '/persons/1', data={'name': 'John Renamed'}
+            )
+        return response
+
+
+class MirrorConsistencyTest(TestCase):
+    def test_edit_during_first_refresh(self):
+        backend = EditingBackend({'person': PERSONS})
+        mirror = LocalMirror(PipedriveAPI('token', transport=backend),
+                             resources=['person'], page_size=1)
+        mirror.refresh()
+        self.assertTrue(backend.edited)
+        persons = mirror.person.list(raw=True)
+        self.assertEqual([person['id'] for person in persons], [1, 2, 3])
+
+        mirror.refresh()
+        found = mirror.person.find('John Renamed', raw=True)
+        self.assertEqual([person['id'] for person in found], [1])
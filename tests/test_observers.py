@@ -0,0 +1,135 @@
+import unittest
+from unittest import TestCase, mock
+
+from pipedrive import (
+    PipedriveAPI, PipedriveException, Observer, EndpointStats,
+    PrometheusObserver, OpenTelemetryObserver, observers
+)
+from .utils import make_response
+
+
+class FakeSession(object):
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+
+    def request(self, method, url, params=None, data=None, headers=None):
+        return self.outcomes.pop(0)
+
+
+OK = make_response({'success': True, 'data': {'id': 1, 'name': 'Someone'}},
+                   headers={'X-RateLimit-Remaining': '79',
+                            'X-RateLimit-Limit': '80',
+                            'X-RateLimit-Reset': '2'})
+THROTTLED = make_response({'success': False, 'error': 'Slow down'}, 429,
+                          {'Retry-After': '0'})
+NOT_FOUND = make_response({'success': False, 'error': 'Not found'}, 404)
+
+
+class Recorder(Observer):
+    def __init__(self):
+        self.started = []
+        self.ended = []
+
+    def on_request_start(self, event):
+        self.started.append(event.path_template)
+
+    def on_request_end(self, event):
+        self.ended.append(event)
+
+
+def api_with(outcomes, *api_observers):
+    api = PipedriveAPI('token', observers=api_observers)
+    api.session = FakeSession(outcomes)
+    return api
+
+
+class ObserverTest(TestCase):
+    def test_events(self):
+        recorder = Recorder()
+        with mock.patch('pipedrive.base.sleep'):
+            api_with([THROTTLED, OK], recorder).user.detail(12)
+        self.assertEqual(recorder.started, ['/users/{id}'])
+        event = recorder.ended[0]
+        self.assertEqual((event.resource, event.method, event.path),
+                         ('users', 'GET', '/users/12'))
+        self.assertEqual(event.status_code, 200)
+        self.assertEqual(event.retries, 1)
+        self.assertEqual(event.bytes_in, len(OK.content))
+        self.assertEqual(event.rate_limit['remaining'], 79)
+        self.assertTrue(event.succeeded)
+        self.assertGreaterEqual(event.latency, 0)
+
+    def test_failures(self):
+        recorder = Recorder()
+        api = api_with([NOT_FOUND], recorder)
+        self.assertRaises(PipedriveException, api.deal.detail, 3)
+        event = recorder.ended[0]
+        self.assertEqual(event.status_code, 404)
+        self.assertIsInstance(event.error, PipedriveException)
+
+    def test_broken_observers_do_not_break_requests(self):
+        class Broken(Observer):
+            def on_request_end(self, event):
+                raise RuntimeError('Oops')
+
+        api = api_with([OK], Broken())
+        self.assertEqual(api.user.detail(1).id, 1)
+
+    def test_endpoint_stats(self):
+        stats = EndpointStats()
+        api = api_with([OK, OK, NOT_FOUND])
+        api.add_observer(stats)
+        api.user.detail(1)
+        api.user.detail(2)
+        self.assertRaises(PipedriveException, api.deal.detail, 3)
+        report = dict(stats.report())
+        self.assertEqual(report[('GET', '/users/{id}')]['count'], 2)
+        self.assertEqual(report[('GET', '/deals/{id}')]['errors'], 1)
+
+
+@unittest.skipIf(observers.prometheus_client is None,
+                 'prometheus_client is not installed')
+class PrometheusObserverTest(TestCase):
+    def test_metrics(self):
+        prometheus_client = observers.prometheus_client
+        registry = prometheus_client.CollectorRegistry()
+        api = api_with([OK], PrometheusObserver(registry=registry))
+        api.user.detail(1)
+        labels = {'resource': 'users', 'method': 'GET', 'path': '/users/{id}'}
+        self.assertEqual(registry.get_sample_value(
+            'pipedrive_request_duration_seconds_count',
+            dict(labels, status='200')
+        ), 1)
+        self.assertEqual(registry.get_sample_value(
+            'pipedrive_response_bytes_total', labels
+        ), len(OK.content))
+        self.assertEqual(registry.get_sample_value(
+            'pipedrive_rate_limit_remaining'
+        ), 79)
+
+
+@unittest.skipIf(observers.otel_trace is None,
+                 'opentelemetry is not installed')
+class OpenTelemetryObserverTest(TestCase):
+    def test_spans(self):
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+        from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+            InMemorySpanExporter
+        )
+        exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+        observer = OpenTelemetryObserver(provider.get_tracer('tests'))
+        api = api_with([OK, NOT_FOUND], observer)
+        api.user.detail(1)
+        self.assertRaises(PipedriveException, api.deal.detail, 3)
+        first, second = exporter.get_finished_spans()
+        self.assertEqual(first.name, 'GET /users/{id}')
+        self.assertEqual(first.attributes['http.response.status_code'], 200)
+        self.assertEqual(second.attributes['http.response.status_code'], 404)
+        self.assertFalse(second.status.is_ok)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from unittest import TestCase
+
+from pipedrive import PipedriveAPI, Deal, Activity
+from .utils import make_response, paginated_payload
+
+
+class PagedAPI(PipedriveAPI):
+    def __init__(self, items):
+        super(PagedAPI, self).__init__('token')
+        self.items = items
+        self.calls = []
+
+    def send_request(self, method, path, params=None, data=None,
+                     headers=None):
+        self.calls.append((path, dict(params)))
+        return make_response(paginated_payload(
+            self.items, params['start'], params['limit']
+        ))
+
+
+class IterAllTest(TestCase):
+    def setUp(self):
+        self.items = [{'id': i, 'title': 'Deal %d' % i, 'subject': 'Call',
+                       'type': 'call'} for i in range(25)]
+
+    def test_iter_all(self):
+        api = PagedAPI(self.items)
+        deals = list(api.deal.iter_all(page_size=10, status='open'))
+        self.assertEqual([deal.id for deal in deals], list(range(25)))
+        self.assertTrue(all(isinstance(deal, Deal) for deal in deals))
+        self.assertEqual([params['start'] for _, params in api.calls],
+                         [0, 10, 20])
+        self.assertEqual(api.calls[0][1]['status'], 'open')
+
+    def test_without_prefetch(self):
+        api = PagedAPI(self.items)
+        ids = [deal.id for deal in api.deal.stream(page_size=7, prefetch=False)]
+        self.assertEqual(ids, list(range(25)))
+        self.assertEqual(len(api.calls), 4)
+
+    def test_related_entities(self):
+        api = PagedAPI(self.items)
+        activities = list(api.organization.iter_all(
+            3, list_method='list_activities', page_size=10
+        ))
+        self.assertEqual(len(activities), 25)
+        self.assertTrue(all(isinstance(a, Activity) for a in activities))
+        self.assertEqual(api.calls[0][0], '/organizations/3/activities')
+
+    def test_user_all(self):
+        api = PagedAPI([{'id': i, 'name': 'u'} for i in range(3)])
+        self.assertEqual(len(api.user.all()), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import threading
+import unittest
+from unittest import TestCase
+
+from pipedrive import RateLimiter
+from pipedrive.ratelimit import endpoint_key
+from .utils import make_response
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class RateLimiterTest(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def limiter(self, **kwargs):
+        return RateLimiter(clock=self.clock, sleep=self.clock.sleep, **kwargs)
+
+    def test_static_rate(self):
+        limiter = self.limiter(rate=2, burst=1)
+        for _ in range(3):
+            limiter.release(limiter.acquire(), make_response({}))
+        self.assertEqual(self.clock.sleeps, [0.5, 0.5])
+
+    def test_headers_spread_budget(self):
+        limiter = self.limiter(burst=1)
+        limiter.release(limiter.acquire(), make_response({}, headers={
+            'X-RateLimit-Limit': '40',
+            'X-RateLimit-Remaining': '4',
+            'X-RateLimit-Reset': '2',
+        }))
+        for _ in range(2):
+            limiter.release(limiter.acquire())
+        # The first one goes out of the bucket; then 3 requests are left for
+        # 2 seconds
+        self.assertEqual(len(self.clock.sleeps), 1)
+        self.assertAlmostEqual(self.clock.sleeps[0], 2 / 3.0)
+        self.assertEqual(limiter.snapshot()['limit'], 40)
+
+    def test_exhausted_budget_waits_for_reset(self):
+        limiter = self.limiter()
+        limiter.release(limiter.acquire(), make_response({}, headers={
+            'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '3',
+        }))
+        limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [3])
+
+    def test_aimd(self):
+        limiter = self.limiter(max_concurrency=8, min_concurrency=2)
+        limiter.release(limiter.acquire(), make_response({}, 429))
+        self.assertEqual(limiter.snapshot()['concurrency'], 4)
+        limiter.release(limiter.acquire(), make_response({}, 429))
+        limiter.release(limiter.acquire(), make_response({}, 429))
+        self.assertEqual(limiter.snapshot()['concurrency'], 2)
+        self.assertEqual(limiter.snapshot()['throttled'], 3)
+        for _ in range(10):
+            limiter.release(limiter.acquire(), make_response({}))
+        self.assertEqual(limiter.snapshot()['concurrency'], 4)
+
+    def request(self, limiter, latency, endpoint):
+        started = limiter.acquire()
+        self.clock.now += latency
+        limiter.release(started, make_response({}), endpoint)
+
+    def test_latency_spike_per_endpoint(self):
+        limiter = self.limiter(max_concurrency=8)
+        for _ in range(3):
+            self.request(limiter, 0.05, 'GET /v1/users/{id}')
+        # A slower endpoint isn't a spike
+        self.request(limiter, 1.0, 'GET /v1/deals')
+        self.assertEqual(limiter.snapshot()['concurrency'], 8)
+        self.request(limiter, 0.5, 'GET /v1/users/{id}')
+        self.assertEqual(limiter.snapshot()['concurrency'], 4)
+
+    def test_endpoint_key(self):
+        self.assertEqual(endpoint_key('get', 'https://x/v1/deals/12/flow'),
+                         'GET /v1/deals/{id}/flow')
+        self.assertEqual(endpoint_key('GET', 'https://x/v1/deals?start=10'),
+                         'GET /v1/deals')
+
+    def test_concurrency_bound(self):
+        limiter = RateLimiter(max_concurrency=2)
+        peak = []
+        lock = threading.Lock()
+
+        def work():
+            started = limiter.acquire()
+            with lock:
+                peak.append(limiter.in_flight)
+            limiter.release(started)
+
+        threads = [threading.Thread(target=work) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLessEqual(max(peak), 2)
+        self.assertEqual(limiter.in_flight, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
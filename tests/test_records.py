@@ -0,0 +1,84 @@
+import unittest
+from unittest import TestCase
+
+from pipedrive import PipedriveAPI, CollectionResponse, Deal, ResponseCache
+from .utils import get_test_data, make_response, paginated_payload, stub_api
+
+
+class RecordModeTest(TestCase):
+    def setUp(self):
+        self.data = get_test_data('deal-detail.json')
+        self.response = {'success': True, 'data': [self.data]}
+
+    def test_raw(self):
+        deals = CollectionResponse(self.response, Deal, raw=True)
+        self.assertEqual(deals[0], self.data)
+        # A copy: the payload may be shared by the cache or single flight
+        deals[0]['title'] = 'Changed'
+        self.assertEqual(self.data['title'], 'From api')
+
+    def test_raw_shared_response(self):
+        api = stub_api(lambda *args: make_response(
+            paginated_payload([{'id': 1, 'name': 'Stage'}], 0, 10)
+        ), cache=ResponseCache())
+        api.stage.list(raw=True)[0]['name'] = 'X'
+        self.assertEqual(api.stage.list()[0].name, 'Stage')
+        self.assertEqual(len(api.transport.requests), 1)
+
+    def test_dict_records(self):
+        deal = CollectionResponse(self.response, Deal, record_type='dict')[0]
+        self.assertEqual(set(deal), set(Deal.fields))
+        self.assertEqual(deal['user_id'], self.data['user_id'])
+
+    def test_namedtuple_records(self):
+        deal = CollectionResponse(self.response, Deal,
+                                  record_type='namedtuple')[0]
+        self.assertIsInstance(deal, tuple)
+        self.assertEqual(deal.title, 'From api')
+        self.assertEqual(deal.add_time, '2015-01-28 23:28:43')
+
+    def test_slots_records(self):
+        deal = CollectionResponse(self.response, Deal, record_type='slots')[0]
+        self.assertFalse(hasattr(deal, '__dict__'))
+        self.assertEqual(deal.id, 1)
+        deal.title = 'Changed'
+        self.assertEqual(deal._asdict()['title'], 'Changed')
+
+    def test_callable(self):
+        deals = CollectionResponse(self.response, Deal,
+                                   record_type=lambda data: data['id'])
+        self.assertEqual(list(deals), [1])
+
+    def test_unknown_record_type(self):
+        self.assertRaises(ValueError, CollectionResponse, self.response, Deal,
+                          record_type='xml')
+
+
+class ReadOptionsTest(TestCase):
+    def api(self, **kwargs):
+        api = PipedriveAPI('token', **kwargs)
+        api.sent_params = []
+
+        def send_request(method, path, params=None, data=None, headers=None):
+            api.sent_params.append(dict(params))
+            return make_response(paginated_payload(
+                [{'id': 1, 'title': 'Deal'}], 0, 10
+            ))
+
+        api.send_request = send_request
+        return api
+
+    def test_per_call(self):
+        api = self.api()
+        deals = api.deal.find('Deal', raw=True)
+        self.assertEqual(deals[0], {'id': 1, 'title': 'Deal'})
+        self.assertEqual(set(api.sent_params[0]), {'term'})
+
+    def test_per_client(self):
+        api = self.api(read_options={'record_type': 'namedtuple'})
+        self.assertEqual(api.deal.list()[0].title, 'Deal')
+        self.assertIsInstance(api.deal.list(record_type=None)[0], Deal)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from unittest import TestCase
+
+from pipedrive import (
+    CollectionResponse, Deal, Stage, Organization, IdentityMap
+)
+from .utils import detail_handler, stub_api
+
+
+DEALS = {'success': True, 'data': [
+    {'id': 1, 'title': 'A', 'stage_id': 1, 'org_id': 10},
+    {'id': 2, 'title': 'B', 'stage_id': 2, 'org_id': 10},
+    {'id': 3, 'title': 'C', 'stage_id': 1,
+     'org_id': {'id': 11, 'name': 'Known'}},
+    {'id': 4, 'title': 'D', 'stage_id': 9, 'org_id': None},
+]}
+
+
+def fetched(resource_id):
+    return {'name': 'Fetched %d' % resource_id, 'pipeline_id': 1}
+
+
+class ResolveTest(TestCase):
+    def setUp(self):
+        self.api = stub_api(detail_handler(fetched, missing=(9,)))
+
+    def test_fetches_each_id_once(self):
+        deals = CollectionResponse(DEALS, Deal)
+        objects = self.api.resolve(deals, 'org_id', 'stage_id')
+        self.assertEqual(sorted(self.api.transport.paths),
+                         ['/organizations/10', '/stages/1', '/stages/2',
+                          '/stages/9'])
+        self.assertEqual(deals[0].stage_id.name, 'Fetched 1')
+        self.assertIs(deals[0].stage_id, deals[2].stage_id)
+        self.assertIs(deals[0].org_id, deals[1].org_id)
+        self.assertIsInstance(deals[0].org_id, Organization)
+        # Objects the API sent in full are kept, not fetched again
+        self.assertEqual(deals[2].org_id.name, 'Known')
+        self.assertIs(objects.get(Organization, 11), deals[2].org_id)
+
+    def test_failures_keep_the_stub(self):
+        deals = CollectionResponse(DEALS, Deal)
+        objects = self.api.resolve(deals, 'stage_id')
+        self.assertEqual(deals[3].stage_id.id, 9)
+        self.assertIsNone(deals[3].stage_id.name)
+        self.assertIn((Stage, 9), objects.errors)
+
+    def test_shared_identity_map(self):
+        objects = IdentityMap()
+        first = CollectionResponse(DEALS, Deal)
+        self.api.resolve(first, 'stage_id', identity_map=objects)
+        del self.api.transport.requests[:]
+        second = CollectionResponse(DEALS, Deal, lazy=True)
+        self.api.resolve(second, 'stage_id', identity_map=objects)
+        self.assertEqual(self.api.transport.paths, ['/stages/9'])
+        self.assertIs(second[0].stage_id, first[0].stage_id)
+        self.assertIsNone(second[0]._model)
+
+    def test_unknown_field(self):
+        deals = CollectionResponse(DEALS, Deal)
+        self.assertRaises(ValueError, self.api.resolve, deals, 'title')
+
+
+if __name__ == '__main__':
+    unittest.main()
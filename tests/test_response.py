@@ -0,0 +1,80 @@
+import asyncio
+import json
+import unittest
+from unittest import TestCase
+
+from pipedrive import (
+    AsyncPipedriveAPI, CollectionResponse, Deal, FakeBackend, ParsedResponse,
+    PipedriveAPI, PipedriveException, get_json_decoder
+)
+from .utils import make_response, paginated_payload
+
+
+class CountingDecoder(object):
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, content):
+        self.calls += 1
+        return json.loads(content)
+
+
+def backend():
+    return FakeBackend({'deal': [{'id': deal_id, 'title': 'Deal %d' % deal_id}
+                                 for deal_id in range(1, 4)]})
+
+
+class ParsedResponseTest(TestCase):
+    def test_envelope(self):
+        http_response = make_response(paginated_payload([{'id': 1}], 0, 1),
+                                      headers={'ETag': 'abc'})
+        parsed = ParsedResponse.decode(http_response)
+        self.assertTrue(parsed.success)
+        self.assertEqual(parsed.data, [{'id': 1}])
+        self.assertEqual(parsed.pagination['limit'], 1)
+        self.assertEqual(parsed.headers['ETag'], 'abc')
+        self.assertEqual(parsed.status_code, 200)
+        self.assertIs(parsed.json(), parsed.payload)
+        # Anything else comes from the HTTP response
+        self.assertTrue(parsed.ok)
+
+    def test_collection_response(self):
+        parsed = ParsedResponse.decode(make_response(
+            paginated_payload([{'id': 1}, {'id': 2}], 0, 2)
+        ))
+        collection = CollectionResponse(parsed, Deal)
+        self.assertEqual([deal.id for deal in collection], [1, 2])
+        self.assertFalse(collection.more_items_in_collection)
+
+    def test_get_json_decoder(self):
+        self.assertIs(get_json_decoder('json'), json.loads)
+        self.assertIs(get_json_decoder(len), len)
+        with self.assertRaises(ValueError):
+            get_json_decoder('yaml')
+
+
+class DecodeOnceTest(TestCase):
+    def test_each_response_is_decoded_once(self):
+        decoder = CountingDecoder()
+        api = PipedriveAPI('token', transport=backend(), json_decoder=decoder)
+        self.assertEqual(len(api.deal.list()), 3)
+        self.assertEqual(api.deal.detail(2).title, 'Deal 2')
+        self.assertEqual(decoder.calls, 2)
+
+    def test_errors_keep_the_http_response(self):
+        api = PipedriveAPI('token', transport=backend())
+        with self.assertRaises(PipedriveException) as context:
+            api.deal.detail(42)
+        self.assertEqual(context.exception.response.status_code, 404)
+
+    def test_async(self):
+        decoder = CountingDecoder()
+        api = AsyncPipedriveAPI('token', transport=backend(),
+                                json_decoder=decoder)
+        page = asyncio.run(api.deal.list())
+        self.assertEqual(len(page), 3)
+        self.assertEqual(decoder.calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+from unittest import TestCase, mock
+
+import requests
+
+from pipedrive import (
+    PipedriveAPI, PipedriveException, RetryPolicy, CircuitBreaker,
+    CircuitOpenError
+)
+from .utils import make_response
+
+
+class FakeSession(object):
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, params=None, data=None, headers=None):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+OK = make_response({'success': True, 'data': {'id': 1}})
+
+
+def failure(status_code, headers=None):
+    return make_response({'success': False, 'error': 'Oops'}, status_code,
+                         headers)
+
+
+class RetryPolicyTest(TestCase):
+    def test_decorrelated_jitter(self):
+        policy = RetryPolicy(max_retries=10, backoff_base=1, multiplier=3,
+                             max_backoff=5, time_budget=None)
+        err = requests.ConnectionError()
+        delay = None
+        for attempt in range(10):
+            delay = policy.next_delay('GET', err, attempt, 0, delay)
+            self.assertTrue(1 <= delay <= 5)
+        self.assertIsNone(policy.next_delay('GET', err, 10, 0, delay))
+
+    def test_retry_after(self):
+        policy = RetryPolicy()
+        err = PipedriveException('', {}, failure(429, {'Retry-After': '7'}))
+        self.assertEqual(policy.next_delay('GET', err, 0, 0), 7)
+        # Past the time budget
+        self.assertIsNone(policy.next_delay('GET', err, 0, 115))
+
+    def test_idempotency(self):
+        policy = RetryPolicy()
+        server_error = PipedriveException('', {}, failure(503))
+        self.assertTrue(policy.is_retryable('PUT', server_error))
+        self.assertFalse(policy.is_retryable('POST', server_error))
+        self.assertTrue(policy.is_retryable(
+            'POST', PipedriveException('', {}, failure(429))
+        ))
+        self.assertTrue(policy.is_retryable('POST', requests.ConnectTimeout()))
+        self.assertFalse(policy.is_retryable('POST', requests.ReadTimeout()))
+        self.assertFalse(policy.is_retryable(
+            'GET', PipedriveException('', {}, failure(404))
+        ))
+
+
+class CircuitBreakerTest(TestCase):
+    def test_open_and_recover(self):
+        now = [0]
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10,
+                                 clock=lambda: now[0])
+        for _ in range(2):
+            breaker.before_request()
+            breaker.record(requests.ConnectionError())
+        self.assertRaises(CircuitOpenError, breaker.before_request)
+
+        now[0] = 11
+        breaker.before_request()  # the half-open trial
+        self.assertRaises(CircuitOpenError, breaker.before_request)
+        breaker.record()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+
+@mock.patch('pipedrive.base.sleep')
+class SendRequestTest(TestCase):
+    def api(self, outcomes, **kwargs):
+        api = PipedriveAPI('token', **kwargs)
+        api.session = FakeSession(outcomes)
+        return api
+
+    def test_retries_iteratively(self, sleep):
+        api = self.api([requests.ConnectionError(), failure(502), OK])
+        self.assertIs(api.send_request('GET', '/deals/1').response, OK)
+        self.assertEqual(api.session.calls, 3)
+        self.assertEqual(sleep.call_count, 2)
+
+    def test_client_errors_are_not_retried(self, sleep):
+        api = self.api([failure(404), OK])
+        self.assertRaises(PipedriveException, api.send_request, 'GET', '/x')
+        self.assertEqual(api.session.calls, 1)
+
+    def test_non_json_response(self, sleep):
+        html = make_response({}, 502)
+        html._content = b'<html>Bad gateway</html>'
+        api = self.api([html, OK])
+        self.assertIs(api.send_request('GET', '/deals/1').response, OK)
+
+    def test_gives_up(self, sleep):
+        api = self.api([requests.ConnectionError()] * 3, max_retries=2)
+        self.assertRaises(requests.ConnectionError,
+                          api.send_request, 'GET', '/deals/1')
+        self.assertEqual(api.session.calls, 3)
+
+    def test_circuit_breaker_fails_fast(self, sleep):
+        api = self.api(
+            [failure(503)] * 4,
+            retry_policy=RetryPolicy(max_retries=0),
+            circuit_breaker=CircuitBreaker(failure_threshold=2),
+        )
+        for _ in range(2):
+            self.assertRaises(PipedriveException,
+                              api.send_request, 'GET', '/deals/1')
+        self.assertRaises(CircuitOpenError, api.send_request, 'GET', '/deals/1')
+        self.assertEqual(api.session.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
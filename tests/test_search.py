@@ -0,0 +1,89 @@
+import asyncio
+import unittest
+from unittest import TestCase
+
+from pipedrive import (
+    AsyncPipedriveAPI, Deal, Organization, Person, ResponseCache, SearchResult
+)
+from .utils import (
+    StubTransport, detail_handler, make_response, paginated_payload, stub_api
+)
+
+HITS = [
+    {'id': 1, 'type': 'deal', 'title': 'Acme deal'},
+    {'id': 7, 'type': 'person', 'title': 'Acme person'},
+    {'id': 3, 'type': 'organization', 'title': 'Acme'},
+    {'id': 2, 'type': 'deal', 'title': 'Acme renewal'},
+    {'id': 9, 'type': 'file', 'title': 'acme.pdf'},
+]
+
+DETAILS = {
+    '/deals/': {'title': 'Deal'},
+    '/persons/': {'name': 'Person'},
+    '/organizations/': {'name': 'Organization'},
+}
+
+
+def search_handler(method, path, params, data):
+    if path == '/searchResults':
+        start, limit = params.get('start', 0), params.get('limit', 100)
+        return make_response(paginated_payload(HITS, start, limit))
+    for prefix, fields in DETAILS.items():
+        if path.startswith(prefix):
+            return detail_handler(fields, missing=(2,))(method, path, params,
+                                                        data)
+    raise AssertionError('Unexpected request %s' % path)
+
+
+class SearchTest(TestCase):
+    def test_iter_results(self):
+        api = stub_api(search_handler)
+        results = list(api.search.iter_results('acme', page_size=2))
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(isinstance(result, SearchResult)
+                            for result in results))
+        self.assertEqual(results[0].result, 'Acme deal')
+        self.assertEqual(api.transport.paths, ['/searchResults'] * 3)
+
+    def test_cached(self):
+        api = stub_api(search_handler, cache=ResponseCache())
+        first = api.search.search_all_fields('acme')
+        second = api.search.search_all_fields('acme')
+        self.assertEqual([hit.result for hit in first],
+                         [hit.result for hit in second])
+        self.assertEqual(api.transport.paths, ['/searchResults'])
+        api.search.search_all_fields('other')
+        self.assertEqual(len(api.transport.paths), 2)
+
+    def test_hydrate(self):
+        api = stub_api(search_handler)
+        found = api.search.hydrate(api.search.search_all_fields('acme'))
+        self.assertIsInstance(found[('deal', 1)], Deal)
+        self.assertIsInstance(found[('person', 7)], Person)
+        self.assertIsInstance(found[('organization', 3)], Organization)
+        self.assertEqual(found.failed, [('deal', 2), ('file', 9)])
+        self.assertIsInstance(found.errors[('file', 9)], ValueError)
+
+    def test_hydrate_raw(self):
+        api = stub_api(search_handler)
+        found = api.search.hydrate(HITS[:2])
+        self.assertEqual(found.succeeded, [('deal', 1), ('person', 7)])
+
+    def test_hydrate_async(self):
+        api = AsyncPipedriveAPI('token',
+                                transport=StubTransport(search_handler))
+
+        async def search():
+            return await api.search.hydrate(
+                await api.search.search_all_fields('acme')
+            )
+
+        found = asyncio.run(search())
+        self.assertIsInstance(found[('person', 7)], Person)
+        self.assertEqual(found.succeeded,
+                         [('deal', 1), ('person', 7), ('organization', 3)])
+        self.assertEqual(found.failed, [('deal', 2), ('file', 9)])
+
+
+if __name__ == '__main__':
+    unittest.main()
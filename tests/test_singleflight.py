@@ -0,0 +1,102 @@
+import threading
+import unittest
+from unittest import TestCase
+
+from pipedrive import PipedriveAPI, PipedriveException, SingleFlight
+from .utils import make_response
+
+
+class SlowAPI(PipedriveAPI):
+    """Answers from _send once `release` is set, counting the requests."""
+
+    def __init__(self, **kwargs):
+        super(SlowAPI, self).__init__('token', **kwargs)
+        self.release = threading.Event()
+        self.sent = []
+        self.fail = False
+
+    def _send(self, method, url, params, data, headers=None):
+        self.sent.append((method, url))
+        self.release.wait(5)
+        if self.fail:
+            raise PipedriveException('Not found', {}, make_response({}, 404))
+        return make_response({'success': True,
+                              'data': {'id': 1, 'name': 'Someone'}})
+
+
+def in_threads(func, count):
+    results = [None] * count
+
+    def run(index):
+        try:
+            results[index] = func()
+        except Exception as err:
+            results[index] = err
+
+    threads = [threading.Thread(target=run, args=(index,))
+               for index in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+class SingleFlightTest(TestCase):
+    def wait_for_callers(self, api, count):
+        for _ in range(500):
+            if api.single_flight.shared >= count - 1 and api.sent:
+                return
+            threading.Event().wait(0.01)
+
+    def test_concurrent_gets_share_one_request(self):
+        api = SlowAPI()
+        threads, results = in_threads(lambda: api.user.detail(1), 5)
+        self.wait_for_callers(api, 5)
+        api.release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(api.sent), 1)
+        self.assertEqual([user.id for user in results], [1] * 5)
+        self.assertEqual(api.single_flight.shared, 4)
+
+    def test_errors_are_shared(self):
+        api = SlowAPI()
+        api.fail = True
+        threads, results = in_threads(lambda: api.stage.detail(3), 3)
+        self.wait_for_callers(api, 3)
+        api.release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(api.sent), 1)
+        for result in results:
+            self.assertIsInstance(result, PipedriveException)
+
+    def test_different_params_are_not_shared(self):
+        api = SlowAPI()
+        api.release.set()
+        api.user.detail(1)
+        api.user.detail(2)
+        self.assertEqual(len(api.sent), 2)
+
+    def test_writes_are_not_coalesced(self):
+        api = SlowAPI()
+        api.release.set()
+        api.send_request('PUT', '/users/1', data={'name': 'a'})
+        api.send_request('PUT', '/users/1', data={'name': 'a'})
+        self.assertEqual(len(api.sent), 2)
+
+    def test_window(self):
+        now = [0.0]
+        api = SlowAPI(single_flight=SingleFlight(window=1.0,
+                                                 clock=lambda: now[0]))
+        api.release.set()
+        api.user.detail(1)
+        now[0] = 0.5
+        api.user.detail(1)
+        self.assertEqual(len(api.sent), 1)
+        now[0] = 2.0
+        api.user.detail(1)
+        self.assertEqual(len(api.sent), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import json
+import unittest
+from unittest import TestCase
+
+from benchmarks.fakeserver import FakePipedriveServer
+from pipedrive import (
+    Deal, FakeBackend, PipedriveAPI, PipedriveException, StreamedCollection,
+    iter_json_items
+)
+from .utils import make_response, paginated_payload
+
+
+def chunked(payload, size):
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    return [body[start:start + size] for start in range(0, len(body), size)]
+
+
+class IterJsonItemsTest(TestCase):
+    def test_byte_by_byte(self):
+        items = [{'id': 1, 'title': u'Caf\xe9 ☃', 'org_id': {'value': 2}},
+                 {'id': 2, 'value': 1.5e3, 'tags': [1, [2, {}]]}]
+        payload = paginated_payload(items, 0, 2)
+        payload['count'] = 12345
+        envelope = {}
+        parsed = list(iter_json_items(chunked(payload, 1), envelope))
+        self.assertEqual(parsed, items)
+        self.assertEqual(envelope['count'], 12345)
+        self.assertTrue(envelope['success'])
+        self.assertEqual(envelope['additional_data'],
+                         payload['additional_data'])
+
+    def test_empty_and_null_data(self):
+        for payload in ({'success': True, 'data': []},
+                        {'success': True, 'data': None}, {}):
+            envelope = {}
+            self.assertEqual(
+                list(iter_json_items(chunked(payload, 3), envelope)), []
+            )
+
+    def test_invalid(self):
+        for body in (b'<html>', b'{"data": [{"id": 1}', b'{"data": [1 2]}'):
+            with self.assertRaises(ValueError):
+                list(iter_json_items([body], {}))
+
+
+class StreamedCollectionTest(TestCase):
+    def setUp(self):
+        self.backend = FakeBackend({'deal': [
+            {'id': deal_id, 'title': 'Deal %d' % deal_id}
+            for deal_id in range(1, 6)
+        ]})
+        self.api = PipedriveAPI('token', transport=self.backend)
+
+    def test_list(self):
+        page = self.api.deal.list(stream=True, limit=2)
+        self.assertIsInstance(page, StreamedCollection)
+        deals = list(page)
+        self.assertTrue(all(isinstance(deal, Deal) for deal in deals))
+        self.assertEqual([deal.id for deal in deals], [1, 2])
+        self.assertTrue(page.more_items_in_collection)
+        self.assertEqual(page.next_start, 2)
+
+    def test_pagination_skips_the_items(self):
+        page = self.api.deal.list(stream=True, limit=2, raw=True)
+        self.assertEqual(page.next_start, 2)
+        self.assertEqual(list(page), [])
+
+    def test_iter_all(self):
+        deals = list(self.api.deal.iter_all(stream=True, page_size=2))
+        self.assertEqual([deal.id for deal in deals], [1, 2, 3, 4, 5])
+        found = list(self.api.deal.find('deal', stream=True, lazy=True))
+        self.assertEqual(len(found), 5)
+
+    def test_unsuccessful(self):
+        response = make_response({'success': False, 'error': 'Nope'})
+        page = StreamedCollection(response, Deal)
+        with self.assertRaises(PipedriveException):
+            list(page)
+
+    def test_from_the_socket(self):
+        with FakePipedriveServer(deals=250) as server:
+            api = PipedriveAPI('token', base_url=server.base_url)
+            page = api.deal.list(stream=True, limit=100, raw=True)
+            # Nothing was read yet
+            self.assertIs(page.response._content, False)
+            self.assertEqual(len(list(page)), 100)
+            deals = list(api.deal.iter_all(stream=True, page_size=100))
+            self.assertEqual([deal.id for deal in deals], list(range(1, 251)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import os
+import tempfile
+from datetime import datetime
+from unittest import TestCase
+
+from pipedrive import (
+    BASE_URL, FakeBackend, PipedriveAPI, SyncEngine, SyncCheckpointStore, Change, Deal
+)
+from .utils import make_response, paginated_payload
+
+
+DEALS = [
+    {'id': 1, 'title': 'First', 'update_time': '2017-01-01 10:00:00'},
+    {'id': 2, 'title': 'Second', 'update_time': '2017-01-02 10:00:00'},
+    {'id': 3, 'title': 'Third', 'update_time': '2017-01-03 10:00:00'},
+]
+
+RECENTS = [
+    {'item': 'deal', 'id': 2,
+     'data': {'id': 2, 'title': 'Second v2', 'status': 'open'}},
+    {'item': 'deal', 'id': 3,
+     'data': {'id': 3, 'title': 'Third', 'status': 'deleted'}},
+]
+
+
+class FakeAPI(PipedriveAPI):
+    def __init__(self):
+        super(FakeAPI, self).__init__('token')
+        self.requests = []
+        self.fail_at = None
+
+    def send_request(self, method, path, params=None, data=None,
+                     headers=None):
+        params = dict(params)
+        self.requests.append((path, params))
+        if self.fail_at == (path, params.get('start')):
+            raise IOError('Connection lost')
+        items = DEALS if path == '/deals' else RECENTS
+        return make_response(paginated_payload(
+            items, params.get('start', 0), params.get('limit', 100)
+        ))
+
+
+class SyncTest(TestCase):
+    def setUp(self):
+        self.api = FakeAPI()
+        self.store = SyncCheckpointStore()
+        self.engine = SyncEngine(
+            self.api, self.store, resources=['deal'], page_size=2,
+            now=lambda: datetime(2017, 2, 1, 12, 0, 0)
+        )
+
+    def test_initial_sync(self):
+        changes = list(self.engine.changes())
+        self.assertEqual([(c.action, c.resource, c.id) for c in changes],
+                         [('upsert', 'deal', 1), ('upsert', 'deal', 2),
+                          ('upsert', 'deal', 3)])
+        self.assertIsInstance(changes[0].model, Deal)
+        self.assertEqual(self.api.requests[0][1]['sort'], 'id ASC')
+        checkpoint = self.store.get('deal')
+        self.assertEqual(checkpoint.since, '2017-02-01 11:59:00')
+        self.assertEqual(checkpoint.start, 0)
+
+    def test_incremental_sync(self):
+        list(self.engine.changes())
+        self.api.requests = []
+        changes = list(self.engine.changes())
+        self.assertEqual(
+            [(c.action, c.id, c.model.title) for c in changes],
+            [('upsert', 2, 'Second v2'), ('delete', 3, 'Third')]
+        )
+        path, params = self.api.requests[0]
+        self.assertEqual(path, '/recents')
+        self.assertEqual(params['since_timestamp'], '2017-02-01 11:59:00')
+        self.assertEqual(params['items'], 'deal')
+
+    def test_resume_after_crash(self):
+        # The second page starts from the last deal yielded
+        self.api.fail_at = ('/deals', 1)
+        changes = self.engine.changes()
+        self.assertEqual([next(changes).id, next(changes).id], [1, 2])
+        self.assertRaises(IOError, list, changes)
+        self.assertEqual(self.store.get('deal').start, 2)
+
+        self.api.fail_at = None
+        self.api.requests = []
+        resumed = list(self.engine.changes())
+        self.assertEqual([change.id for change in resumed], [3])
+        self.assertEqual(self.api.requests[0][1]['start'], 1)
+
+    def test_raw(self):
+        self.engine.raw = True
+        change = next(self.engine.changes())
+        self.assertEqual(change, Change('upsert', 'deal', 1, DEALS[0]))
+
+    def test_persisted_store(self):
+        handle, path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        store = SyncCheckpointStore(path)
+        list(SyncEngine(self.api, store, resources=['deal']).changes())
+        store.close()
+        self.assertIsNotNone(SyncCheckpointStore(path).get('deal').since)
+
+    def test_reset(self):
+        list(self.engine.changes())
+        self.store.reset('deal')
+        self.assertIsNone(self.store.get('deal').since)
+
+
+class ChangesDuringSyncTest(TestCase):
+    def setUp(self):
+        self.backend = FakeBackend({'deal': [
+            {'id': deal_id, 'title': 'Deal %d' % deal_id,
+             'update_time': '2017-01-0%d 10:00:00' % deal_id}
+            for deal_id in range(1, 8)
+        ]})
+        self.api = PipedriveAPI('token', transport=self.backend)
+        self.engine = SyncEngine(self.api, SyncCheckpointStore(),
+                                 resources=['deal'], page_size=2)
+
+    def first_pass(self, change_after_first_page):
+        changes = self.engine.changes()
+        seen = [next(changes).id, next(changes).id]
+        change_after_first_page()
+        return seen + [change.id for change in changes]
+
+    def edit(self, deal_id):
+        self.backend.request('PUT', BASE_URL + '/deals/%d' % deal_id,
+                             data={'title': 'Edited'})
+
+    def test_edit(self):
+        # The edited deal doesn't move in the listing, nothing is skipped
+        self.assertEqual(self.first_pass(lambda: self.edit(1)),
+                         [1, 2, 3, 4, 5, 6, 7])
+        changes = list(self.engine.changes())
+        self.assertEqual([(change.id, change.model.title)
+                          for change in changes], [(1, 'Edited')])
+
+    def test_delete(self):
+        seen = self.first_pass(
+            lambda: self.api.deal.bulk_delete([1, 2, 3, 4])
+        )
+        self.assertEqual(seen, [1, 2, 5, 6, 7])
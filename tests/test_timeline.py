@@ -0,0 +1,149 @@
+import asyncio
+import datetime
+import unittest
+from unittest import TestCase
+
+from pipedrive import (
+    AsyncPipedriveAPI, AsyncTransport, Deal, Timeline, TimelinePeriod,
+    TimelineTotals
+)
+from pipedrive.timeline import add_intervals, timeline_chunks
+from .utils import StubTransport, make_response, stub_api
+
+
+def month_period(month):
+    deals = [
+        {'id': month * 10 + 1, 'title': 'A', 'value': 100, 'currency': 'USD',
+         'stage_id': 1},
+        {'id': month * 10 + 2, 'title': 'B', 'value': 50, 'currency': 'EUR',
+         'stage_id': {'id': 2, 'name': 'Won'}},
+        {'id': month * 10 + 3, 'title': 'C', 'value': 25, 'currency': 'USD',
+         'stage_id': 1},
+    ]
+    return {
+        'period_start': '2020-%02d-01 00:00:00' % month,
+        'period_end': '2020-%02d-28 23:59:59' % month,
+        'deals': deals,
+        'totals': {'count': 3, 'values': {'USD': 125, 'EUR': 50},
+                   'won_count': 1, 'won_values': {'EUR': 50}},
+    }
+
+
+def timeline_handler(method, path, params, data):
+    start = int(params['start_date'][5:7])
+    periods = [month_period(month)
+               for month in range(start, start + params['amount'])]
+    return make_response({'success': True, 'data': periods})
+
+
+class SlowTransport(AsyncTransport):
+    """Answers like a StubTransport, a bit later, counting the requests in
+    flight."""
+
+    def __init__(self, handler):
+        self.stub = StubTransport(handler)
+        self.in_flight = 0
+        self.peak = 0
+
+    async def request(self, method, url, params=None, data=None,
+                      headers=None):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return self.stub.request(method, url, params, data, headers)
+
+
+class TimelineChunksTest(TestCase):
+    def test_add_intervals(self):
+        start = datetime.date(2020, 1, 31)
+        self.assertEqual(add_intervals(start, 'month', 1),
+                         datetime.date(2020, 2, 29))
+        self.assertEqual(add_intervals(start, 'quarter', 4),
+                         datetime.date(2021, 1, 31))
+        self.assertEqual(add_intervals(start, 'week', 2),
+                         datetime.date(2020, 2, 14))
+
+    def test_chunks(self):
+        self.assertEqual(timeline_chunks('2020-01-01', 'month', 7, 3), [
+            (datetime.date(2020, 1, 1), 3),
+            (datetime.date(2020, 4, 1), 3),
+            (datetime.date(2020, 7, 1), 1),
+        ])
+
+
+class TimelinePeriodsTest(TestCase):
+    def setUp(self):
+        self.api = stub_api(timeline_handler)
+        self.timeline = self.api.deal.timeline_periods(
+            datetime.date(2020, 1, 1), 'month', 7, 'add_time', chunk_size=3,
+            pipeline_id=4
+        )
+
+    def test_chunked_requests(self):
+        sent = [params for _, path, params, _ in
+                self.api.transport.requests]
+        self.assertEqual(set(self.api.transport.paths), {'/deals/timeline'})
+        starts = sorted((params['start_date'], params['amount'])
+                        for params in sent)
+        self.assertEqual(starts, [('2020-01-01', 3), ('2020-04-01', 3),
+                                  ('2020-07-01', 1)])
+        # pipeline_id isn't dropped without a user_id
+        self.assertTrue(all(params['pipeline_id'] == 4 for params in sent))
+        self.assertTrue(all('user_id' not in params for params in sent))
+
+    def test_typed_periods(self):
+        self.assertIsInstance(self.timeline, Timeline)
+        self.assertEqual(len(self.timeline), 7)
+        period = self.timeline[6]
+        self.assertIsInstance(period, TimelinePeriod)
+        self.assertEqual(period.period_start, datetime.datetime(2020, 7, 1))
+        self.assertIsInstance(period.deals[0], Deal)
+        self.assertEqual(period.totals.count, 3)
+
+    def test_totals(self):
+        totals = self.timeline.totals()
+        self.assertIsInstance(totals, TimelineTotals)
+        self.assertEqual(totals.count, 21)
+        self.assertEqual(totals.won_count, 7)
+        self.assertEqual(totals.values['USD'], 875)
+        self.assertEqual(totals.won_values['EUR'], 350)
+
+    def test_aggregate(self):
+        columns = self.timeline.aggregate(by=('currency', 'stage_id'))
+        self.assertEqual(list(columns),
+                         ['period_start', 'currency', 'stage_id', 'count',
+                          'sum'])
+        self.assertEqual(len(columns['count']), 14)
+        self.assertEqual(columns['period_start'][:2],
+                         ['2020-01-01 00:00:00'] * 2)
+        self.assertEqual(columns['currency'][:2], ['USD', 'EUR'])
+        self.assertEqual(columns['stage_id'][:2], [1, 2])
+        self.assertEqual(columns['count'][:2], [2, 1])
+        self.assertEqual(columns['sum'][:2], [125.0, 50.0])
+
+        arrays = self.timeline.aggregate(by=('currency',), output='numpy')
+        self.assertEqual(arrays['sum'].sum(), 7 * 175.0)
+        self.assertEqual(arrays['count'].tolist(), [2, 1] * 7)
+
+    def test_invalid_interval(self):
+        with self.assertRaises(ValueError):
+            self.api.deal.timeline_periods('2020-01-01', 'year', 2,
+                                           'add_time')
+
+
+class AsyncTimelineTest(TestCase):
+    def test_concurrent_chunks(self):
+        transport = SlowTransport(timeline_handler)
+        api = AsyncPipedriveAPI('token', transport=transport)
+        timeline = asyncio.run(api.deal.timeline_periods(
+            '2020-01-01', 'month', 7, 'add_time', chunk_size=3
+        ))
+        self.assertIsInstance(timeline, Timeline)
+        self.assertEqual(len(timeline), 7)
+        self.assertEqual(timeline.totals().count, 21)
+        self.assertEqual(transport.peak, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,221 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+from unittest import TestCase
+
+from benchmarks.fakeserver import FakePipedriveServer
+from pipedrive import (
+    AsyncPipedriveAPI, CassetteError, CassetteTransport, Deal, FakeBackend,
+    Person, PipedriveAPI, PipedriveException, RateLimiter, RequestsTransport,
+    Transport
+)
+
+
+def seeded_backend(count=5):
+    return FakeBackend({'deal': [
+        {'id': deal_id, 'title': 'Deal %d' % deal_id, 'status': 'open',
+         'user_id': {'id': 1 + deal_id % 2, 'name': 'Owner'}}
+        for deal_id in range(1, count + 1)
+    ]})
+
+
+class FakeBackendTest(TestCase):
+    def setUp(self):
+        self.backend = seeded_backend()
+        self.api = PipedriveAPI('token', transport=self.backend)
+
+    def test_crud(self):
+        deal = self.api.deal.create(Deal({'title': 'New deal'}))
+        self.assertEqual(deal.id, 6)
+        self.assertEqual(self.api.deal.detail(6).title, 'New deal')
+
+        self.api.deal.delete(deal)
+        with self.assertRaises(PipedriveException):
+            self.api.deal.detail(6)
+
+    def test_update(self):
+        person = self.api.person.create(Person({'name': 'Someone'}))
+        person.name = 'Renamed'
+        self.api.person.update(person)
+        self.assertEqual(self.api.person.detail(person.id).name, 'Renamed')
+
+    def test_pagination(self):
+        page = self.api.deal.list(limit=2, start=2)
+        self.assertEqual([deal.id for deal in page], [3, 4])
+        self.assertTrue(page.more_items_in_collection)
+        self.assertEqual(page.next_start, 4)
+        all_ids = [deal.id for deal in self.api.deal.iter_all(page_size=2)]
+        self.assertEqual(all_ids, [1, 2, 3, 4, 5])
+
+    def test_filters_and_sort(self):
+        page = self.api.deal.list(user_id=1, sort='title DESC')
+        self.assertEqual([deal.id for deal in page], [4, 2])
+
+    def test_find(self):
+        self.backend.seed('deal', [{'title': 'Special offer'}])
+        found = self.api.deal.find('special')
+        self.assertEqual([deal.title for deal in found], ['Special offer'])
+
+    def test_bulk_delete(self):
+        result = self.api.deal.bulk_delete([1, 2, 3], chunk_size=2)
+        self.assertFalse(result.errors)
+        self.assertEqual([item['id'] for item in self.backend.items('deal')],
+                         [4, 5])
+
+    def test_recents(self):
+        self.backend.clock = lambda: datetime(2030, 1, 1)
+        self.api.deal.delete(Deal({'id': 1}))
+        changes = list(self.api.recents.iter_all(
+            '2029-12-31 00:00:00', items='deal', raw=True
+        ))
+        self.assertEqual(len(changes), 1)
+        self.assertTrue(changes[0]['data']['deleted'])
+
+    def test_default_without_token(self):
+        api = PipedriveAPI()
+        self.assertIsInstance(api.transport, FakeBackend)
+        self.assertEqual(len(api.deal.list()), 0)
+        api.deal.create(Deal({'title': 'Offline'}))
+        self.assertEqual([deal.title for deal in api.deal.list()],
+                         ['Offline'])
+
+    def test_async(self):
+        api = AsyncPipedriveAPI('token', transport=self.backend)
+
+        async def run():
+            page = await api.deal.list(limit=2)
+            deal = await api.deal.detail(5)
+            return page, deal
+
+        page, deal = asyncio.run(run())
+        self.assertEqual(len(page), 2)
+        self.assertEqual(deal.title, 'Deal 5')
+
+
+class CassetteTransportTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'deals.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_record_and_replay(self):
+        recorder = CassetteTransport(self.path, mode='record',
+                                     transport=seeded_backend())
+        api = PipedriveAPI('secret', transport=recorder)
+        api.deal.list(limit=2)
+        api.deal.create(Deal({'title': 'Recorded'}))
+        recorder.close()
+        with open(self.path) as cassette:
+            self.assertNotIn('secret', cassette.read())
+
+        api = PipedriveAPI('other', transport=CassetteTransport(self.path))
+        self.assertEqual([deal.id for deal in api.deal.list(limit=2)], [1, 2])
+        self.assertEqual(api.deal.create(Deal({'title': 'Recorded'})).id, 6)
+
+    def test_unknown_request(self):
+        recorder = CassetteTransport(self.path, mode='record',
+                                     transport=seeded_backend())
+        PipedriveAPI('token', transport=recorder).deal.detail(1)
+        recorder.save()
+
+        api = PipedriveAPI('token', transport=CassetteTransport(self.path))
+        api.deal.detail(1)
+        with self.assertRaises(CassetteError):
+            # Each recorded interaction is played once
+            api.deal.detail(1)
+        with self.assertRaises(CassetteError):
+            api.deal.detail(2)
+
+    def test_is_a_transport(self):
+        self.assertIsInstance(FakeBackend(), Transport)
+        with self.assertRaises(ValueError):
+            CassetteTransport(self.path, mode='rewind')
+
+
+
+class BarrierTransport(RequestsTransport):
+    """Holds every request until `parties` of them are in flight at once."""
+
+    def __init__(self, parties, **kwargs):
+        super(BarrierTransport, self).__init__(**kwargs)
+        self.barrier = threading.Barrier(parties, timeout=10)
+
+    def request(self, *args, **kwargs):
+        self.barrier.wait()
+        return super(BarrierTransport, self).request(*args, **kwargs)
+
+
+class RequestsTransportTest(TestCase):
+    def test_session_settings(self):
+        transport = RequestsTransport(pool_maxsize=64, tcp_keepalive=30,
+                                      compress=True)
+        session = transport.session
+        adapter = session.get_adapter('https://api.pipedrive.com/v1')
+        self.assertEqual(adapter._pool_maxsize, 64)
+        self.assertIn('gzip', session.headers['Accept-Encoding'])
+        self.assertEqual(session.headers['Connection'], 'keep-alive')
+        # No cookie is kept, for any domain
+        self.assertEqual(session.cookies.get_policy().allowed_domains(), ())
+        self.assertIs(transport.session, session)
+
+    def test_per_thread_sessions(self):
+        transport = RequestsTransport(per_thread=True)
+        sessions = []
+        threads = [threading.Thread(
+            target=lambda: sessions.append(transport.session)
+        ) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(map(id, sessions))), 3)
+        self.assertIs(transport.session, transport.session)
+
+    def test_rate_limiter_sizing(self):
+        api = PipedriveAPI('token', transport=RequestsTransport())
+        self.assertEqual(api.rate_limiter.max_concurrency, 32)
+        limiter = RateLimiter(max_concurrency=4)
+        api = PipedriveAPI('token', rate_limiter=limiter,
+                           transport=RequestsTransport(pool_maxsize=64))
+        self.assertIs(api.rate_limiter, limiter)
+
+    def test_params_are_not_modified(self):
+        api = PipedriveAPI('token', transport=seeded_backend())
+        params = {'limit': 2}
+        api.send_request('GET', '/deals', params)
+        self.assertEqual(params, {'limit': 2})
+
+    def test_shared_by_many_threads(self):
+        with FakePipedriveServer(deals=64) as server:
+            # The 64 requests must all be in flight at once to get through
+            transport = BarrierTransport(64, pool_maxsize=64,
+                                         timeout=(5, 30))
+            api = PipedriveAPI('token', base_url=server.base_url,
+                               transport=transport)
+            self.assertEqual(api.rate_limiter.max_concurrency, 64)
+            params = {'status': 'open'}
+            results = [None] * 64
+
+            def fetch(index):
+                results[index] = api.deal.list(start=index, limit=1,
+                                               **params)[0].id
+
+            threads = [threading.Thread(target=fetch, args=(index,))
+                       for index in range(64)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            api.close()
+        self.assertEqual(results, list(range(1, 65)))
+        self.assertEqual(params, {'status': 'open'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,88 @@
 import json
+import threading
 from os import path
 
+import requests
+
+from pipedrive import PipedriveAPI, Transport
+from pipedrive.transport import api_path
+
 
 def get_test_data(file_name):
     return json.load(
         open(path.join(path.dirname(__file__), 'data', file_name)))['data']
+
+
+def make_response(payload, status_code=200, headers=None):
+    """Builds a requests.Response holding the given json payload."""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(payload).encode('utf-8')
+    response.headers.update(headers or {})
+    response.encoding = 'utf-8'
+    return response
+
+
+def paginated_payload(items, start, limit):
+    """The json payload of one page of a list endpoint over `items`."""
+    page = items[start:start + limit]
+    more = start + limit < len(items)
+    return {
+        'success': True,
+        'data': page,
+        'additional_data': {'pagination': {
+            'start': start,
+            'limit': limit,
+            'more_items_in_collection': more,
+            'next_start': start + limit if more else None,
+        }},
+    }
+
+
+class StubTransport(Transport):
+    """Answers the requests with handler(method, path, params, data), which
+    returns a response (see make_response). The requests go through the whole
+    client (retries, decoding, observers...) and are recorded, without the
+    api_token, in `requests`. Works for AsyncPipedriveAPI too.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def request(self, method, url, params=None, data=None, headers=None,
+                stream=False):
+        path = api_path(url)
+        params = dict(params or {})
+        params.pop('api_token', None)
+        with self.lock:
+            self.requests.append((method, path, params, data))
+        return self.handler(method, path, params, data)
+
+    @property
+    def paths(self):
+        return [path for _, path, _, _ in self.requests]
+
+
+def stub_api(handler, **kwargs):
+    """A PipedriveAPI served by a StubTransport over handler."""
+    return PipedriveAPI('token', transport=StubTransport(handler), **kwargs)
+
+
+def not_found():
+    return make_response({'success': False, 'error': 'Not found'}, 404)
+
+
+def detail_handler(fields, missing=()):
+    """A handler answering GET /<resources>/<id> with dict(fields, id=id),
+    and with a 404 for the `missing` ids. fields may also be a function of
+    the id."""
+    def handle(method, path, params, data):
+        resource_id = int(path.rsplit('/', 1)[1])
+        if resource_id in missing:
+            return not_found()
+        values = fields(resource_id) if callable(fields) else fields
+        return make_response({'success': True,
+                              'data': dict(values, id=resource_id)})
+    return handle